@@ -26,6 +26,107 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # LLM provider HTTP client (connection pool size and timeouts in seconds)
+    app.config['GROQ_HTTP_POOL_CONNECTIONS'] = int(os.getenv('GROQ_HTTP_POOL_CONNECTIONS', 4))
+    app.config['GROQ_HTTP_POOL_MAXSIZE'] = int(os.getenv('GROQ_HTTP_POOL_MAXSIZE', 16))
+    app.config['GROQ_HTTP_CONNECT_TIMEOUT'] = float(os.getenv('GROQ_HTTP_CONNECT_TIMEOUT', 5))
+    app.config['GROQ_HTTP_READ_TIMEOUT'] = float(os.getenv('GROQ_HTTP_READ_TIMEOUT', 30))
+    app.config['GROQ_HTTP_TOTAL_TIMEOUT'] = float(os.getenv('GROQ_HTTP_TOTAL_TIMEOUT', 30))
+    
+    # Generated meal plan cache (TTL in seconds, budget bucket in KES)
+    app.config['MEAL_CACHE_ENABLED'] = os.getenv('MEAL_CACHE_ENABLED', 'true').lower() == 'true'
+    app.config['MEAL_CACHE_MAX_ENTRIES'] = int(os.getenv('MEAL_CACHE_MAX_ENTRIES', 512))
+    app.config['MEAL_CACHE_TTL'] = int(os.getenv('MEAL_CACHE_TTL', 3600))
+    app.config['MEAL_CACHE_BUDGET_BUCKET'] = float(os.getenv('MEAL_CACHE_BUDGET_BUCKET', 10))
+    # Directory shared by all worker processes (and the prewarm command); memory only if unset
+    app.config['MEAL_CACHE_DIR'] = os.getenv('MEAL_CACHE_DIR')
+    
+    # Catalog of fallback meals used when the provider can't be used
+    app.config['MEAL_CATALOG_PATH'] = os.getenv('MEAL_CATALOG_PATH', os.path.join(app.root_path, 'data', 'mock_meals.json'))
+    
+    # Ingredient price table used to verify (and, in 'correct' mode, repair) generated meal costs
+    app.config['INGREDIENT_PRICES_PATH'] = os.getenv('INGREDIENT_PRICES_PATH', os.path.join(app.root_path, 'data', 'ingredient_prices.json'))
+    app.config['COST_VERIFICATION'] = os.getenv('COST_VERIFICATION', 'correct').lower()
+    app.config['COST_VERIFICATION_TOLERANCE'] = float(os.getenv('COST_VERIFICATION_TOLERANCE', 0.5))
+    
+    # Local meal composer ('simple': requests whose preferences are fully understood, 'always' or 'off')
+    app.config['MEAL_COMPOSER_MODE'] = os.getenv('MEAL_COMPOSER_MODE', 'simple').lower()
+    app.config['MEAL_TEMPLATES_PATH'] = os.getenv('MEAL_TEMPLATES_PATH', os.path.join(app.root_path, 'data', 'meal_templates.json'))
+    
+    # Ingredient nutrient matrix used to fill in (and, in 'correct' mode, fix) meal nutritional info
+    app.config['INGREDIENT_NUTRIENTS_PATH'] = os.getenv('INGREDIENT_NUTRIENTS_PATH', os.path.join(app.root_path, 'data', 'ingredient_nutrients.json'))
+    app.config['NUTRITION_VERIFICATION'] = os.getenv('NUTRITION_VERIFICATION', 'correct').lower()
+    app.config['NUTRITION_TOLERANCE'] = float(os.getenv('NUTRITION_TOLERANCE', 0.35))
+    
+    # Serve stored meals from the meals table before calling the provider, and store validated results
+    app.config['MEAL_RETRIEVAL_ENABLED'] = os.getenv('MEAL_RETRIEVAL_ENABLED', 'true').lower() == 'true'
+    app.config['MEAL_RETRIEVAL_CANDIDATES'] = int(os.getenv('MEAL_RETRIEVAL_CANDIDATES', 50))
+    app.config['MEAL_WRITE_BACK_ENABLED'] = os.getenv('MEAL_WRITE_BACK_ENABLED', 'true').lower() == 'true'
+    
+    # Meal history pages (rows per page, and the most a client may ask for)
+    app.config['HISTORY_PAGE_SIZE'] = int(os.getenv('HISTORY_PAGE_SIZE', 20))
+    app.config['HISTORY_MAX_PAGE_SIZE'] = int(os.getenv('HISTORY_MAX_PAGE_SIZE', 100))
+    # Rows read from the database and written to the response at a time by history exports
+    app.config['HISTORY_EXPORT_CHUNK_SIZE'] = int(os.getenv('HISTORY_EXPORT_CHUNK_SIZE', 500))
+    
+    # Cache prewarming (flask prewarm-cache): popular combinations from the last N days
+    app.config['PREWARM_TOP_COMBINATIONS'] = int(os.getenv('PREWARM_TOP_COMBINATIONS', 20))
+    app.config['PREWARM_LOOKBACK_DAYS'] = int(os.getenv('PREWARM_LOOKBACK_DAYS', 30))
+    app.config['PREWARM_CACHE_TTL'] = float(os.getenv('PREWARM_CACHE_TTL', 6 * 3600))
+    
+    # Coalescing of identical in-flight generations (set a lock dir to share across workers)
+    app.config['SINGLE_FLIGHT_TIMEOUT'] = float(os.getenv('SINGLE_FLIGHT_TIMEOUT', 45))
+    app.config['SINGLE_FLIGHT_LOCK_DIR'] = os.getenv('SINGLE_FLIGHT_LOCK_DIR')
+    
+    # Background generation jobs (backend: 'thread' or 'inline'; result TTL in seconds)
+    app.config['GENERATION_JOB_BACKEND'] = os.getenv('GENERATION_JOB_BACKEND', 'thread')
+    app.config['GENERATION_JOB_WORKERS'] = int(os.getenv('GENERATION_JOB_WORKERS', 4))
+    app.config['GENERATION_JOB_RESULT_TTL'] = int(os.getenv('GENERATION_JOB_RESULT_TTL', 600))
+    
+    # LLM provider circuit breaker (window, slow-call and open durations in seconds)
+    app.config['CIRCUIT_BREAKER_WINDOW'] = float(os.getenv('CIRCUIT_BREAKER_WINDOW', 60))
+    app.config['CIRCUIT_BREAKER_MIN_REQUESTS'] = int(os.getenv('CIRCUIT_BREAKER_MIN_REQUESTS', 5))
+    app.config['CIRCUIT_BREAKER_ERROR_RATE'] = float(os.getenv('CIRCUIT_BREAKER_ERROR_RATE', 0.5))
+    app.config['CIRCUIT_BREAKER_SLOW_CALL_SECONDS'] = float(os.getenv('CIRCUIT_BREAKER_SLOW_CALL_SECONDS', 20))
+    app.config['CIRCUIT_BREAKER_OPEN_SECONDS'] = float(os.getenv('CIRCUIT_BREAKER_OPEN_SECONDS', 30))
+    
+    # End-to-end time budget (seconds) for a meal plan request, per entry point
+    app.config['MEAL_PLAN_DEADLINES'] = {
+        'default': float(os.getenv('MEAL_PLAN_DEADLINE', 10)),
+        'api': float(os.getenv('MEAL_PLAN_DEADLINE_API', 10)),
+        'page': float(os.getenv('MEAL_PLAN_DEADLINE_PAGE', 15)),
+        'stream': float(os.getenv('MEAL_PLAN_DEADLINE_STREAM', 20)),
+        'job': float(os.getenv('MEAL_PLAN_DEADLINE_JOB', 60)),
+        'week': float(os.getenv('MEAL_PLAN_DEADLINE_WEEK', 20))
+    }
+    app.config['MEAL_PLAN_MIN_ATTEMPT_SECONDS'] = float(os.getenv('MEAL_PLAN_MIN_ATTEMPT_SECONDS', 2))
+    
+    # 'batch' generates all 3 meals in one completion, 'parallel' one completion per meal
+    app.config['MEAL_GENERATION_MODE'] = os.getenv('MEAL_GENERATION_MODE', 'batch').lower()
+    app.config['MEAL_SLOT_MAX_ATTEMPTS'] = int(os.getenv('MEAL_SLOT_MAX_ATTEMPTS', 2))
+    
+    # Concurrent generations for one weekly plan request (up to 3 per meal type for a full week)
+    app.config['WEEK_PLAN_WORKERS'] = int(os.getenv('WEEK_PLAN_WORKERS', 9))
+    
+    # Hedged provider calls: resend once the call is slower than the latency percentile,
+    # keeping hedges under HEDGE_MAX_RATE of the last HEDGE_WINDOW calls
+    app.config['HEDGE_ENABLED'] = os.getenv('HEDGE_ENABLED', 'false').lower() == 'true'
+    app.config['HEDGE_PERCENTILE'] = float(os.getenv('HEDGE_PERCENTILE', 95))
+    app.config['HEDGE_MIN_DELAY'] = float(os.getenv('HEDGE_MIN_DELAY', 1))
+    app.config['HEDGE_MAX_RATE'] = float(os.getenv('HEDGE_MAX_RATE', 0.1))
+    app.config['HEDGE_WINDOW'] = int(os.getenv('HEDGE_WINDOW', 200))
+    app.config['HEDGE_MIN_SAMPLES'] = int(os.getenv('HEDGE_MIN_SAMPLES', 20))
+    
+    # Provider quota shared by all workers (state file path enables cross-process sharing)
+    app.config['PROVIDER_RATE_LIMIT_ENABLED'] = os.getenv('PROVIDER_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['PROVIDER_REQUESTS_PER_MINUTE'] = float(os.getenv('PROVIDER_REQUESTS_PER_MINUTE', 30))
+    app.config['PROVIDER_TOKENS_PER_MINUTE'] = float(os.getenv('PROVIDER_TOKENS_PER_MINUTE', 6000))
+    app.config['PROVIDER_RATE_LIMIT_STATE'] = os.getenv('PROVIDER_RATE_LIMIT_STATE')
+    app.config['PROVIDER_QUEUE_SIZE'] = int(os.getenv('PROVIDER_QUEUE_SIZE', 50))
+    app.config['PROVIDER_QUEUE_MAX_WAIT'] = float(os.getenv('PROVIDER_QUEUE_MAX_WAIT', 30))
+    # Share of the quota batch work (cache prewarming) leaves for interactive calls, also across processes
+    app.config['PROVIDER_BATCH_RESERVE'] = float(os.getenv('PROVIDER_BATCH_RESERVE', 0.5))
+    
     # Initialize extensions with app
     db.init_app(app)
     bcrypt.init_app(app)
@@ -33,6 +134,50 @@ def create_app():
     csrf.init_app(app)
     Migrate(app, db)
     
+    # Build the shared keep-alive client used for all LLM provider calls
+    from app.utils.http_client import init_http_client
+    init_http_client(app)
+    
+    # Build the shared cache that sits in front of meal plan generation
+    from app.utils.meal_cache import init_meal_cache
+    init_meal_cache(app)
+    
+    # Load and index the ingredient price table once at startup
+    from app.utils.ingredient_prices import init_price_table
+    init_price_table(app)
+    
+    # Ingredient x nutrient matrix for computing meal nutrition
+    from app.utils.nutrition import init_nutrient_matrix
+    init_nutrient_matrix(app)
+    
+    # Load and index the fallback meal catalog once at startup
+    from app.utils.meal_catalog import init_meal_catalog
+    init_meal_catalog(app)
+    
+    # Build the local meal composer from its templates, the price table and the nutrient matrix
+    from app.utils.meal_composer import init_meal_composer
+    init_meal_composer(app)
+    
+    # Build the coordinator that coalesces identical in-flight generations
+    from app.utils.single_flight import init_single_flight
+    init_single_flight(app)
+    
+    # Build the background queue used for asynchronous generations
+    from app.utils.jobs import init_job_queue
+    init_job_queue(app)
+    
+    # Configure the per provider/model circuit breakers
+    from app.utils.circuit_breaker import init_circuit_breakers
+    init_circuit_breakers(app)
+    
+    # Hedged requests for slow provider calls
+    from app.utils.hedging import init_hedging
+    init_hedging(app)
+    
+    # Token-bucket limiter and priority queue for the provider quota
+    from app.utils.rate_limiter import init_rate_limiter
+    init_rate_limiter(app)
+    
     # Register blueprints
     from app.controllers.auth import auth_bp
     from app.controllers.main import main_bp
@@ -44,6 +189,10 @@ def create_app():
     app.register_blueprint(admin_bp)
     app.register_blueprint(meal_api_bp)
     
+    # Register CLI commands (flask prewarm-cache)
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Create database tables if they don't exist
     with app.app_context():
         db.create_all()
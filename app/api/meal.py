@@ -1,69 +1,212 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, url_for
 from flask_login import login_required, current_user
 from app import db
 from app.models.meal import Meal, MealHistory
-from app.utils.groq_api import generate_meal_plans
+from app.utils.groq_api import generate_meal_plans, stream_meal_plans, NO_MATCHING_MEALS_MESSAGE
+from app.utils.jobs import get_job_queue
+from app.utils.deadline import deadline_for
+from app.utils.rate_limiter import INTERACTIVE
+from app.utils.week_planner import generate_week_plan, MEAL_BUDGET_SHARES
+from app.utils.pagination import keyset_page, InvalidCursor
+from app.utils.history_export import EXPORT_FORMATS, export_response
 import json
 from datetime import datetime
 
 meal_api_bp = Blueprint('meal_api', __name__, url_prefix='/api')
 
-@meal_api_bp.route('/generate-meal-plans', methods=['POST'])
-@login_required
-def api_generate_meal_plans():
-    # Get JSON data from request
-    data = request.get_json()
+def parse_generation_request(data):
+    """
+    Validate a meal plan generation request body
     
+    Returns:
+        tuple: ((meal_type, budget, preferences), None) if valid, otherwise (None, error_response)
+    """
     if not data:
-        return jsonify({
+        return None, (jsonify({
             'status': 'error', 
             'message': 'No data provided'
-        }), 400
+        }), 400)
     
     # Validate required fields
     required_fields = ['meal_type', 'budget']
     missing_fields = [field for field in required_fields if field not in data]
     
     if missing_fields:
-        return jsonify({
+        return None, (jsonify({
             'status': 'error',
             'message': f'Missing required fields: {", ".join(missing_fields)}'
-        }), 400
+        }), 400)
     
     # Get parameters
     meal_type = data.get('meal_type')
-    budget = float(data.get('budget'))
+    try:
+        budget = float(data.get('budget'))
+    except (ValueError, TypeError):
+        return None, (jsonify({
+            'status': 'error',
+            'message': 'Budget must be a valid number'
+        }), 400)
     preferences = data.get('preferences')
     
     # Validate meal type
     valid_meal_types = ['Breakfast', 'Lunch', 'Supper']
     if meal_type not in valid_meal_types:
-        return jsonify({
+        return None, (jsonify({
             'status': 'error',
             'message': f'Invalid meal type. Must be one of: {", ".join(valid_meal_types)}'
-        }), 400
+        }), 400)
     
     # Validate budget
     if budget < 10 or budget > 1000:
-        return jsonify({
+        return None, (jsonify({
             'status': 'error',
             'message': 'Budget must be between 10 and 1000 KES'
-        }), 400
+        }), 400)
+    
+    return (meal_type, budget, preferences), None
+
+@meal_api_bp.route('/generate-meal-plans', methods=['POST'])
+@login_required
+def api_generate_meal_plans():
+    # Get JSON data from request
+    params, error_response = parse_generation_request(request.get_json())
+    if error_response:
+        return error_response
+    
+    meal_type, budget, preferences = params
+    
+    # With ?async=1, queue the generation and let the client poll for the result.
+    # A user is still waiting on it, so it keeps interactive priority ahead of prewarming
+    if request.args.get('async') in ('1', 'true'):
+        job = get_job_queue().submit(generate_meal_plans, meal_type, budget, preferences,
+                                     deadline=deadline_for('job'), priority=INTERACTIVE, owner_id=current_user.id)
+        return jsonify({
+            'status': 'accepted',
+            'job_id': job.id,
+            'job_url': url_for('meal_api.get_job', job_id=job.id)
+        }), 202
     
     # Generate meal plans
-    meal_plans = generate_meal_plans(meal_type, budget, preferences)
+    meal_plans = generate_meal_plans(meal_type, budget, preferences, deadline=deadline_for('api'))
     
     if meal_plans:
         return jsonify({
             'status': 'success',
             'data': meal_plans
         })
+    elif preferences:
+        # Every fallback honours the preferences, so nothing fits them
+        return jsonify({
+            'status': 'error',
+            'message': NO_MATCHING_MEALS_MESSAGE
+        }), 422
     else:
         return jsonify({
             'status': 'error',
             'message': 'Failed to generate meal plans. Please try again.'
         }), 500
 
+@meal_api_bp.route('/generate-week-plan', methods=['POST'])
+@login_required
+def api_generate_week_plan():
+    """Generate Breakfast, Lunch and Supper for every day of the week in one request"""
+    data = request.get_json()
+    
+    if not data or 'weekly_budget' not in data:
+        return jsonify({
+            'status': 'error',
+            'message': 'Missing required fields: weekly_budget'
+        }), 400
+    
+    try:
+        weekly_budget = float(data.get('weekly_budget'))
+        days = int(data.get('days', 7))
+    except (ValueError, TypeError):
+        return jsonify({
+            'status': 'error',
+            'message': 'Weekly budget and days must be valid numbers'
+        }), 400
+    
+    if days < 1 or days > 7:
+        return jsonify({
+            'status': 'error',
+            'message': 'Days must be between 1 and 7'
+        }), 400
+    
+    # Every meal's share of the budget must be within the single meal limits (10-1000 KES)
+    min_weekly = 10 * days / min(MEAL_BUDGET_SHARES.values())
+    max_weekly = 1000 * days / max(MEAL_BUDGET_SHARES.values())
+    if weekly_budget < min_weekly or weekly_budget > max_weekly:
+        return jsonify({
+            'status': 'error',
+            'message': f'Budget for {days} days must be between {min_weekly:.0f} and {max_weekly:.0f} KES'
+        }), 400
+    
+    week_plan = generate_week_plan(weekly_budget, data.get('preferences'), days=days, deadline=deadline_for('week'))
+    
+    if len(week_plan['unavailable']) == len(MEAL_BUDGET_SHARES):
+        return jsonify({
+            'status': 'error',
+            'message': NO_MATCHING_MEALS_MESSAGE
+        }), 422
+    
+    response = {
+        'status': 'success',
+        'data': week_plan
+    }
+    if week_plan['unavailable']:
+        # A partial plan: the other meal types are still worth showing
+        response['message'] = f"No {', '.join(week_plan['unavailable'])} meals match your preferences within this budget."
+    return jsonify(response)
+
+@meal_api_bp.route('/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """Return the state of a background generation job, and its meal plans once finished"""
+    job = get_job_queue().get(job_id)
+    
+    if not job or job.owner_id != current_user.id:
+        return jsonify({
+            'status': 'error',
+            'message': 'Job not found or you do not have access to it.'
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'data': job.to_dict()
+    })
+
+@meal_api_bp.route('/generate-meal-plans/stream', methods=['POST'])
+@login_required
+def api_stream_meal_plans():
+    """Stream meal plans as server-sent events, one 'meal' event per completed meal"""
+    params, error_response = parse_generation_request(request.get_json())
+    if error_response:
+        return error_response
+    
+    meal_type, budget, preferences = params
+    deadline = deadline_for('stream')
+    
+    def events():
+        count = 0
+        try:
+            for meal in stream_meal_plans(meal_type, budget, preferences, deadline=deadline):
+                count += 1
+                yield f"event: meal\ndata: {json.dumps(meal)}\n\n"
+            if not count:
+                yield f"event: error\ndata: {json.dumps({'message': NO_MATCHING_MEALS_MESSAGE})}\n\n"
+                return
+            yield f"event: done\ndata: {json.dumps({'count': count})}\n\n"
+        except Exception as e:
+            print(f"Error streaming meal plans: {str(e)}")
+            message = 'Failed to generate meal plans. Please try again.'
+            yield f"event: error\ndata: {json.dumps({'message': message})}\n\n"
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Stop nginx from buffering the stream
+    })
+
 @meal_api_bp.route('/save-meal', methods=['POST'])
 @login_required
 def api_save_meal():
@@ -88,9 +231,9 @@ def api_save_meal():
         meal_history = MealHistory(
             user_id=current_user.id,
             meal_name=data.get('name'),
-            meal_description=data.get('description'),
-            meal_ingredients=json.dumps(data.get('ingredients', [])),
-            meal_nutritional_info=json.dumps(data.get('nutritional_info', {})),
+            description=data.get('description'),
+            ingredients=json.dumps(data.get('ingredients', [])),
+            nutritional_info=json.dumps(data.get('nutritional_info', {})),
             meal_type=data.get('meal_type'),
             budget=data.get('budget'),
             preferences=data.get('preferences'),
@@ -116,22 +259,43 @@ def api_save_meal():
 @meal_api_bp.route('/meal-history', methods=['GET'])
 @login_required
 def api_meal_history():
-    # Get all meal history for the user
-    history = MealHistory.query.filter_by(user_id=current_user.id).order_by(MealHistory.date_selected.desc()).all()
+    # One page of the user's history, newest first; pass next_cursor back as ?cursor= for the next
+    try:
+        history, next_cursor = keyset_page(MealHistory.query.filter_by(user_id=current_user.id),
+                                           MealHistory.date_selected, MealHistory.id,
+                                           cursor=request.args.get('cursor'),
+                                           limit=request.args.get('limit', type=int))
+    except InvalidCursor:
+        return jsonify({'status': 'error', 'message': 'Invalid cursor'}), 400
     
-    # Convert to list of dictionaries
-    history_data = [meal.to_dict() for meal in history]
+    # Summaries only; the payload is fetched per meal from /api/meal-details/<id>
+    history_data = [meal.to_summary() for meal in history]
     
     return jsonify({
         'status': 'success',
-        'data': history_data
+        'data': history_data,
+        'next_cursor': next_cursor
     })
 
+@meal_api_bp.route('/meal-history/export', methods=['GET'])
+@login_required
+def api_export_meal_history():
+    """Download the user's whole meal history as NDJSON (default) or CSV, streamed row by row"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            'status': 'error',
+            'message': f'Unsupported format, use one of: {", ".join(EXPORT_FORMATS)}'
+        }), 400
+    
+    return export_response(MealHistory.query.filter_by(user_id=current_user.id), export_format, 'meal-history')
+
 @meal_api_bp.route('/meal-details/<int:meal_id>', methods=['GET'])
 @login_required
 def get_meal_details(meal_id):
     # Get the meal history entry
-    meal = MealHistory.query.filter_by(id=meal_id, user_id=current_user.id).first()
+    meal = MealHistory.query.filter_by(id=meal_id, user_id=current_user.id) \
+        .options(db.undefer_group('payload')).first()
     
     if not meal:
         return jsonify({
@@ -149,7 +313,7 @@ def get_meal_details(meal_id):
             'name': meal.meal_name,  # For compatibility with display functions
             'budget': meal.budget,
             'preferences': meal.preferences,
-            'date_selected': meal.date_selected.strftime('%Y-%m-%d %H:%M:%S'),
+            'date_selected': meal.date_selected.strftime('%Y-%m-%d %H:%M:%S') if meal.date_selected else None,
             'total_cost': meal.total_cost if meal.total_cost else 0
         }
         
@@ -159,21 +323,11 @@ def get_meal_details(meal_id):
         else:
             meal_data['description'] = "No description available."
             
-        # Parse and add ingredients if available
-        if meal.ingredients:
-            meal_data['ingredients'] = json.loads(meal.ingredients)
-        else:
-            meal_data['ingredients'] = []
-            
-        # Parse and add instructions if available
-        if meal.instructions:
-            meal_data['instructions'] = json.loads(meal.instructions)
-        else:
-            meal_data['instructions'] = []
-            
-        # Parse and add nutritional info if available
-        if meal.nutritional_info:
-            meal_data['nutritional_info'] = json.loads(meal.nutritional_info)
+        # Add the decoded ingredients, instructions and nutritional info
+        meal_data['ingredients'] = meal.ingredients_data
+        meal_data['instructions'] = meal.instructions_data
+        if meal.nutritional_data:
+            meal_data['nutritional_info'] = meal.nutritional_data
         else:
             meal_data['nutritional_info'] = {
                 'calories': '0 kcal',
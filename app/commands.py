@@ -0,0 +1,50 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('prewarm-cache')
+@click.option('--top', type=int, default=None, help='Number of popular combinations to prewarm')
+@click.option('--days', type=int, default=None, help='Days of meal history to look at')
+@click.option('--meal-type', type=click.Choice(['Breakfast', 'Lunch', 'Supper']), default=None,
+              help='Only prewarm this meal type (e.g. Breakfast before the morning peak)')
+@click.option('--ttl', type=float, default=None, help='Seconds the prewarmed plans stay cached')
+@click.option('--dry-run', is_flag=True, help='List the combinations without generating anything')
+@with_appcontext
+def prewarm_cache_command(top, days, meal_type, ttl, dry_run):
+    """
+    Generate plans for popular meal type/budget/preference combinations ahead of peak hours
+
+    Meant to be scheduled off-peak, e.g. from cron:
+
+        0 5 * * * flask prewarm-cache --meal-type Breakfast
+        0 16 * * * flask prewarm-cache --meal-type Supper
+    """
+    from app.utils.prewarm import prewarm_meal_cache
+
+    summary = prewarm_meal_cache(top=top, days=days, meal_type=meal_type, ttl=ttl, dry_run=dry_run, echo=click.echo)
+    click.echo(f"Found {summary['combinations']} combinations: "
+               f"{summary['warmed']} prewarmed, {summary['failed']} failed")
+
+
+@click.command('backfill-json')
+@click.option('--chunk-size', type=int, default=1000, help='Rows per transaction')
+@click.option('--convert', is_flag=True, help='Also convert the columns to the native JSON type afterwards')
+@with_appcontext
+def backfill_json_command(chunk_size, convert):
+    """
+    Rewrite meal payloads that aren't valid JSON so the columns can use the JSON type
+
+    Safe to run while the app is serving; --convert alters the tables and
+    is best left to a maintenance window.
+    """
+    from app.utils.json_backfill import backfill_json_columns, convert_json_columns
+
+    summary = backfill_json_columns(chunk_size=chunk_size, echo=click.echo)
+    click.echo(", ".join(f"{table}: {count} rows rewritten" for table, count in summary.items()))
+    if convert:
+        convert_json_columns(echo=click.echo)
+
+
+def register_commands(app):
+    app.cli.add_command(prewarm_cache_command)
+    app.cli.add_command(backfill_json_command)
@@ -4,8 +4,13 @@ from app import db
 from app.models.user import User
 from app.models.meal import Meal, MealHistory
 from app.utils.forms import MealForm, RegistrationForm, UpdateAccountForm
+from app.utils.circuit_breaker import breaker_snapshots
+from app.utils.hedging import get_hedge_policy
+from app.utils.rate_limiter import get_rate_limiter
+from app.utils.preferences import diet_tags
+from app.utils.history_export import EXPORT_FORMATS, export_response
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from sqlalchemy import func, desc
 from flask_bcrypt import Bcrypt
 
@@ -33,13 +38,15 @@ def dashboard():
     total_meal_plans = MealHistory.query.count()
     
     # Get today's date at midnight
-    today = datetime.now().date()
+    today = datetime.combine(datetime.now().date(), time.min)
+    tomorrow = today + timedelta(days=1)
     
-    # Count new users today
-    new_users_today = User.query.filter(func.date(User.date_joined) == today).count()
+    # Count new users today (a range on the raw column so an index can be used)
+    new_users_today = User.query.filter(User.date_joined >= today, User.date_joined < tomorrow).count()
     
     # Count meal plans created today
-    meal_plans_today = MealHistory.query.filter(func.date(MealHistory.date_selected) == today).count()
+    meal_plans_today = MealHistory.query.filter(MealHistory.date_selected >= today,
+                                                MealHistory.date_selected < tomorrow).count()
     
     # Get recent user registrations
     recent_users = User.query.order_by(User.date_joined.desc()).limit(5).all()
@@ -68,6 +75,11 @@ def dashboard():
         'Supper': 'warning'
     }
     
+    # LLM provider circuit breaker states
+    provider_breakers = breaker_snapshots()
+    hedge_stats = get_hedge_policy().stats()
+    rate_limit_stats = get_rate_limiter().stats()
+    
     return render_template('admin/dashboard.html',
                           title='Admin Dashboard',
                           total_users=total_users,
@@ -78,7 +90,10 @@ def dashboard():
                           recent_meals=recent_meals,
                           avg_budget=round(avg_budget, 2),
                           meal_type_counts=meal_type_dict,
-                          meal_type_colors=meal_type_colors)
+                          meal_type_colors=meal_type_colors,
+                          provider_breakers=provider_breakers,
+                          hedge_stats=hedge_stats,
+                          rate_limit_stats=rate_limit_stats)
 
 @admin_bp.route('/users')
 @admin_required
@@ -281,24 +296,32 @@ def toggle_admin(user_id):
         'is_admin': user.is_admin
     })
 
-@admin_bp.route('/meals')
-@admin_required
-def meals():
-    page = request.args.get('page', 1, type=int)
-    per_page = 10  # Number of meals per page
-    
-    # Apply filters if provided
-    username_filter = request.args.get('username', '')
-    meal_name_filter = request.args.get('meal_name', '')
-    meal_type_filter = request.args.get('meal_type', '')
-    date_range = request.args.get('date_range', '')
-    
-    # Start with base query
-    query = MealHistory.query
+def filter_meal_history(query, args, user_joined=False):
+    """
+    Apply the admin meal list filters (username, meal_name, meal_type, date_range, user_id)
+    
+    Args:
+        query: Query over MealHistory
+        args: Request arguments
+        user_joined (bool): Whether the query already joins User
+    
+    Returns:
+        Query: The filtered query
+    """
+    username_filter = args.get('username', '')
+    meal_name_filter = args.get('meal_name', '')
+    meal_type_filter = args.get('meal_type', '')
+    date_range = args.get('date_range', '')
+    user_id_filter = args.get('user_id', type=int)
     
     # Apply username filter (join with User table)
     if username_filter:
-        query = query.join(User, MealHistory.user_id == User.id).filter(User.username.contains(username_filter))
+        if not user_joined:
+            query = query.join(User, MealHistory.user_id == User.id)
+        query = query.filter(User.username.contains(username_filter))
+    
+    if user_id_filter:
+        query = query.filter(MealHistory.user_id == user_id_filter)
     
     # Apply meal name filter
     if meal_name_filter:
@@ -311,7 +334,9 @@ def meals():
     if date_range:
         today = datetime.now().date()
         if date_range == 'today':
-            query = query.filter(func.date(MealHistory.date_selected) == today)
+            start_of_today = datetime.combine(today, time.min)
+            query = query.filter(MealHistory.date_selected >= start_of_today,
+                                 MealHistory.date_selected < start_of_today + timedelta(days=1))
         elif date_range == 'week':
             # Calculate start of the week (last Sunday)
             start_of_week = today - timedelta(days=today.weekday() + 1)
@@ -321,6 +346,17 @@ def meals():
             start_of_month = today.replace(day=1)
             query = query.filter(MealHistory.date_selected >= start_of_month)
     
+    return query
+
+@admin_bp.route('/meals')
+@admin_required
+def meals():
+    page = request.args.get('page', 1, type=int)
+    per_page = 10  # Number of meals per page
+    
+    # Start with base query, applying filters if provided
+    query = filter_meal_history(MealHistory.query, request.args)
+    
     # Get meal type counts for statistics
     meal_type_counts_query = db.session.query(
         MealHistory.meal_type, 
@@ -376,6 +412,21 @@ def meals():
                           meal_type_colors=meal_type_colors,
                           budget_ranges=budget_ranges)
 
+@admin_bp.route('/meals/export')
+@admin_required
+def export_meals():
+    """Download meal history for all users as NDJSON (default) or CSV, with the meals list filters"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            'status': 'error',
+            'message': f'Unsupported format, use one of: {", ".join(EXPORT_FORMATS)}'
+        }), 400
+    
+    query = db.session.query(MealHistory, User.username).join(User, MealHistory.user_id == User.id)
+    query = filter_meal_history(query, request.args, user_joined=True)
+    return export_response(query, export_format, 'meal-history-all', with_username=True)
+
 @admin_bp.route('/meals/add', methods=['GET', 'POST'])
 @admin_required
 def add_meal():
@@ -395,6 +446,7 @@ def add_meal():
                 estimated_cost=form.estimated_cost.data,
                 meal_type=form.meal_type.data
             )
+            meal.diet_tags = ','.join(diet_tags({'name': meal.name, 'ingredients': ingredients}))
             
             db.session.add(meal)
             db.session.commit()
@@ -425,6 +477,7 @@ def edit_meal(meal_id):
             meal.nutritional_info = form.nutritional_info.data
             meal.estimated_cost = form.estimated_cost.data
             meal.meal_type = form.meal_type.data
+            meal.diet_tags = ','.join(diet_tags({'name': meal.name, 'ingredients': ingredients}))
             
             db.session.commit()
             
@@ -493,35 +546,11 @@ def popular_meals():
 @admin_bp.route('/meals/<int:meal_id>')
 @admin_required
 def meal_details(meal_id):
-    meal = MealHistory.query.get_or_404(meal_id)
-    
-    # Calculate nutritional info if available
-    nutritional_data = {}
-    if meal.nutritional_info:
-        try:
-            nutritional_data = json.loads(meal.nutritional_info)
-        except json.JSONDecodeError:
-            nutritional_data = {}
-    
-    # Parse ingredients if available
-    ingredients = []
-    if meal.ingredients:
-        try:
-            ingredients = json.loads(meal.ingredients)
-        except json.JSONDecodeError:
-            ingredients = []
-    
-    # Parse instructions if available
-    instructions = []
-    if meal.instructions:
-        try:
-            instructions = json.loads(meal.instructions)
-        except json.JSONDecodeError:
-            instructions = []
+    meal = MealHistory.query.options(db.undefer_group('payload')).get_or_404(meal_id)
     
     return render_template('admin/meal_details.html',
                           title=f'Meal Details - {meal.meal_name}',
                           meal=meal,
-                          nutritional_data=nutritional_data,
-                          ingredients=ingredients,
-                          instructions=instructions) 
\ No newline at end of file
+                          nutritional_data=meal.nutritional_data,
+                          ingredients=meal.ingredients_data,
+                          instructions=meal.instructions_data) 
\ No newline at end of file
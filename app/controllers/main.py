@@ -3,7 +3,10 @@ from flask_login import login_required, current_user
 from app import db
 from app.models.meal import Meal, MealHistory
 from app.utils.forms import MealPlanForm
-from app.utils.groq_api import generate_meal_plans
+from app.utils.groq_api import generate_meal_plans, NO_MATCHING_MEALS_MESSAGE
+from app.utils.deadline import deadline_for
+from app.utils.pagination import keyset_page
+from sqlalchemy import func
 import json
 from datetime import datetime
 
@@ -54,7 +57,7 @@ def get_meal_plans():
         preferences = form.preferences.data if form.preferences.data else None
         
         # Generate meal plans using Groq API
-        meal_plans = generate_meal_plans(meal_type, budget, preferences)
+        meal_plans = generate_meal_plans(meal_type, budget, preferences, deadline=deadline_for('page'))
         
         if meal_plans:
             return jsonify({
@@ -64,7 +67,7 @@ def get_meal_plans():
         else:
             return jsonify({
                 'status': 'error',
-                'message': 'Failed to generate meal plans. Please try again.'
+                'message': NO_MATCHING_MEALS_MESSAGE if preferences else 'Failed to generate meal plans. Please try again.'
             })
     else:
         return jsonify({
@@ -130,9 +133,21 @@ def save_meal():
 @main_bp.route('/meal-history')
 @login_required
 def meal_history():
-    # Get all meal history for the user
-    history = MealHistory.query.filter_by(user_id=current_user.id).order_by(MealHistory.date_selected.desc()).all()
+    # First page of the user's history; the page loads the rest from /api/meal-history as it scrolls
+    history, next_cursor = keyset_page(MealHistory.query.filter_by(user_id=current_user.id),
+                                       MealHistory.date_selected, MealHistory.id)
+    
+    # Totals for the whole history in one aggregate query
+    total_meals, average_budget, first_date = db.session.query(
+        func.count(MealHistory.id),
+        func.avg(MealHistory.budget),
+        func.min(MealHistory.date_selected)
+    ).filter(MealHistory.user_id == current_user.id).one()
     
     return render_template('main/meal_history.html',
                           title='Meal History',
-                          history=history) 
\ No newline at end of file
+                          history=history,
+                          next_cursor=next_cursor,
+                          total_meals=total_meals,
+                          average_budget=average_budget or 0,
+                          first_date=first_date) 
\ No newline at end of file
@@ -1,20 +1,106 @@
 from app import db
 from datetime import datetime
+from sqlalchemy.ext.compiler import compiles
+import copy
 import json
 
+
+class JSONText(db.Text):
+    """
+    JSON payload column that reads and writes JSON text.
+
+    The column is declared with the database's native JSON type (MySQL
+    JSON, SQLite JSON1) so the server validates it, but rows come back as
+    the raw text; JSONAttribute decodes them only when a field is used.
+    """
+    __visit_name__ = 'json_text'
+
+
+@compiles(JSONText)
+def _compile_json_text(type_, compiler, **kw):
+    return 'TEXT'
+
+
+@compiles(JSONText, 'mysql')
+@compiles(JSONText, 'sqlite')
+def _compile_native_json(type_, compiler, **kw):
+    return 'JSON'
+
+
+def decode_json(raw, default):
+    """
+    Decode a JSON payload column value
+
+    Args:
+        raw (str, list or dict): Stored JSON text, or an already decoded value
+        default (callable): Factory for the value of empty or invalid payloads
+
+    Returns:
+        The decoded value
+    """
+    if raw is None or raw == '':
+        return default()
+    if not isinstance(raw, (str, bytes)):
+        return raw
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return default()
+
+
+class JSONAttribute:
+    """
+    Decoded, read-only view of a JSONText column.
+
+    The payload is decoded on first access and cached on the instance
+    until the column is assigned a new value, so serializing a row only
+    parses the fields it actually reads, and each of them once.
+    """
+
+    def __init__(self, column, default):
+        self.column = column
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.cache_name = f'_{name}_cache'
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        raw = getattr(instance, self.column)
+        cached = instance.__dict__.get(self.cache_name)
+        if cached is not None and cached[0] is raw:
+            return cached[1]
+        value = decode_json(raw, self.default)
+        instance.__dict__[self.cache_name] = (raw, value)
+        return value
+
+
 class Meal(db.Model):
     __tablename__ = 'meals'
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    ingredients = db.Column(db.Text, nullable=False)  # JSON string
-    instructions = db.Column(db.Text, nullable=True)  # JSON string
+    ingredients = db.Column(JSONText, nullable=False)  # JSON string
+    instructions = db.Column(JSONText, nullable=True)  # JSON string
     meal_type = db.Column(db.String(20), nullable=False)
     estimated_cost = db.Column(db.Float, nullable=False)
-    nutritional_info = db.Column(db.Text, nullable=True)  # JSON string
+    nutritional_info = db.Column(JSONText, nullable=True)  # JSON string
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     popularity = db.Column(db.Integer, default=0)  # Track meal popularity
+    diet_tags = db.Column(db.String(50), nullable=True)  # Comma-separated, e.g. "vegan,vegetarian"
+    source = db.Column(db.String(20), default='admin')  # 'admin' or 'generated'
+    
+    # Retrieval looks meals up by type within a cost range
+    __table_args__ = (
+        db.Index('ix_meals_type_cost', 'meal_type', 'estimated_cost'),
+    )
+    
+    # Decoded payloads
+    ingredients_data = JSONAttribute('ingredients', list)
+    instructions_data = JSONAttribute('instructions', list)
+    nutritional_data = JSONAttribute('nutritional_info', dict)
     
     # Remove relationship since we're storing meals directly in MealHistory now
     
@@ -26,12 +112,25 @@ class Meal(db.Model):
             'id': self.id,
             'name': self.name,
             'description': self.description,
-            'ingredients': json.loads(self.ingredients) if self.ingredients else [],
-            'instructions': json.loads(self.instructions) if self.instructions else [],
+            'ingredients': self.ingredients_data,
+            'instructions': self.instructions_data,
             'estimated_cost': self.estimated_cost,
             'meal_type': self.meal_type,
-            'nutritional_info': json.loads(self.nutritional_info) if self.nutritional_info else {},
-            'popularity': self.popularity
+            'nutritional_info': self.nutritional_data,
+            'popularity': self.popularity,
+            'diet_tags': self.diet_tags.split(',') if self.diet_tags else []
+        }
+    
+    def to_meal_plan(self):
+        """Return the meal in the same format as a generated meal plan option"""
+        # Copies, since meal plans are corrected in place by cost and nutrition checks
+        return {
+            'name': self.name,
+            'description': self.description or "",
+            'ingredients': copy.deepcopy(self.ingredients_data),
+            'instructions': copy.deepcopy(self.instructions_data),
+            'total_cost': self.estimated_cost,
+            'nutritional_info': copy.deepcopy(self.nutritional_data)
         }
 
 
@@ -43,15 +142,30 @@ class MealHistory(db.Model):
     meal_id = db.Column(db.Integer, db.ForeignKey('meals.id'), nullable=True)
     meal_type = db.Column(db.String(20), nullable=False)
     meal_name = db.Column(db.String(100), nullable=True)
-    description = db.Column(db.Text, nullable=True)
-    ingredients = db.Column(db.Text, nullable=True)  # JSON string of ingredients
-    instructions = db.Column(db.Text, nullable=True)  # JSON string of instructions
+    # Meal payload, deferred so history lists only load the summary columns;
+    # detail views fetch it with .options(db.undefer_group('payload'))
+    description = db.deferred(db.Column(db.Text, nullable=True), group='payload')
+    ingredients = db.deferred(db.Column(JSONText, nullable=True), group='payload')  # JSON string of ingredients
+    instructions = db.deferred(db.Column(JSONText, nullable=True), group='payload')  # JSON string of instructions
     budget = db.Column(db.Float, nullable=False)
     total_cost = db.Column(db.Float, nullable=True)
     preferences = db.Column(db.Text, nullable=True)
-    nutritional_info = db.Column(db.Text, nullable=True)  # JSON string of nutritional info
+    nutritional_info = db.deferred(db.Column(JSONText, nullable=True), group='payload')  # JSON string of nutritional info
     date_selected = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # History pages filter by user, type, name or date and list newest first
+    __table_args__ = (
+        db.Index('ix_meal_history_user_date', 'user_id', db.text('date_selected DESC')),
+        db.Index('ix_meal_history_type_date', 'meal_type', 'date_selected'),
+        db.Index('ix_meal_history_date', 'date_selected'),
+        db.Index('ix_meal_history_name', 'meal_name'),
+    )
+    
+    # Decoded payloads
+    ingredients_data = JSONAttribute('ingredients', list)
+    instructions_data = JSONAttribute('instructions', list)
+    nutritional_data = JSONAttribute('nutritional_info', dict)
+    
     # Relationships
     user = db.relationship('User', backref='meal_history')
     meal = db.relationship('Meal', backref='history_entries')
@@ -59,6 +173,18 @@ class MealHistory(db.Model):
     def __repr__(self):
         return f"<MealHistory {self.id}: {self.meal_name}>"
     
+    def to_summary(self):
+        """Return the list view fields, without loading the deferred payload"""
+        return {
+            'id': self.id,
+            'meal_name': self.meal_name or "Unknown",
+            'meal_type': self.meal_type,
+            'budget': self.budget,
+            'total_cost': self.total_cost,
+            'preferences': self.preferences,
+            'date_selected': self.date_selected.strftime('%Y-%m-%d %H:%M:%S') if self.date_selected else None
+        }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -66,8 +192,8 @@ class MealHistory(db.Model):
             'meal_type': self.meal_type,
             'budget': self.budget,
             'preferences': self.preferences,
-            'date_selected': self.date_selected.strftime('%Y-%m-%d %H:%M:%S'),
-            'ingredients': json.loads(self.ingredients) if self.ingredients else [],
-            'instructions': json.loads(self.instructions) if self.instructions else [],
-            'nutritional_info': json.loads(self.nutritional_info) if self.nutritional_info else {}
+            'date_selected': self.date_selected.strftime('%Y-%m-%d %H:%M:%S') if self.date_selected else None,
+            'ingredients': self.ingredients_data,
+            'instructions': self.instructions_data,
+            'nutritional_info': self.nutritional_data
         } 
\ No newline at end of file
@@ -64,89 +64,146 @@ function setupMealGenerationForm() {
                 }
             });
             
-            // Send API request
-            fetch('/api/generate-meal-plans', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(jsonData)
+            // Stream meals from the API and render each one as soon as it arrives
+            if (mealsContainer) mealsContainer.innerHTML = '';
+            
+            streamMealPlans(jsonData, {
+                onMeal: meal => {
+                    if (loadingContainer) loadingContainer.classList.add('d-none');
+                    if (mealsContainer) mealsContainer.classList.remove('d-none');
+                    appendMealSuggestion(meal);
+                }
             })
-            .then(response => response.json())
-            .then(data => {
+            .then(() => {
                 if (loadingContainer) loadingContainer.classList.add('d-none');
-                if (mealsContainer) mealsContainer.classList.remove('d-none');
-                
-                if (data.success) {
-                    displayMealSuggestions(data.meal_plans);
-                } else {
-                    showAlert(data.message || 'Failed to generate meal plans', 'danger');
-                }
             })
             .catch(error => {
                 if (loadingContainer) loadingContainer.classList.add('d-none');
-                showAlert('An error occurred while generating meal plans', 'danger');
+                showAlert(error.message || 'An error occurred while generating meal plans', 'danger');
                 console.error('Error:', error);
             });
         });
     }
 }
 
-// Display meal suggestions
-function displayMealSuggestions(meals) {
-    const mealsContainer = document.getElementById('mealSuggestions');
-    const mealCardTemplate = document.getElementById('mealCardTemplate');
-    
-    if (!mealsContainer || !mealCardTemplate) return;
+// Stream meal plans from the server-sent events endpoint.
+// handlers.onMeal is called with each meal as soon as the server emits it,
+// handlers.onDone with the final summary. Returns a promise that resolves
+// when the stream ends and rejects on request or generation errors.
+function streamMealPlans(payload, handlers = {}) {
+    const csrfMeta = document.querySelector('meta[name="csrf-token"]');
     
-    // Clear previous meals
-    mealsContainer.innerHTML = '';
-    
-    // Add meal cards
-    meals.forEach(meal => {
-        const mealCard = mealCardTemplate.content.cloneNode(true);
+    return fetch('/api/generate-meal-plans/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
+            'X-CSRFToken': csrfMeta ? csrfMeta.getAttribute('content') : ''
+        },
+        body: JSON.stringify(payload)
+    })
+    .then(response => {
+        const contentType = response.headers.get('Content-Type') || '';
+        if (!response.ok || !contentType.includes('text/event-stream')) {
+            // Validation errors come back as a regular JSON response
+            return response.json().then(data => {
+                throw new Error(data.message || 'Failed to generate meal plans');
+            });
+        }
         
-        // Set meal data
-        mealCard.querySelector('.meal-title').textContent = meal.name;
-        mealCard.querySelector('.meal-description').textContent = meal.description.substring(0, 100) + '...';
-        mealCard.querySelector('.meal-price').textContent = 'KES ' + meal.price;
-        mealCard.querySelector('.meal-calories').textContent = meal.nutrition.calories + ' kcal';
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
         
-        // Set view details button
-        const viewButton = mealCard.querySelector('.view-meal-details');
-        viewButton.setAttribute('data-meal', JSON.stringify(meal));
+        function dispatch(rawEvent) {
+            let eventName = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (!data) return;
+            
+            const eventData = JSON.parse(data);
+            if (eventName === 'meal' && handlers.onMeal) handlers.onMeal(eventData);
+            else if (eventName === 'done' && handlers.onDone) handlers.onDone(eventData);
+            else if (eventName === 'error') throw new Error(eventData.message);
+        }
         
-        // Set save button
-        const saveButton = mealCard.querySelector('.save-meal');
-        saveButton.setAttribute('data-meal', JSON.stringify({
-            name: meal.name,
-            meal_type: document.getElementById('mealType').value,
-            budget: document.getElementById('budget').value,
-            preferences: Array.from(document.querySelectorAll('input[name="preferences"]:checked')).map(el => el.value),
-            description: meal.description,
-            ingredients: meal.ingredients,
-            price: meal.price,
-            nutrition: meal.nutrition
-        }));
+        function read() {
+            return reader.read().then(({ done, value }) => {
+                if (done) {
+                    if (buffer.trim()) dispatch(buffer);
+                    return;
+                }
+                
+                // Events are separated by a blank line
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    dispatch(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                }
+                return read();
+            });
+        }
         
-        // Add to container
-        mealsContainer.appendChild(mealCard);
+        return read();
     });
+}
+
+// Append a single meal suggestion card
+function appendMealSuggestion(meal) {
+    const mealsContainer = document.getElementById('mealSuggestions');
+    const mealCardTemplate = document.getElementById('mealCardTemplate');
     
-    // Add event listeners for the new buttons
-    document.querySelectorAll('.view-meal-details').forEach(button => {
-        button.addEventListener('click', function() {
-            const meal = JSON.parse(this.getAttribute('data-meal'));
-            showMealDetails(meal);
-        });
+    if (!mealsContainer || !mealCardTemplate) return;
+    
+    const mealCard = mealCardTemplate.content.cloneNode(true);
+    const nutrition = meal.nutritional_info || {};
+    
+    // Set meal data
+    mealCard.querySelector('.meal-title').textContent = meal.name;
+    mealCard.querySelector('.meal-description').textContent = (meal.description || '').substring(0, 100) + '...';
+    mealCard.querySelector('.meal-price').textContent = 'KES ' + meal.total_cost;
+    mealCard.querySelector('.meal-calories').textContent = nutrition.calories || '';
+    
+    // Set view details button
+    const viewButton = mealCard.querySelector('.view-meal-details');
+    viewButton.setAttribute('data-meal', JSON.stringify(meal));
+    viewButton.addEventListener('click', function() {
+        showMealDetails(JSON.parse(this.getAttribute('data-meal')));
     });
     
-    document.querySelectorAll('.save-meal').forEach(button => {
-        button.addEventListener('click', function() {
-            const meal = JSON.parse(this.getAttribute('data-meal'));
-            saveMeal(meal);
-        });
+    // Set save button
+    const saveButton = mealCard.querySelector('.save-meal');
+    saveButton.setAttribute('data-meal', JSON.stringify({
+        name: meal.name,
+        meal_type: document.getElementById('mealType').value,
+        budget: document.getElementById('budget').value,
+        preferences: Array.from(document.querySelectorAll('input[name="preferences"]:checked')).map(el => el.value),
+        description: meal.description,
+        ingredients: meal.ingredients,
+        instructions: meal.instructions,
+        total_cost: meal.total_cost,
+        nutritional_info: meal.nutritional_info
+    }));
+    saveButton.addEventListener('click', function() {
+        saveMeal(JSON.parse(this.getAttribute('data-meal')));
     });
+    
+    // Add to container
+    mealsContainer.appendChild(mealCard);
+}
+
+// Display meal suggestions
+function displayMealSuggestions(meals) {
+    const mealsContainer = document.getElementById('mealSuggestions');
+    if (!mealsContainer) return;
+    
+    // Clear previous meals
+    mealsContainer.innerHTML = '';
+    meals.forEach(appendMealSuggestion);
 }
 
 // Save meal to history
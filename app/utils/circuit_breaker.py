@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import deque
+
+DEFAULT_WINDOW_SECONDS = 60.0
+DEFAULT_MIN_REQUESTS = 5
+DEFAULT_ERROR_RATE_THRESHOLD = 0.5
+DEFAULT_SLOW_CALL_SECONDS = 20.0
+DEFAULT_SLOW_CALL_RATE_THRESHOLD = 0.8
+DEFAULT_OPEN_SECONDS = 30.0
+
+# Breaker settings from app config, applied to every breaker in the registry
+_settings = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for calls to a single provider/model.
+
+    Outcomes are tracked over a sliding time window. When the error rate or
+    the share of slow calls crosses its threshold the breaker opens and
+    callers should go straight to their fallback. After open_seconds one
+    probe call is let through (half-open): success closes the breaker,
+    failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, window_seconds=DEFAULT_WINDOW_SECONDS, min_requests=DEFAULT_MIN_REQUESTS,
+                 error_rate_threshold=DEFAULT_ERROR_RATE_THRESHOLD, slow_call_seconds=DEFAULT_SLOW_CALL_SECONDS,
+                 slow_call_rate_threshold=DEFAULT_SLOW_CALL_RATE_THRESHOLD, open_seconds=DEFAULT_OPEN_SECONDS):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+
+        self.state = CircuitBreaker.CLOSED
+        self.opened_at = None
+        self.last_failure = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_started_at = None
+        self._calls = deque()  # (timestamp, succeeded, latency)
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return True if a call may go to the provider, False if the caller should fall back"""
+        with self._lock:
+            now = time.monotonic()
+
+            if self.state == CircuitBreaker.OPEN:
+                if now - self.opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = CircuitBreaker.HALF_OPEN
+                self._probe_started_at = None
+
+            if self.state == CircuitBreaker.HALF_OPEN:
+                # Allow a single probe; a probe that never reported back is replaced after open_seconds
+                if self._probe_started_at is not None and now - self._probe_started_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self._probe_started_at = now
+
+            return True
+
+    def release(self):
+        """Give back a call allowed by allow_request() that never reached the provider"""
+        with self._lock:
+            if self.state == CircuitBreaker.HALF_OPEN:
+                self._probe_started_at = None
+
+    def record_success(self, latency):
+        with self._lock:
+            if self.state == CircuitBreaker.HALF_OPEN:
+                print(f"Circuit breaker {self.name} closed after successful probe")
+                self._close()
+            self._record(True, latency)
+
+    def record_failure(self, latency, error=None):
+        with self._lock:
+            self.last_failure = str(error) if error else None
+            if self.state == CircuitBreaker.HALF_OPEN:
+                print(f"Circuit breaker {self.name} probe failed, reopening")
+                self._open()
+                return
+            self._record(False, latency)
+
+    def _record(self, succeeded, latency):
+        now = time.monotonic()
+        self._calls.append((now, succeeded, latency))
+        self._trim(now)
+
+        if self.state != CircuitBreaker.CLOSED or len(self._calls) < self.min_requests:
+            return
+
+        error_rate, slow_rate, _ = self._rates()
+        if error_rate >= self.error_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            print(f"Circuit breaker {self.name} opened (error rate {error_rate:.0%}, slow calls {slow_rate:.0%})")
+            self._open()
+
+    def _open(self):
+        self.state = CircuitBreaker.OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._probe_started_at = None
+
+    def _close(self):
+        self.state = CircuitBreaker.CLOSED
+        self.opened_at = None
+        self._probe_started_at = None
+        self._calls.clear()
+
+    def _trim(self, now):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _rates(self):
+        total = len(self._calls)
+        if not total:
+            return 0.0, 0.0, 0.0
+        failures = sum(1 for _, succeeded, _ in self._calls if not succeeded)
+        slow = sum(1 for _, _, latency in self._calls if latency >= self.slow_call_seconds)
+        avg_latency = sum(latency for _, _, latency in self._calls) / total
+        return failures / total, slow / total, avg_latency
+
+    def snapshot(self):
+        """Current state and window statistics, for the admin dashboard"""
+        with self._lock:
+            self._trim(time.monotonic())
+            error_rate, slow_rate, avg_latency = self._rates()
+            retry_in = None
+            if self.state == CircuitBreaker.OPEN:
+                retry_in = max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+            return {
+                'name': self.name,
+                'state': self.state,
+                'window_calls': len(self._calls),
+                'error_rate': round(error_rate, 3),
+                'slow_call_rate': round(slow_rate, 3),
+                'avg_latency': round(avg_latency, 3),
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+                'retry_in': round(retry_in, 1) if retry_in is not None else None,
+                'last_failure': self.last_failure
+            }
+
+
+def init_circuit_breakers(app):
+    """Load breaker settings from app config and reset the registry"""
+    _settings.clear()
+    _settings.update({
+        'window_seconds': app.config['CIRCUIT_BREAKER_WINDOW'],
+        'min_requests': app.config['CIRCUIT_BREAKER_MIN_REQUESTS'],
+        'error_rate_threshold': app.config['CIRCUIT_BREAKER_ERROR_RATE'],
+        'slow_call_seconds': app.config['CIRCUIT_BREAKER_SLOW_CALL_SECONDS'],
+        'open_seconds': app.config['CIRCUIT_BREAKER_OPEN_SECONDS']
+    })
+    with _registry_lock:
+        _breakers.clear()
+
+
+def get_breaker(provider, model):
+    """Return the breaker for a provider/model pair, creating it on first use"""
+    name = f"{provider}:{model}"
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **_settings)
+            _breakers[name] = breaker
+        return breaker
+
+
+def breaker_snapshots():
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return [breaker.snapshot() for breaker in breakers]
@@ -0,0 +1,60 @@
+import time
+from flask import current_app, has_app_context
+
+DEFAULT_DEADLINE_SECONDS = 10.0
+DEFAULT_MIN_ATTEMPT_SECONDS = 2.0
+
+
+class Deadline:
+    """
+    Overall time budget for a single meal plan request.
+
+    Created once when the request arrives and passed down to every stage
+    (HTTP timeouts, retries, backoff sleeps, parsing and validation) so the
+    request as a whole finishes within its budget.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def cap(self, timeout):
+        """Shrink a stage timeout so it cannot outlive the deadline"""
+        return min(timeout, self.remaining())
+
+    def allows(self, seconds):
+        """True if at least `seconds` of the budget are left"""
+        return self.remaining() >= seconds
+
+    def __repr__(self):
+        return f"<Deadline {self.remaining():.2f}s of {self.seconds:.2f}s left>"
+
+
+def deadline_for(endpoint):
+    """
+    Start a deadline using the budget configured for an endpoint
+
+    Args:
+        endpoint (str): Key in MEAL_PLAN_DEADLINES ('api', 'page', 'stream', 'job', ...)
+
+    Returns:
+        Deadline: A deadline starting now
+    """
+    seconds = DEFAULT_DEADLINE_SECONDS
+    if has_app_context():
+        deadlines = current_app.config['MEAL_PLAN_DEADLINES']
+        seconds = deadlines.get(endpoint, deadlines['default'])
+    return Deadline(seconds)
+
+
+def min_attempt_seconds():
+    """Smallest remaining budget worth starting another provider attempt with"""
+    if has_app_context():
+        return current_app.config['MEAL_PLAN_MIN_ATTEMPT_SECONDS']
+    return DEFAULT_MIN_ATTEMPT_SECONDS
@@ -5,12 +5,41 @@ import time
 import re
 from dotenv import load_dotenv
 import random
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app, has_app_context
+from app.utils.http_client import get_http_client
+from app.utils.meal_cache import get_meal_cache
+from app.utils.single_flight import get_single_flight, SingleFlightTimeout
+from app.utils.meal_parser import IncrementalMealParser, parse_meals
+from app.utils.circuit_breaker import get_breaker
+from app.utils.deadline import deadline_for, min_attempt_seconds
+from app.utils.hedging import get_hedge_policy
+from app.utils.rate_limiter import get_rate_limiter, RateLimitExceeded, INTERACTIVE
+from app.utils.meal_catalog import get_meal_catalog
+from app.utils.preferences import parse_preferences
+from app.utils.meal_store import find_stored_meals, store_generated_meals
+from app.utils.ingredient_prices import verify_meal_costs
+from app.utils.meal_composer import compose_meal_plans
+from app.utils.nutrition import verify_meal_nutrition
 
 load_dotenv()
 
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 
+# Completion size assumed when reserving rate limit quota; corrected from the reported usage
+EXPECTED_COMPLETION_TOKENS = 1500
+
+# Shown when the preferences rule out every meal, since the catalog fallback never relaxes them
+NO_MATCHING_MEALS_MESSAGE = "No meals match your preferences within this budget. Try relaxing some preferences or changing the budget."
+
+# Style hint per slot in parallel mode, so concurrent completions don't all return the same dish
+MEAL_SLOT_VARIATIONS = (
+    "a traditional Kenyan dish",
+    "a quick and simple dish with few ingredients",
+    "a hearty, filling dish"
+)
+
 # Add fallback model if Groq is unavailable
 def get_model_api_details():
     """Get API details based on available API keys"""
@@ -30,18 +59,411 @@ def get_model_api_details():
         print("No API keys found, will use mock data")
         return None
 
-def generate_meal_plans(meal_type, budget, preferences=None):
+def generate_meal_plans(meal_type, budget, preferences=None, deadline=None, priority=INTERACTIVE):
     """
     Generate meal plans based on user inputs using Groq API (LLaMA 3)
     
+    Identical requests (same meal type, budget bucket and preferences) are
+    served from the meal plan cache instead of calling the API again, and
+    concurrent identical requests share a single in-flight generation. On a
+    cache miss, stored meals from the meals table are served if enough of
+    them fit, then simple requests are composed locally from meal templates;
+    otherwise the API is called and its validated meals are added to the
+    table.
+    
     Args:
         meal_type (str): Breakfast, Lunch, or Supper
         budget (float): Budget in KES
         preferences (str, optional): User's meal preferences
+        deadline (Deadline, optional): Time budget for the whole request; mock
+            meals are returned rather than overrunning it
+        priority (int, optional): Provider queue priority, INTERACTIVE or BATCH
         
     Returns:
         list: List of 3 meal plan options in dict format
     """
+    deadline = deadline or deadline_for('default')
+    cache = get_meal_cache()
+    cache_key = cache.make_key(meal_type, budget, preferences)
+    
+    cached_plans = cache.get(cache_key)
+    if cached_plans is not None:
+        print(f"Serving meal plans from cache for {cache_key}")
+        return cached_plans
+    
+    def generate():
+        stored_plans = find_stored_meals(meal_type, budget, preferences)
+        if stored_plans:
+            print(f"Serving meal plans from the meals table for {cache_key}")
+            cache.set(cache_key, stored_plans)
+            return stored_plans, True
+        
+        composed_plans = compose_meal_plans(meal_type, budget, preferences)
+        if composed_plans:
+            print(f"Serving locally composed meal plans for {cache_key}")
+            cache.set(cache_key, composed_plans)
+            return composed_plans, True
+        
+        meal_plans, from_api = generate_uncached_meal_plans(meal_type, budget, preferences, deadline=deadline,
+                                                            priority=priority)
+        
+        # Only cache real API results; mock fallbacks should not outlive an outage
+        if from_api:
+            cache.set(cache_key, meal_plans)
+            store_generated_meals(meal_type, [meal for meal in meal_plans
+                                              if _is_acceptable_meal(meal, budget, preferences)])
+        
+        return meal_plans, from_api
+    
+    try:
+        meal_plans, from_api = get_single_flight().do(cache_key, generate, timeout=deadline.remaining())
+    except SingleFlightTimeout as e:
+        print(f"Gave up waiting for in-flight generation: {str(e)}")
+        return generate_mock_meal_plans(meal_type, budget, preferences)
+    
+    return meal_plans
+
+def generate_uncached_meal_plans(meal_type, budget, preferences=None, deadline=None, priority=INTERACTIVE):
+    """
+    Generate fresh meal plans with the configured MEAL_GENERATION_MODE, bypassing the cache
+    
+    Returns:
+        tuple: (meal_plans, from_api) where from_api is False for mock fallbacks
+    """
+    mode = current_app.config['MEAL_GENERATION_MODE'] if has_app_context() else 'batch'
+    generate = _generate_meal_plans_parallel if mode == 'parallel' else _generate_meal_plans_uncached
+    return generate(meal_type, budget, preferences, deadline=deadline, priority=priority)
+
+def stream_meal_plans(meal_type, budget, preferences=None, deadline=None):
+    """
+    Generate meal plans as a stream, yielding each meal as soon as it is complete
+    
+    Requests a streamed completion and emits every meal object the moment its
+    closing brace arrives. Meals outside the budget range or violating the
+    preferences are dropped, and any missing slots are topped up with mock
+    meals at the end. The mock meals never relax the preferences, so fewer
+    than 3 (or none) may be yielded when the preferences rule most out.
+    
+    Args:
+        meal_type (str): Breakfast, Lunch, or Supper
+        budget (float): Budget in KES
+        preferences (str, optional): User's meal preferences
+        deadline (Deadline, optional): Time budget for the whole stream
+        
+    Yields:
+        dict: A single meal plan option
+    """
+    deadline = deadline or deadline_for('default')
+    cache = get_meal_cache()
+    cache_key = cache.make_key(meal_type, budget, preferences)
+    
+    cached_plans = cache.get(cache_key)
+    if cached_plans is not None:
+        print(f"Streaming meal plans from cache for {cache_key}")
+        yield from cached_plans
+        return
+    
+    stored_plans = find_stored_meals(meal_type, budget, preferences)
+    if stored_plans:
+        print(f"Streaming meal plans from the meals table for {cache_key}")
+        cache.set(cache_key, stored_plans)
+        yield from stored_plans
+        return
+    
+    composed_plans = compose_meal_plans(meal_type, budget, preferences)
+    if composed_plans:
+        print(f"Streaming locally composed meal plans for {cache_key}")
+        cache.set(cache_key, composed_plans)
+        yield from composed_plans
+        return
+    
+    api_details = get_model_api_details()
+    breaker = get_breaker("groq", api_details["model"]) if api_details else None
+    meal_plans = []
+    
+    if breaker and not breaker.allow_request():
+        print(f"Circuit breaker {breaker.name} is open, streaming mock data")
+    elif not deadline.allows(min_attempt_seconds()):
+        print(f"Not enough time left ({deadline}), streaming mock data")
+        if breaker:
+            breaker.release()
+    elif api_details:
+        data = {
+            "model": api_details["model"],
+            "messages": [{"role": "user", "content": build_meal_plan_prompt(meal_type, budget, preferences)}],
+            "temperature": 0.7,
+            "max_tokens": 4000,
+            "stream": True
+        }
+        
+        try:
+            get_rate_limiter().acquire(_estimate_tokens(data), deadline=deadline)
+            if not deadline.allows(min_attempt_seconds()):
+                raise RateLimitExceeded(f"Provider quota obtained with too little time left ({deadline})")
+        except RateLimitExceeded as e:
+            print(f"Provider quota unavailable ({str(e)}), streaming mock data")
+            breaker.release()
+        else:
+            parser = IncrementalMealParser()
+            lines = get_http_client().stream_lines(api_details["api_url"], headers=api_details["headers"], payload=data,
+                                                   total_timeout=deadline.cap(get_http_client().total_timeout))
+            started = time.monotonic()
+            first_line_latency = None
+            try:
+                for line in lines:
+                    if first_line_latency is None:
+                        first_line_latency = time.monotonic() - started
+                        breaker.record_success(first_line_latency)
+                
+                    # Server-sent events from the provider: "data: {...}" or "data: [DONE]"
+                    if not line.startswith("data:"):
+                        continue
+                    event_data = line[len("data:"):].strip()
+                    if event_data == "[DONE]":
+                        break
+                
+                    delta = json.loads(event_data)["choices"][0].get("delta", {})
+                    for meal in parser.feed(delta.get("content") or ""):
+                        if _is_acceptable_meal(meal, budget, preferences):
+                            meal_plans.append(meal)
+                            yield meal
+                
+                    if len(meal_plans) >= 3:
+                        break
+            
+                # Salvage a final meal cut off by a truncated stream
+                for meal in parser.finish():
+                    if len(meal_plans) < 3 and _is_acceptable_meal(meal, budget, preferences):
+                        meal_plans.append(meal)
+                        yield meal
+            except (requests.exceptions.RequestException, ValueError, KeyError, IndexError) as e:
+                print(f"Streaming generation error: {str(e)}")
+                response = getattr(e, "response", None)
+                if response is not None and response.status_code == 429:
+                    get_rate_limiter().penalize(_retry_after(response))
+                if first_line_latency is None:
+                    breaker.record_failure(time.monotonic() - started, e)
+            finally:
+                lines.close()
+    
+    if len(meal_plans) >= 3:
+        cache.set(cache_key, meal_plans[:3])
+        store_generated_meals(meal_type, meal_plans[:3])
+        return
+    
+    # Top up the missing slots with mock meals that haven't been shown yet
+    print(f"Stream produced {len(meal_plans)} acceptable meals, topping up with mock data")
+    shown = len(meal_plans)
+    yield from _top_up_meal_plans(meal_plans, meal_type, budget, preferences)[shown:]
+
+def _is_acceptable_meal(meal, budget, preferences=None, check_includes=True):
+    """
+    Check a single meal (with its cost verified) against the budget range (50%-110%) and the user's preferences
+    
+    With check_includes=False the meal doesn't need a requested item itself,
+    for callers that check that across the whole set of meals.
+    """
+    if not meal.get("name"):
+        return False
+    verify_meal_nutrition([meal])
+    normalize_nutritional_info(meal)
+    verify_meal_costs([meal])
+    
+    cost = get_meal_cost(meal)
+    budget_float = float(budget)
+    if cost is None or cost < budget_float * 0.5 or cost > budget_float * 1.1:
+        print(f"Meal '{meal.get('name', 'unknown')}' with cost {meal.get('total_cost')} is outside budget range")
+        return False
+    
+    if preferences and preferences.strip():
+        adheres, reason = check_preferences_adherence(meal, preferences, check_includes)
+        if not adheres:
+            print(f"Meal '{meal.get('name', 'unknown')}' violates preferences: {reason}")
+            return False
+    
+    return True
+
+def _preferences_prompt_text(preferences):
+    """Prompt section that makes the user's preferences, and the constraints parsed from them, the top priority"""
+    constraints = parse_preferences(preferences)
+    if not constraints:
+        return ""
+    parsed = "\n".join("        " + line for line in constraints.describe().splitlines())
+    
+    return f"""
+        ===== HIGHEST PRIORITY REQUIREMENT =====
+        
+        User preferences: "{preferences}"
+        
+        THESE PREFERENCES MUST BE RESPECTED IN ALL MEAL SUGGESTIONS.
+        
+        The inclusion of requested items (e.g., "strong tea", "tangawizi", etc.) is MORE IMPORTANT 
+        than meeting the exact budget target. A meal that includes the requested preferences but
+        costs slightly less than the target budget is BETTER than a meal that ignores preferences.
+        
+        Specific requirements:
+        - If user asks for specific foods/drinks (e.g., "tea", "chapati"), INCLUDE them in at least one meal
+        - For dietary preferences (vegetarian, vegan, etc.), follow them strictly for ALL meals
+        - For food avoidances ("no X"), NEVER include those ingredients
+        - For allergies, strictly avoid all forms of those ingredients
+        - Respect cultural or religious food restrictions absolutely
+        
+        Parsed requirements:
+{parsed}
+        
+        This is your TOP PRIORITY instruction.
+        """
+
+def build_meal_plan_prompt(meal_type, budget, preferences=None):
+    """Build the LLM prompt asking for 3 meal suggestions in the required JSON format"""
+    budget = float(budget)
+    
+    # Make preferences more prominent in the prompt
+    preferences_text = _preferences_prompt_text(preferences)
+    
+    prompt = f"""Generate EXACTLY 3 affordable meal suggestions for {meal_type} within a budget of KES {budget}.
+    
+    {preferences_text}
+
+    BUDGET GUIDELINES:
+    1. Aim to have each meal cost APPROXIMATELY KES {budget}.
+    2. The total_cost should ideally be between 50% and 100% of the budget (KES {budget * 0.5:.0f} to KES {budget:.0f}).
+    3. Meals costing LESS than the budget are ACCEPTABLE and PREFERRED over those exceeding it.
+    4. NEVER generate meals that cost more than 110% of the budget (KES {budget * 1.1:.0f}).
+    5. Double-check all ingredient costs and ensure they sum to the total_cost.
+    
+    Additional guidelines:
+    1. You MUST generate EXACTLY 3 different meal options, no more and no less.
+    
+    2. Use REALISTIC PRICING for Kenyan ingredients. Here are some reference prices:
+       - Single egg: 15 KES
+       - Loaf of bread: 60 KES
+       - 1 cup of rice: 35 KES
+       - 1 cup of beans: 40 KES
+       - 1 cup of milk: 25 KES
+       - 1 large tomato: 15 KES
+       - 1 large onion: 20 KES
+       - 1 bunch kale (sukuma wiki): 10-15 KES
+       - 1 cup flour (maize/wheat): 30 KES
+       - Cooking oil (tablespoon): 10 KES
+    
+    3. For each meal suggestion, you MUST include:
+       - A name for the meal that ACCURATELY describes its contents
+       - A descriptive paragraph (minimum 30 words)
+       - A detailed list of ingredients with SPECIFIC AMOUNTS and costs in KES (at least 3-5 ingredients per meal)
+       - Step-by-step cooking instructions (at least 3 specific steps)
+       - Total estimated cost (sum of ingredients) - MUST be within the budget range
+       - Nutritional information (calories, protein, carbs, fat) WITH PERCENTAGES (0-100%)
+    
+    REQUIRED JSON FORMAT:
+    {{
+      "meals": [
+        {{
+          "name": "Meal Name",
+          "description": "Detailed description of the meal, ingredients and nutritional benefits",
+          "ingredients": [
+              {{"name": "Ingredient 1", "amount": "specific amount", "cost": numeric_cost_only}},
+              {{"name": "Ingredient 2", "amount": "specific amount", "cost": numeric_cost_only}},
+              {{"name": "Ingredient 3", "amount": "specific amount", "cost": numeric_cost_only}}
+          ],
+          "instructions": ["Step 1", "Step 2", "Step 3"],
+          "total_cost": numeric_cost_only,
+          "nutritional_info": {{
+              "calories": "value kcal",
+              "protein": percentage_value,
+              "carbs": percentage_value,
+              "fat": percentage_value
+          }}
+        }},
+        ... 2 more meal objects ...
+      ]
+    }}
+    
+    FINAL CHECK BEFORE RESPONDING:
+    1. Verify your response is a SINGLE valid JSON object with a "meals" array containing EXACTLY 3 items
+    2. Verify each meal has a realistic name that matches its ingredients
+    3. Verify each meal has at least 3 ingredients with specific amounts and numeric costs
+    4. Verify each meal has at least 3 specific cooking instructions
+    5. Verify all ingredient costs sum to the total_cost value
+    6. If user specified preferences, verify each meal strictly follows ALL preferences
+    
+    Return ONLY the JSON object with no additional text or explanation.
+    """
+    
+    return prompt
+
+def build_single_meal_prompt(meal_type, budget, preferences=None, variation=None, avoid_names=None):
+    """
+    Build a short LLM prompt asking for one meal suggestion, used by parallel generation
+    
+    The response keeps the {"meals": [...]} shape of the full prompt so it
+    goes through the same parser.
+    
+    Args:
+        variation (str, optional): Style hint that keeps concurrent slots distinct
+        avoid_names (iterable, optional): Meals already chosen for the other slots
+    """
+    budget = float(budget)
+    preferences_text = _preferences_prompt_text(preferences)
+    
+    variation_text = f"Make it {variation}." if variation else ""
+    avoid_text = ""
+    if avoid_names:
+        avoid_text = "Do NOT suggest any of these meals: " + ", ".join(sorted(avoid_names)) + "."
+    
+    prompt = f"""Generate ONE affordable meal suggestion for {meal_type} within a budget of KES {budget}.
+    {variation_text} {avoid_text}
+    
+    {preferences_text}
+
+    The total_cost must be between KES {budget * 0.5:.0f} and KES {budget:.0f}, and never more than
+    KES {budget * 1.1:.0f}. Use realistic Kenyan prices (e.g. egg 15 KES, loaf of bread 60 KES,
+    1 cup of rice 35 KES, 1 cup of beans 40 KES, 1 bunch sukuma wiki 10-15 KES) and make sure the
+    ingredient costs sum to the total_cost.
+    
+    Include a name that describes the meal, a description (minimum 30 words), at least 3 ingredients
+    with specific amounts and numeric costs in KES, at least 3 cooking steps, the total cost, and
+    nutritional information (calories, protein, carbs, fat) with percentages (0-100%).
+    
+    REQUIRED JSON FORMAT:
+    {{
+      "meals": [
+        {{
+          "name": "Meal Name",
+          "description": "Detailed description of the meal",
+          "ingredients": [
+              {{"name": "Ingredient 1", "amount": "specific amount", "cost": numeric_cost_only}}
+          ],
+          "instructions": ["Step 1", "Step 2", "Step 3"],
+          "total_cost": numeric_cost_only,
+          "nutritional_info": {{
+              "calories": "value kcal",
+              "protein": percentage_value,
+              "carbs": percentage_value,
+              "fat": percentage_value
+          }}
+        }}
+      ]
+    }}
+    
+    Return ONLY the JSON object with no additional text or explanation.
+    """
+    
+    return prompt
+
+def _generate_meal_plans_uncached(meal_type, budget, preferences=None, deadline=None, priority=INTERACTIVE):
+    """
+    Generate meal plans by calling the API, falling back to mock data on failure
+    
+    Every attempt, backoff sleep and HTTP timeout is capped by the deadline;
+    when too little of it is left for another attempt, mock data is returned.
+    
+    Returns:
+        tuple: (meal_plans, from_api) where from_api is False for mock fallbacks
+    """
+    
+    deadline = deadline or deadline_for('default')
+    min_attempt = min_attempt_seconds()
     
     try:
         # Check API key presence and validity
@@ -55,103 +477,12 @@ def generate_meal_plans(meal_type, budget, preferences=None):
         # If no API available, use mock data
         if not api_details:
             print("No API details available, using mock data")
-            return generate_mock_meal_plans(meal_type, budget, preferences)
+            return generate_mock_meal_plans(meal_type, budget, preferences), False
         
         print(f"Using API model: {api_details['model']}")
         print(f"Processing request for {meal_type} with budget {budget} and preferences: {preferences}")
         
-        # Make preferences more prominent in the prompt
-        preferences_text = ""
-        if preferences and preferences.strip():
-            preferences_text = f"""
-            ===== HIGHEST PRIORITY REQUIREMENT =====
-            
-            User preferences: "{preferences}"
-            
-            THESE PREFERENCES MUST BE RESPECTED IN ALL MEAL SUGGESTIONS.
-            
-            The inclusion of requested items (e.g., "strong tea", "tangawizi", etc.) is MORE IMPORTANT 
-            than meeting the exact budget target. A meal that includes the requested preferences but
-            costs slightly less than the target budget is BETTER than a meal that ignores preferences.
-            
-            Specific requirements:
-            - If user asks for specific foods/drinks (e.g., "tea", "chapati"), INCLUDE them in at least one meal
-            - For dietary preferences (vegetarian, vegan, etc.), follow them strictly for ALL meals
-            - For food avoidances ("no X"), NEVER include those ingredients
-            - For allergies, strictly avoid all forms of those ingredients
-            - Respect cultural or religious food restrictions absolutely
-            
-            This is your TOP PRIORITY instruction.
-            """
-        
-        prompt = f"""Generate EXACTLY 3 affordable meal suggestions for {meal_type} within a budget of KES {budget}.
-        
-        {preferences_text}
-
-        BUDGET GUIDELINES:
-        1. Aim to have each meal cost APPROXIMATELY KES {budget}.
-        2. The total_cost should ideally be between 50% and 100% of the budget (KES {budget * 0.5:.0f} to KES {budget:.0f}).
-        3. Meals costing LESS than the budget are ACCEPTABLE and PREFERRED over those exceeding it.
-        4. NEVER generate meals that cost more than 110% of the budget (KES {budget * 1.1:.0f}).
-        5. Double-check all ingredient costs and ensure they sum to the total_cost.
-        
-        Additional guidelines:
-        1. You MUST generate EXACTLY 3 different meal options, no more and no less.
-        
-        2. Use REALISTIC PRICING for Kenyan ingredients. Here are some reference prices:
-           - Single egg: 15 KES
-           - Loaf of bread: 60 KES
-           - 1 cup of rice: 35 KES
-           - 1 cup of beans: 40 KES
-           - 1 cup of milk: 25 KES
-           - 1 large tomato: 15 KES
-           - 1 large onion: 20 KES
-           - 1 bunch kale (sukuma wiki): 10-15 KES
-           - 1 cup flour (maize/wheat): 30 KES
-           - Cooking oil (tablespoon): 10 KES
-        
-        3. For each meal suggestion, you MUST include:
-           - A name for the meal that ACCURATELY describes its contents
-           - A descriptive paragraph (minimum 30 words)
-           - A detailed list of ingredients with SPECIFIC AMOUNTS and costs in KES (at least 3-5 ingredients per meal)
-           - Step-by-step cooking instructions (at least 3 specific steps)
-           - Total estimated cost (sum of ingredients) - MUST be within the budget range
-           - Nutritional information (calories, protein, carbs, fat) WITH PERCENTAGES (0-100%)
-        
-        REQUIRED JSON FORMAT:
-        {{
-          "meals": [
-            {{
-              "name": "Meal Name",
-              "description": "Detailed description of the meal, ingredients and nutritional benefits",
-              "ingredients": [
-                  {{"name": "Ingredient 1", "amount": "specific amount", "cost": numeric_cost_only}},
-                  {{"name": "Ingredient 2", "amount": "specific amount", "cost": numeric_cost_only}},
-                  {{"name": "Ingredient 3", "amount": "specific amount", "cost": numeric_cost_only}}
-              ],
-              "instructions": ["Step 1", "Step 2", "Step 3"],
-              "total_cost": numeric_cost_only,
-              "nutritional_info": {{
-                  "calories": "value kcal",
-                  "protein": percentage_value,
-                  "carbs": percentage_value,
-                  "fat": percentage_value
-              }}
-            }},
-            ... 2 more meal objects ...
-          ]
-        }}
-        
-        FINAL CHECK BEFORE RESPONDING:
-        1. Verify your response is a SINGLE valid JSON object with a "meals" array containing EXACTLY 3 items
-        2. Verify each meal has a realistic name that matches its ingredients
-        3. Verify each meal has at least 3 ingredients with specific amounts and numeric costs
-        4. Verify each meal has at least 3 specific cooking instructions
-        5. Verify all ingredient costs sum to the total_cost value
-        6. If user specified preferences, verify each meal strictly follows ALL preferences
-        
-        Return ONLY the JSON object with no additional text or explanation.
-        """
+        prompt = build_meal_plan_prompt(meal_type, budget, preferences)
         
         data = {
             "model": api_details["model"],
@@ -165,21 +496,38 @@ def generate_meal_plans(meal_type, budget, preferences=None):
         max_retries = 3
         retries = 0
         current_model = api_details["model"]
+        breaker = get_breaker("groq", current_model)
         
         while retries < max_retries:
+            # Skip the provider entirely while it is known to be failing
+            if not breaker.allow_request():
+                print(f"Circuit breaker {breaker.name} is open, using mock data")
+                return generate_mock_meal_plans(meal_type, budget, preferences), False
+            
+            # Don't start an attempt that can't finish within the deadline
+            if not deadline.allows(min_attempt):
+                print(f"Not enough time left for an API call ({deadline}), using mock data")
+                breaker.release()
+                return generate_mock_meal_plans(meal_type, budget, preferences), False
+            
+            started = time.monotonic()
             try:
                 print(f"Attempting API call with model: {current_model}")
-                response = requests.post(api_details["api_url"], headers=api_details["headers"], json=data, timeout=30)
+                response = _post_completion(api_details, data, deadline, priority)
+                latency = time.monotonic() - started
                 
                 # More detailed logging for API responses
                 print(f"API Status Code: {response.status_code}")
                 if response.status_code != 200:
                     print(f"API Error Response: {response.text[:500]}")  # Print first 500 chars of error
+                    breaker.record_failure(latency, f"HTTP {response.status_code}")
                     
                     # On error, retry
                     retries += 1
-                    time.sleep(2 ** retries)  # Exponential backoff
+                    _backoff(retries, deadline, min_attempt)
                     continue
+                
+                breaker.record_success(latency)
                     
                 # Process successful response
                 response_json = response.json()
@@ -188,6 +536,11 @@ def generate_meal_plans(meal_type, budget, preferences=None):
                 # Debug log the response content
                 print(f"API Response Content: {content[:200]}...")  # Print first 200 chars for debugging
                 
+                # The answer arrived too late to be worth validating
+                if deadline.expired():
+                    print(f"Deadline exceeded after API call ({deadline}), using mock data")
+                    return generate_mock_meal_plans(meal_type, budget, preferences), False
+                
                 # Extract JSON from the content
                 try:
                     # Use our robust JSON parsing helper
@@ -199,7 +552,10 @@ def generate_meal_plans(meal_type, budget, preferences=None):
                         # Ensure we have exactly 3 meal options
                         if not isinstance(meal_plans, list) or len(meal_plans) != 3:
                             print(f"API returned {len(meal_plans) if isinstance(meal_plans, list) else 'invalid'} data structure, falling back to mock data")
-                            return generate_mock_meal_plans(meal_type, budget, preferences)
+                            return generate_mock_meal_plans(meal_type, budget, preferences), False
+                        
+                        # Recompute the stated costs from the ingredient price table before judging the budget
+                        verify_meal_costs(meal_plans)
                         
                         # Check budget adherence
                         budget_float = float(budget)
@@ -237,87 +593,330 @@ def generate_meal_plans(meal_type, budget, preferences=None):
                         # Only fall back to mock data if ALL meals are outside budget constraints
                         if meals_outside_budget == 3:
                             print(f"All meals are outside budget constraints, falling back to mock data")
-                            return generate_mock_meal_plans(meal_type, budget, preferences)
+                            return generate_mock_meal_plans(meal_type, budget, preferences), False
                         
-                        # Process nutritional info
+                        # Compute nutritional info from the ingredients where possible, then tidy what's left
+                        verify_meal_nutrition(meal_plans)
                         for meal in meal_plans:
-                            if 'nutritional_info' in meal:
-                                nutrition = meal['nutritional_info']
-                                
-                                # Make sure protein, carbs and fat are percentages (0-100)
-                                for key in ['protein', 'carbs', 'fat']:
-                                    if key in nutrition:
-                                        value = nutrition[key]
-                                        
-                                        # Convert to number if it's a string
-                                        if isinstance(value, str):
-                                            # Extract numeric part
-                                            numeric_value = re.match(r'(\d+(?:\.\d+)?)', value)
-                                            if numeric_value:
-                                                value = float(numeric_value.group(1))
-                                            else:
-                                                # Default percentage if parsing fails
-                                                value = 25  # Set a reasonable default
-                                        
-                                        # Ensure it's a percentage (0-100)
-                                        if isinstance(value, (int, float)):
-                                            # If value is too large to be a percentage (e.g., in grams), convert it
-                                            if value > 100:
-                                                value = min(100, value / 3)  # Simple conversion
-                                            
-                                            # Store as number for the progress bar to work properly
-                                            nutrition[key] = value
+                            normalize_nutritional_info(meal)
                         
                         # Check preference adherence
                         if preferences and preferences.strip():
-                            meals_violating_preferences = 0
+                            adhering_meals = []
                             for idx, meal in enumerate(meal_plans):
                                 adheres, reason = check_preferences_adherence(meal, preferences)
-                                if not adheres:
+                                if adheres:
+                                    adhering_meals.append(meal)
+                                else:
                                     print(f"Meal {idx+1} '{meal.get('name', 'unknown')}' violates preferences: {reason}")
-                                    meals_violating_preferences += 1
                             
-                            # If more than one meal violates preferences, fall back to mock data
-                            if meals_violating_preferences > 1:
-                                print(f"{meals_violating_preferences} meals violate user preferences, falling back to mock data")
-                                return generate_mock_meal_plans(meal_type, budget, preferences)
+                            # Keep the meals that adhere and replace the others with mock data
+                            if len(adhering_meals) < len(meal_plans):
+                                print(f"{len(meal_plans) - len(adhering_meals)} meals violate user preferences, topping up with mock data")
+                                return _top_up_meal_plans(adhering_meals, meal_type, budget, preferences), False
                         
-                        return meal_plans
+                        return meal_plans, True
                     else:
                         print("JSON parsing failed completely")
-                        return generate_mock_meal_plans(meal_type, budget, preferences)
+                        return generate_mock_meal_plans(meal_type, budget, preferences), False
                         
                 except Exception as e:
                     print(f"Error processing API response: {str(e)}")
                     print(f"Problematic content: {content[:500]}")  # Show more content for debugging
-                    return generate_mock_meal_plans(meal_type, budget, preferences)
+                    return generate_mock_meal_plans(meal_type, budget, preferences), False
                     
+            except RateLimitExceeded as e:
+                # Over our share of the provider quota: retrying would only add to the overload
+                print(f"Provider quota unavailable: {str(e)}, using mock data")
+                breaker.release()
+                return generate_mock_meal_plans(meal_type, budget, preferences), False
             except requests.exceptions.RequestException as e:
                 print(f"Request error: {str(e)}")
+                breaker.record_failure(time.monotonic() - started, e)
                 retries += 1
                 if retries >= max_retries:
-                    return generate_mock_meal_plans(meal_type, budget, preferences)
-                time.sleep(2 ** retries)  # Exponential backoff
+                    return generate_mock_meal_plans(meal_type, budget, preferences), False
+                _backoff(retries, deadline, min_attempt)
                 
         # If we've exhausted all retries
         print("All API call attempts failed. Using mock data instead.")
-        return generate_mock_meal_plans(meal_type, budget, preferences)
+        return generate_mock_meal_plans(meal_type, budget, preferences), False
     except Exception as e:
         print(f"Error generating meal plans: {str(e)}")
-        return generate_mock_meal_plans(meal_type, budget, preferences)  # Return mock data on any error
+        return generate_mock_meal_plans(meal_type, budget, preferences), False  # Return mock data on any error
+
+def _generate_meal_plans_parallel(meal_type, budget, preferences=None, deadline=None, priority=INTERACTIVE):
+    """
+    Generate the 3 meals as concurrent single-meal completions
+    
+    Each meal is validated on its own as soon as it arrives. A slot whose meal
+    can't be parsed, misses the budget, violates the preferences or repeats
+    another slot is regenerated on its own while the accepted meals are kept.
+    Requested items ("include tea") only need to appear in one meal, as in
+    the batch prompt, so they are checked on the finished set: if no meal
+    has them, one slot is regenerated with that requirement. Slots still
+    empty after MEAL_SLOT_MAX_ATTEMPTS attempts, or when the deadline runs
+    out, are filled with catalog meals while there are any that fit.
+    
+    Returns:
+        tuple: (meal_plans, from_api) where from_api is False if any slot fell back to mock data
+    """
+    deadline = deadline or deadline_for('default')
+    min_attempt = min_attempt_seconds()
+    max_attempts = current_app.config['MEAL_SLOT_MAX_ATTEMPTS'] if has_app_context() else 2
+    
+    api_details = get_model_api_details()
+    if not api_details:
+        print("No API details available, using mock data")
+        return generate_mock_meal_plans(meal_type, budget, preferences), False
+    
+    print(f"Generating {len(MEAL_SLOT_VARIATIONS)} meals in parallel with model: {api_details['model']}")
+    breaker = get_breaker("groq", api_details["model"])
+    constraints = parse_preferences(preferences)
+    slots = [None] * len(MEAL_SLOT_VARIATIONS)
+    attempts = [0] * len(MEAL_SLOT_VARIATIONS)
+    # Slot that must contain a requested item, once the finished set turned out to have none,
+    # and the acceptable meal it replaced (kept if no replacement arrives)
+    include_slot, replaced = None, None
+    
+    def submit(slot, avoid_names=None):
+        prompt = build_single_meal_prompt(meal_type, budget, preferences, MEAL_SLOT_VARIATIONS[slot], avoid_names)
+        attempts[slot] += 1
+        return executor.submit(_request_single_meal, api_details, prompt, breaker, deadline, min_attempt, priority)
+    
+    executor = ThreadPoolExecutor(max_workers=len(MEAL_SLOT_VARIATIONS), thread_name_prefix='meal-slot')
+    try:
+        pending = {submit(slot): slot for slot in range(len(slots))}
+        while pending:
+            done, _ = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                print(f"Deadline exceeded with {len(pending)} meal slots pending ({deadline})")
+                break
+            
+            for future in done:
+                slot = pending.pop(future)
+                meal = future.result()
+                taken = {m["name"].strip().lower() for m in slots if m}
+                
+                if meal and _is_acceptable_meal(meal, budget, preferences, check_includes=slot == include_slot) \
+                        and meal["name"].strip().lower() not in taken:
+                    slots[slot] = meal
+                elif attempts[slot] < max_attempts and deadline.allows(min_attempt):
+                    print(f"Regenerating meal slot {slot + 1} (attempt {attempts[slot] + 1})")
+                    pending[submit(slot, {m["name"] for m in slots if m})] = slot
+            
+            # A full set without any requested item: replace one meal with one that has it
+            if not pending and all(slots) and not constraints.includes_satisfied(slots) and include_slot is None:
+                retry = [slot for slot in range(len(slots)) if attempts[slot] < max_attempts]
+                if retry and deadline.allows(min_attempt):
+                    include_slot = retry[-1]
+                    print(f"No meal includes {', '.join(constraints.required_items)}, regenerating slot {include_slot + 1}")
+                    replaced = slots[include_slot]
+                    slots[include_slot] = None
+                    pending[submit(include_slot, {m["name"] for m in slots if m} | {replaced["name"]})] = include_slot
+    finally:
+        # Don't block on stragglers; their HTTP calls are bounded by the deadline
+        executor.shutdown(wait=False)
+    
+    if include_slot is not None and slots[include_slot] is None:
+        slots[include_slot] = replaced
+    
+    from_api = all(slots)
+    if not from_api:
+        print(f"{slots.count(None)} meal slots failed, filling them with mock data")
+        taken = {m["name"] for m in slots if m}
+        spare = [m for m in generate_mock_meal_plans(meal_type, budget, preferences) if m["name"] not in taken]
+        # Strict preferences can leave fewer catalog meals than empty slots; return only the filled ones
+        slots = [meal or (spare.pop(0) if spare else None) for meal in slots]
+        slots = [meal for meal in slots if meal]
+    
+    return slots, from_api
+
+def _request_single_meal(api_details, prompt, breaker, deadline, min_attempt, priority=INTERACTIVE):
+    """Run one single-meal completion and return the parsed meal, or None on any failure"""
+    if not breaker.allow_request():
+        print(f"Circuit breaker {breaker.name} is open, skipping meal slot")
+        return None
+    if not deadline.allows(min_attempt):
+        breaker.release()
+        return None
+    
+    data = {
+        "model": api_details["model"],
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+        "max_tokens": 1500,
+        "response_format": {"type": "json_object"}
+    }
+    
+    started = time.monotonic()
+    try:
+        response = _post_completion(api_details, data, deadline, priority)
+    except RateLimitExceeded as e:
+        print(f"Provider quota unavailable for meal slot: {str(e)}")
+        breaker.release()
+        return None
+    except requests.exceptions.RequestException as e:
+        print(f"Meal slot request error: {str(e)}")
+        breaker.record_failure(time.monotonic() - started, e)
+        return None
+    except Exception as e:
+        # A failed slot is regenerated or filled from the catalog; never fail the whole request
+        print(f"Unexpected meal slot error: {str(e)}")
+        breaker.record_failure(time.monotonic() - started, e)
+        return None
+    
+    latency = time.monotonic() - started
+    if response.status_code != 200:
+        print(f"Meal slot API error {response.status_code}: {response.text[:200]}")
+        breaker.record_failure(latency, f"HTTP {response.status_code}")
+        return None
+    breaker.record_success(latency)
+    
+    try:
+        content = response.json()["choices"][0]["message"]["content"]
+    except (ValueError, KeyError, IndexError) as e:
+        print(f"Unexpected meal slot response: {str(e)}")
+        return None
+    
+    meal_plans, _ = try_parse_json(content)
+    if meal_plans and isinstance(meal_plans[0], dict):
+        return meal_plans[0]
+    return None
+
+def _post_completion(api_details, data, deadline, priority=INTERACTIVE):
+    """
+    POST a non-streamed completion within the provider quota
+    
+    Every attempt (including a hedge) first takes quota from the rate limiter,
+    the reservation is corrected with the usage the provider reports, and a 429
+    pauses all workers for the provider's Retry-After.
+    
+    Raises:
+        RateLimitExceeded: If quota can't be obtained with enough of the deadline left for the call
+    """
+    client = get_http_client()
+    limiter = get_rate_limiter()
+    estimate = _estimate_tokens(data)
+    min_attempt = min_attempt_seconds()
+    
+    def send(cancel_event):
+        limiter.acquire(estimate, priority=priority, deadline=deadline)
+        # The wait for quota may have used up the time the call needs
+        if not deadline.allows(min_attempt):
+            raise RateLimitExceeded(f"Provider quota obtained with too little time left ({deadline})")
+        response = client.post_json(api_details["api_url"], headers=api_details["headers"], payload=data,
+                                    total_timeout=deadline.cap(client.total_timeout), cancel_event=cancel_event)
+        
+        if response.status_code == 429:
+            limiter.penalize(_retry_after(response))
+        elif response.status_code == 200:
+            try:
+                used = response.json().get("usage", {}).get("total_tokens")
+            except (ValueError, AttributeError):
+                used = None
+            if used:
+                limiter.record_usage(used - estimate)
+        return response
+    
+    return get_hedge_policy().call(send, deadline=deadline)
+
+def _estimate_tokens(data):
+    """Rough token count for a completion: ~4 characters per prompt token plus the expected completion"""
+    prompt_chars = sum(len(message["content"]) for message in data["messages"])
+    return prompt_chars // 4 + min(data["max_tokens"], EXPECTED_COMPLETION_TOKENS)
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def _backoff(retries, deadline, min_attempt):
+    """Exponential backoff, shortened so the next attempt still fits in the deadline"""
+    delay = min(2 ** retries, deadline.remaining() - min_attempt)
+    if delay > 0:
+        time.sleep(delay)
+
+def get_meal_cost(meal):
+    """Return a meal's total_cost as a float, extracting the number from strings like '120 KES'"""
+    value = meal.get('total_cost')
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        if isinstance(value, str):
+            match = re.search(r'(\d+(?:\.\d+)?)', value)
+            if match:
+                return float(match.group(1))
+    return None
+
+def normalize_nutritional_info(meal):
+    """Make sure protein, carbs and fat in a meal's nutritional info are percentages (0-100)"""
+    if 'nutritional_info' not in meal:
+        return meal
+    
+    nutrition = meal['nutritional_info']
+    if not isinstance(nutrition, dict):
+        return meal
+    
+    for key in ['protein', 'carbs', 'fat']:
+        if key in nutrition:
+            value = nutrition[key]
+            
+            # Convert to number if it's a string
+            if isinstance(value, str):
+                # Extract numeric part
+                numeric_value = re.match(r'(\d+(?:\.\d+)?)', value)
+                if numeric_value:
+                    value = float(numeric_value.group(1))
+                else:
+                    # Default percentage if parsing fails
+                    value = 25  # Set a reasonable default
+            
+            # Ensure it's a percentage (0-100)
+            if isinstance(value, (int, float)):
+                # If value is too large to be a percentage (e.g., in grams), convert it
+                if value > 100:
+                    value = min(100, value / 3)  # Simple conversion
+                
+                # Store as number for the progress bar to work properly
+                nutrition[key] = value
+    
+    return meal
 
 def generate_mock_meal_plans(meal_type, budget, preferences=None):
-    """Generate mock meal plans as fallback"""
+    """Pick fallback meal plans from the indexed meal catalog"""
     print(f"Generating mock meal plans for {meal_type} with budget {budget} and preferences: {preferences}")
-    return mock_meal_plans(meal_type, budget, preferences)
+    return get_meal_catalog().find(meal_type, budget, preferences)
 
-def check_preferences_adherence(meal, preferences):
+def _top_up_meal_plans(meal_plans, meal_type, budget, preferences=None):
+    """
+    Fill up to 3 meal plans with mock meals not already among them
+    
+    The mock meals never relax the preferences, so fewer than 3 (or none)
+    may come back when the preferences rule out most of the catalog.
+    """
+    meal_plans = list(meal_plans)
+    names = {meal.get("name") for meal in meal_plans}
+    for meal in generate_mock_meal_plans(meal_type, budget, preferences):
+        if len(meal_plans) >= 3:
+            break
+        if meal["name"] not in names:
+            names.add(meal["name"])
+            meal_plans.append(meal)
+    return meal_plans
+
+def check_preferences_adherence(meal, preferences, check_includes=True):
     """
     Check if a meal adheres to user preferences
     
+    The preference string is parsed once (and memoized) into constraints
+    that check the meal's name and ingredient names in a single pass.
+    
     Args:
         meal (dict): Meal data dictionary
         preferences (str): User preferences string
+        check_includes (bool): Whether this meal must contain one of the requested items
         
     Returns:
         tuple: (adheres_to_preferences, reason)
@@ -325,903 +924,23 @@ def check_preferences_adherence(meal, preferences):
     if not preferences or not preferences.strip():
         return True, ""  # No preferences specified
     
-    preferences = preferences.lower()
-    meal_str = json.dumps(meal).lower()  # Convert the entire meal to string for easy searching
-    
-    # Check if user asked for specific items to be included
-    preference_items = []
-    for item in ["tea", "coffee", "tangawizi", "ginger", "chapati", "ugali", "rice", "beans"]:
-        if item in preferences:
-            preference_items.append(item)
-    
-    # Check if any of the requested items are in the meal
-    if preference_items:
-        found_items = []
-        for item in preference_items:
-            if item in meal_str:
-                found_items.append(item)
-        
-        if not found_items and len(preference_items) > 0:
-            return False, f"Meal doesn't include any of the requested items: {', '.join(preference_items)}"
-    
-    # Common dietary preferences checking
-    if "vegetarian" in preferences:
-        meat_keywords = ["beef", "chicken", "pork", "mutton", "lamb", "meat", "fish", "sausage", "bacon", "ham"]
-        for keyword in meat_keywords:
-            if keyword in meal_str:
-                return False, f"Meal contains '{keyword}' but user requested vegetarian"
-    
-    if "vegan" in preferences:
-        animal_product_keywords = ["milk", "cheese", "butter", "ghee", "cream", "egg", "yogurt", "meat", "fish", "honey"]
-        for keyword in animal_product_keywords:
-            if keyword in meal_str:
-                return False, f"Meal contains '{keyword}' but user requested vegan"
-    
-    # Check for specific food exclusions
-    exclusion_phrases = ["no ", "without ", "don't want ", "exclude ", "allergy to "]
-    for phrase in exclusion_phrases:
-        for word in preferences.split():
-            if phrase + word in preferences:
-                excluded_item = word.strip()
-                if excluded_item and excluded_item in meal_str:
-                    return False, f"Meal contains '{excluded_item}' but user requested to exclude it"
-    
-    # Individual items exclusion
-    for exclusion in ["no beef", "no chicken", "no pork", "no fish", "no nuts", "no wheat", "no gluten", "no dairy"]:
-        if exclusion in preferences:
-            excluded_item = exclusion.split("no ")[1].strip()
-            if excluded_item and excluded_item in meal_str:
-                return False, f"Meal contains '{excluded_item}' but user requested to exclude it"
-    
-    return True, "" 
-
-def create_vegetarian_mock_meals(meal_type, budget):
-    """Generate vegetarian mock meal plans"""
-    budget_float = float(budget)
-    
-    if meal_type == "Breakfast":
-        return [
-            {
-                "name": "Fruit and Yogurt Bowl",
-                "description": "A refreshing and nutritious breakfast bowl with yogurt and seasonal fruits. This light yet satisfying option provides probiotics from yogurt and essential vitamins from fruits, giving you a healthy start to your day.",
-                "ingredients": [
-                    {"name": "Plain yogurt", "amount": "1 cup", "cost": 40.0},
-                    {"name": "Banana", "amount": "1 medium", "cost": 15.0},
-                    {"name": "Seasonal fruits", "amount": "1/2 cup chopped", "cost": 20.0},
-                    {"name": "Honey", "amount": "1 tablespoon", "cost": 10.0}
-                ],
-                "instructions": [
-                    "Pour yogurt into a bowl",
-                    "Slice banana and add to the bowl",
-                    "Add chopped seasonal fruits",
-                    "Drizzle with honey and serve immediately"
-                ],
-                "total_cost": 85.0,
-                "nutritional_info": {
-                    "calories": "280 kcal",
-                    "protein": 20,
-                    "carbs": 60,
-                    "fat": 10
-                }
-            },
-            {
-                "name": "Kenyan Uji (Porridge)",
-                "description": "Traditional Kenyan porridge made with millet flour, perfect for a warming breakfast. This nutritious staple provides sustained energy throughout the morning and can be sweetened to taste with honey or sugar.",
-                "ingredients": [
-                    {"name": "Millet flour", "amount": "1/2 cup", "cost": 20.0},
-                    {"name": "Water", "amount": "2 cups", "cost": 0.0},
-                    {"name": "Milk", "amount": "1/2 cup", "cost": 15.0},
-                    {"name": "Sugar", "amount": "2 tablespoons", "cost": 10.0}
-                ],
-                "instructions": [
-                    "Mix flour with 1 cup of cold water to make a smooth paste",
-                    "Boil the remaining water in a pot",
-                    "Gradually add the flour mixture to the boiling water, stirring continuously",
-                    "Cook on low heat for 5-7 minutes, stirring to prevent lumps",
-                    "Add milk and sugar to taste"
-                ],
-                "total_cost": 45.0,
-                "nutritional_info": {
-                    "calories": "220 kcal",
-                    "protein": 15,
-                    "carbs": 80,
-                    "fat": 5
-                }
-            },
-            {
-                "name": "Vegetable Sandwich",
-                "description": "A wholesome sandwich packed with fresh vegetables and a smooth avocado spread. This satisfying breakfast option provides a good balance of carbohydrates, healthy fats, and vitamins to energize your morning.",
-                "ingredients": [
-                    {"name": "Bread", "amount": "2 slices", "cost": 20.0},
-                    {"name": "Avocado", "amount": "1/2 medium", "cost": 25.0},
-                    {"name": "Tomato", "amount": "1 medium", "cost": 15.0},
-                    {"name": "Lettuce", "amount": "2 leaves", "cost": 10.0},
-                    {"name": "Cucumber", "amount": "4 slices", "cost": 10.0},
-                    {"name": "Salt", "amount": "1 pinch", "cost": 1.0}
-                ],
-                "instructions": [
-                    "Mash the avocado with a fork and spread on one slice of bread",
-                    "Sprinkle with a pinch of salt",
-                    "Layer tomato slices, lettuce, and cucumber on top",
-                    "Cover with the second slice of bread",
-                    "Cut in half and serve"
-                ],
-                "total_cost": 81.0,
-                "nutritional_info": {
-                    "calories": "310 kcal",
-                    "protein": 10,
-                    "carbs": 45,
-                    "fat": 15
-                }
-            }
-        ]
-    elif meal_type == "Lunch":
-        return [
-            {
-                "name": "Vegetable Chapati Wrap",
-                "description": "A flavorful wrap made with homemade chapati and fresh vegetables. This versatile lunch option is easy to customize, portable, and combines the softness of freshly made chapati with crunchy vegetables for a textural delight.",
-                "ingredients": [
-                    {"name": "Wheat flour", "amount": "1 cup", "cost": 25.0},
-                    {"name": "Cooking oil", "amount": "2 tablespoons", "cost": 20.0},
-                    {"name": "Carrots", "amount": "1 medium", "cost": 10.0},
-                    {"name": "Cabbage", "amount": "1/4 head", "cost": 15.0},
-                    {"name": "Onion", "amount": "1 small", "cost": 10.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                ],
-                "instructions": [
-                    "Mix flour, salt, and water to make chapati dough",
-                    "Divide into balls and roll into flat circles",
-                    "Cook chapatis on a hot pan until golden brown spots appear",
-                    "Grate carrots and shred cabbage finely",
-                    "Slice onion thinly and mix with vegetables",
-                    "Place vegetables on chapati, roll up and serve"
-                ],
-                "total_cost": 81.0,
-                "nutritional_info": {
-                    "calories": "350 kcal",
-                    "protein": 10,
-                    "carbs": 55,
-                    "fat": 35
-                }
-            },
-            {
-                "name": "Sukuma Wiki with Ugali",
-                "description": "A classic Kenyan vegetarian meal featuring sukuma wiki (kale) served with ugali. This nutritious combination provides plenty of minerals from the greens and energy from the ugali, making for a satisfying and economical lunch.",
-                "ingredients": [
-                    {"name": "Sukuma wiki (kale)", "amount": "1 bunch", "cost": 35.0},
-                    {"name": "Onion", "amount": "1 medium", "cost": 15.0},
-                    {"name": "Tomatoes", "amount": "2 medium", "cost": 30.0},
-                    {"name": "Maize flour", "amount": "2 cups", "cost": 30.0},
-                    {"name": "Cooking oil", "amount": "1 tablespoon", "cost": 10.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                ],
-                "instructions": [
-                    "Chop sukuma wiki, tomatoes, and onion",
-                    "Heat oil in a pan and sauté onions until translucent",
-                    "Add tomatoes and cook until soft",
-                    "Add sukuma wiki and cook until tender",
-                    "Season with salt",
-                    "In a separate pot, boil water and add maize flour gradually while stirring",
-                    "Cook ugali until firm, stirring regularly",
-                    "Serve sukuma wiki with ugali"
-                ],
-                "total_cost": 121.0,
-                "nutritional_info": {
-                    "calories": "420 kcal",
-                    "protein": 12,
-                    "carbs": 70,
-                    "fat": 8
-                }
-            },
-            {
-                "name": "Bean and Vegetable Stew",
-                "description": "A hearty vegetarian stew combining protein-rich beans with assorted vegetables. This nutrient-dense dish provides sustained energy and is packed with fiber, vitamins, and minerals for a healthy and filling lunch option.",
-                "ingredients": [
-                    {"name": "Beans", "amount": "1 cup", "cost": 40.0},
-                    {"name": "Carrots", "amount": "1 medium", "cost": 10.0},
-                    {"name": "Potatoes", "amount": "2 medium", "cost": 30.0},
-                    {"name": "Onion", "amount": "1 large", "cost": 15.0},
-                    {"name": "Tomatoes", "amount": "2 medium", "cost": 30.0},
-                    {"name": "Cooking oil", "amount": "1 tablespoon", "cost": 10.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0},
-                    {"name": "Spices", "amount": "to taste", "cost": 5.0}
-                ],
-                "instructions": [
-                    "Soak beans overnight and cook until soft",
-                    "Chop all vegetables into bite-sized pieces",
-                    "Heat oil in a large pot and sauté onions until translucent",
-                    "Add tomatoes and cook until soft",
-                    "Add carrots and potatoes, cook for 5 minutes",
-                    "Add cooked beans and enough water to cover",
-                    "Season with salt and spices",
-                    "Simmer until vegetables are tender and flavors combine"
-                ],
-                "total_cost": 141.0,
-                "nutritional_info": {
-                    "calories": "480 kcal",
-                    "protein": 18,
-                    "carbs": 65,
-                    "fat": 12
-                }
-            }
-        ]
-    else:  # Supper
-        return [
-            {
-                "name": "Vegetable Rice Pilau",
-                "description": "A fragrant rice dish cooked with aromatic spices and mixed vegetables. This vegetarian version of the popular East African rice pilau is full of flavor and makes for a satisfying and complete evening meal.",
-                "ingredients": [
-                    {"name": "Rice", "amount": "2 cups", "cost": 70.0},
-                    {"name": "Mixed vegetables", "amount": "2 cups", "cost": 50.0},
-                    {"name": "Onion", "amount": "1 large", "cost": 15.0},
-                    {"name": "Garlic", "amount": "3 cloves", "cost": 5.0},
-                    {"name": "Pilau masala", "amount": "1 tablespoon", "cost": 15.0},
-                    {"name": "Cooking oil", "amount": "2 tablespoons", "cost": 20.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                ],
-                "instructions": [
-                    "Rinse rice and soak for 30 minutes, then drain",
-                    "Heat oil and sauté onions until golden brown",
-                    "Add garlic and pilau masala, cook for 1 minute until fragrant",
-                    "Add mixed vegetables and sauté for 5 minutes",
-                    "Add rice and stir to coat with spices",
-                    "Add water (1:2 ratio rice to water) and salt",
-                    "Bring to a boil, then reduce heat and cover",
-                    "Simmer until rice is tender and water is absorbed"
-                ],
-                "total_cost": 176.0,
-                "nutritional_info": {
-                    "calories": "520 kcal",
-                    "protein": 12,
-                    "carbs": 85,
-                    "fat": 15
-                }
-            },
-            {
-                "name": "Spaghetti with Vegetable Sauce",
-                "description": "A comforting pasta dish with a rich vegetable sauce perfect for dinner. The sauce combines fresh vegetables and herbs for a nutritious and satisfying meal that's both economical and delicious.",
-                "ingredients": [
-                    {"name": "Spaghetti", "amount": "250g", "cost": 40.0},
-                    {"name": "Tomatoes", "amount": "3 large", "cost": 45.0},
-                    {"name": "Onion", "amount": "1 large", "cost": 15.0},
-                    {"name": "Carrots", "amount": "1 medium", "cost": 10.0},
-                    {"name": "Bell pepper", "amount": "1 medium", "cost": 20.0},
-                    {"name": "Cooking oil", "amount": "2 tablespoons", "cost": 20.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0},
-                    {"name": "Mixed herbs", "amount": "1 teaspoon", "cost": 5.0}
-                ],
-                "instructions": [
-                    "Boil spaghetti in salted water until al dente",
-                    "Chop all vegetables into small pieces",
-                    "Heat oil in a pan and sauté onions until translucent",
-                    "Add tomatoes and cook until soft",
-                    "Add remaining vegetables and herbs",
-                    "Simmer for 15 minutes until sauce thickens",
-                    "Season with salt to taste",
-                    "Drain pasta and mix with the sauce"
-                ],
-                "total_cost": 156.0,
-                "nutritional_info": {
-                    "calories": "450 kcal",
-                    "protein": 12,
-                    "carbs": 75,
-                    "fat": 13
-                }
-            },
-            {
-                "name": "Mixed Bean Curry with Chapati",
-                "description": "A hearty and protein-rich bean curry served with soft homemade chapati. This nutritious vegetarian dinner offers a perfect balance of proteins, complex carbohydrates, and essential nutrients in a flavorful and filling package.",
-                "ingredients": [
-                    {"name": "Mixed beans", "amount": "1.5 cups", "cost": 60.0},
-                    {"name": "Onion", "amount": "1 large", "cost": 15.0},
-                    {"name": "Tomatoes", "amount": "2 large", "cost": 30.0},
-                    {"name": "Wheat flour", "amount": "2 cups", "cost": 50.0},
-                    {"name": "Cooking oil", "amount": "3 tablespoons", "cost": 30.0},
-                    {"name": "Garlic", "amount": "3 cloves", "cost": 5.0},
-                    {"name": "Curry spices", "amount": "2 teaspoons", "cost": 10.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                ],
-                "instructions": [
-                    "Soak beans overnight, then cook until soft",
-                    "For chapati: Mix flour, water, salt to make dough; rest for 30 minutes",
-                    "Roll dough into flat circles and cook on hot pan until golden spots appear",
-                    "For curry: Sauté onions and garlic in oil until golden",
-                    "Add tomatoes and cook until soft",
-                    "Add curry spices and stir for 1 minute",
-                    "Add cooked beans and simmer for 15 minutes",
-                    "Serve bean curry with hot chapati"
-                ],
-                "total_cost": 201.0,
-                "nutritional_info": {
-                    "calories": "580 kcal",
-                    "protein": 25,
-                    "carbs": 80,
-                    "fat": 18
-                }
-            }
-        ]
-        
-def create_vegan_mock_meals(meal_type, budget):
-    """Generate vegan mock meal plans"""
-    budget_float = float(budget)
+    violations = parse_preferences(preferences).violations(meal, check_includes)
+    if violations:
+        return False, "; ".join(violations)
     
-    if meal_type == "Breakfast":
-        return [
-            {
-                "name": "Fruit Oatmeal Bowl",
-                "description": "A hearty and energizing vegan breakfast featuring oats cooked to creamy perfection and topped with fresh seasonal fruits. This nutritious start to your day provides sustained energy from complex carbohydrates and natural fruit sugars.",
-                "ingredients": [
-                    {"name": "Oats", "amount": "1 cup", "cost": 25.0},
-                    {"name": "Water", "amount": "2 cups", "cost": 0.0},
-                    {"name": "Banana", "amount": "1 medium", "cost": 15.0},
-                    {"name": "Seasonal fruits", "amount": "1/2 cup chopped", "cost": 20.0},
-                    {"name": "Sugar", "amount": "1 tablespoon", "cost": 5.0}
-                ],
-                "instructions": [
-                    "Boil water in a pot",
-                    "Add oats and reduce heat to medium-low",
-                    "Cook for 5-7 minutes, stirring occasionally, until creamy",
-                    "Add sugar and stir",
-                    "Pour into a bowl and top with sliced banana and chopped fruits"
-                ],
-                "total_cost": 65.0,
-                "nutritional_info": {
-                    "calories": "320 kcal",
-                    "protein": 12,
-                    "carbs": 70,
-                    "fat": 5
-                }
-            },
-            {
-                "name": "Avocado Toast",
-                "description": "Simple yet nutritious vegan breakfast with creamy avocado spread on toasted bread and seasoned to perfection. This popular dish provides healthy fats from avocado and wholesome carbohydrates from bread for a balanced morning meal.",
-                "ingredients": [
-                    {"name": "Bread", "amount": "2 slices", "cost": 20.0},
-                    {"name": "Avocado", "amount": "1 medium", "cost": 50.0},
-                    {"name": "Lemon juice", "amount": "1 teaspoon", "cost": 5.0},
-                    {"name": "Tomato", "amount": "1 small", "cost": 10.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0},
-                    {"name": "Black pepper", "amount": "to taste", "cost": 1.0}
-                ],
-                "instructions": [
-                    "Toast the bread slices until golden brown",
-                    "Cut avocado in half, remove the pit, and scoop out the flesh",
-                    "Mash avocado with lemon juice, salt, and pepper",
-                    "Spread avocado mixture on toast",
-                    "Top with sliced tomatoes",
-                    "Sprinkle additional salt and pepper if desired"
-                ],
-                "total_cost": 87.0,
-                "nutritional_info": {
-                    "calories": "350 kcal",
-                    "protein": 8,
-                    "carbs": 40,
-                    "fat": 22
-                }
-            },
-            {
-                "name": "Coconut Uji (Vegan Porridge)",
-                "description": "A dairy-free version of traditional Kenyan porridge made with millet flour and coconut milk. This warming breakfast option is perfect for vegans and provides a creamy consistency with tropical flavor notes from the coconut.",
-                "ingredients": [
-                    {"name": "Millet flour", "amount": "1/2 cup", "cost": 20.0},
-                    {"name": "Water", "amount": "2 cups", "cost": 0.0},
-                    {"name": "Coconut milk", "amount": "1/2 cup", "cost": 30.0},
-                    {"name": "Sugar", "amount": "2 tablespoons", "cost": 10.0},
-                    {"name": "Cinnamon", "amount": "1/4 teaspoon", "cost": 3.0}
-                ],
-                "instructions": [
-                    "Mix flour with 1 cup of cold water to make a smooth paste",
-                    "Boil the remaining water in a pot",
-                    "Gradually add the flour mixture to the boiling water, stirring continuously",
-                    "Cook on low heat for 5-7 minutes, stirring to prevent lumps",
-                    "Add coconut milk, sugar, and cinnamon",
-                    "Simmer for another 2 minutes and serve"
-                ],
-                "total_cost": 63.0,
-                "nutritional_info": {
-                    "calories": "250 kcal",
-                    "protein": 5,
-                    "carbs": 45,
-                    "fat": 10
-                }
-            }
-        ]
-    elif meal_type == "Lunch":
-        return [
-            {
-                "name": "African Peanut Stew",
-                "description": "A rich and flavorful vegan stew combining sweet potatoes, vegetables, and peanut butter in a tomato-based broth. This hearty lunch option is inspired by West African cuisine and provides an excellent balance of complex carbohydrates, protein, and healthy fats.",
-                "ingredients": [
-                    {"name": "Sweet potatoes", "amount": "2 medium", "cost": 40.0},
-                    {"name": "Onion", "amount": "1 large", "cost": 15.0},
-                    {"name": "Tomatoes", "amount": "2 large", "cost": 30.0},
-                    {"name": "Peanut butter", "amount": "3 tablespoons", "cost": 25.0},
-                    {"name": "Spinach", "amount": "2 cups", "cost": 30.0},
-                    {"name": "Cooking oil", "amount": "1 tablespoon", "cost": 10.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0},
-                    {"name": "Spices", "amount": "to taste", "cost": 5.0}
-                ],
-                "instructions": [
-                    "Chop sweet potatoes into cubes",
-                    "Heat oil in a pot and sauté onions until translucent",
-                    "Add tomatoes and cook until soft",
-                    "Add sweet potatoes and enough water to cover",
-                    "Simmer until sweet potatoes are almost tender",
-                    "Stir in peanut butter until well integrated",
-                    "Add spinach and cook until wilted",
-                    "Season with salt and spices"
-                ],
-                "total_cost": 156.0,
-                "nutritional_info": {
-                    "calories": "420 kcal",
-                    "protein": 15,
-                    "carbs": 60,
-                    "fat": 18
-                }
-            },
-            {
-                "name": "Bean and Vegetable Stew",
-                "description": "A hearty vegan stew combining protein-rich beans with assorted vegetables. This nutrient-dense dish provides sustained energy and is packed with fiber, vitamins, and minerals for a healthy and filling lunch option.",
-                "ingredients": [
-                    {"name": "Beans", "amount": "1 cup", "cost": 40.0},
-                    {"name": "Carrots", "amount": "1 medium", "cost": 10.0},
-                    {"name": "Potatoes", "amount": "2 medium", "cost": 30.0},
-                    {"name": "Onion", "amount": "1 large", "cost": 15.0},
-                    {"name": "Tomatoes", "amount": "2 medium", "cost": 30.0},
-                    {"name": "Cooking oil", "amount": "1 tablespoon", "cost": 10.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0},
-                    {"name": "Spices", "amount": "to taste", "cost": 5.0}
-                ],
-                "instructions": [
-                    "Soak beans overnight and cook until soft",
-                    "Chop all vegetables into bite-sized pieces",
-                    "Heat oil in a large pot and sauté onions until translucent",
-                    "Add tomatoes and cook until soft",
-                    "Add carrots and potatoes, cook for 5 minutes",
-                    "Add cooked beans and enough water to cover",
-                    "Season with salt and spices",
-                    "Simmer until vegetables are tender and flavors combine"
-                ],
-                "total_cost": 141.0,
-                "nutritional_info": {
-                    "calories": "480 kcal",
-                    "protein": 18,
-                    "carbs": 65,
-                    "fat": 12
-                }
-            },
-            {
-                "name": "Vegetable Chapati Wrap",
-                "description": "A flavorful vegan wrap made with homemade chapati and fresh vegetables. This versatile lunch option is easy to customize, portable, and combines the softness of freshly made chapati with crunchy vegetables for a textural delight.",
-                "ingredients": [
-                    {"name": "Wheat flour", "amount": "1 cup", "cost": 25.0},
-                    {"name": "Cooking oil", "amount": "2 tablespoons", "cost": 20.0},
-                    {"name": "Carrots", "amount": "1 medium", "cost": 10.0},
-                    {"name": "Cabbage", "amount": "1/4 head", "cost": 15.0},
-                    {"name": "Onion", "amount": "1 small", "cost": 10.0},
-                    {"name": "Avocado", "amount": "1/2 medium", "cost": 25.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                ],
-                "instructions": [
-                    "Mix flour, salt, and water to make chapati dough",
-                    "Divide into balls and roll into flat circles",
-                    "Cook chapatis on a hot pan until golden brown spots appear",
-                    "Grate carrots and shred cabbage finely",
-                    "Slice onion thinly and mix with vegetables",
-                    "Mash avocado and spread on chapati",
-                    "Place vegetables on chapati, roll up and serve"
-                ],
-                "total_cost": 106.0,
-                "nutritional_info": {
-                    "calories": "380 kcal",
-                    "protein": 8,
-                    "carbs": 55,
-                    "fat": 20
-                }
-            }
-        ]
-    else:  # Supper
-        return [
-            {
-                "name": "Vegetable Rice Pilau",
-                "description": "A fragrant rice dish cooked with aromatic spices and mixed vegetables. This vegan version of the popular East African rice pilau is full of flavor and makes for a satisfying and complete evening meal.",
-                "ingredients": [
-                    {"name": "Rice", "amount": "2 cups", "cost": 70.0},
-                    {"name": "Mixed vegetables", "amount": "2 cups", "cost": 50.0},
-                    {"name": "Onion", "amount": "1 large", "cost": 15.0},
-                    {"name": "Garlic", "amount": "3 cloves", "cost": 5.0},
-                    {"name": "Pilau masala", "amount": "1 tablespoon", "cost": 15.0},
-                    {"name": "Cooking oil", "amount": "2 tablespoons", "cost": 20.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                ],
-                "instructions": [
-                    "Rinse rice and soak for 30 minutes, then drain",
-                    "Heat oil and sauté onions until golden brown",
-                    "Add garlic and pilau masala, cook for 1 minute until fragrant",
-                    "Add mixed vegetables and sauté for 5 minutes",
-                    "Add rice and stir to coat with spices",
-                    "Add water (1:2 ratio rice to water) and salt",
-                    "Bring to a boil, then reduce heat and cover",
-                    "Simmer until rice is tender and water is absorbed"
-                ],
-                "total_cost": 176.0,
-                "nutritional_info": {
-                    "calories": "520 kcal",
-                    "protein": 12,
-                    "carbs": 85,
-                    "fat": 15
-                }
-            },
-            {
-                "name": "Coconut Bean Curry",
-                "description": "A creamy and aromatic vegan curry combining protein-rich beans with coconut milk and fragrant spices. This hearty and satisfying supper option offers a perfect blend of flavors and a good source of plant-based protein.",
-                "ingredients": [
-                    {"name": "Mixed beans", "amount": "1.5 cups", "cost": 60.0},
-                    {"name": "Coconut milk", "amount": "1 cup", "cost": 60.0},
-                    {"name": "Onion", "amount": "1 large", "cost": 15.0},
-                    {"name": "Tomatoes", "amount": "2 large", "cost": 30.0},
-                    {"name": "Garlic", "amount": "3 cloves", "cost": 5.0},
-                    {"name": "Ginger", "amount": "1 inch piece", "cost": 5.0},
-                    {"name": "Curry spices", "amount": "2 teaspoons", "cost": 10.0},
-                    {"name": "Cooking oil", "amount": "2 tablespoons", "cost": 20.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                ],
-                "instructions": [
-                    "Soak beans overnight, then cook until soft",
-                    "Heat oil in a large pot and sauté onions until translucent",
-                    "Add minced garlic and ginger, cook for 1 minute",
-                    "Add tomatoes and cook until soft",
-                    "Add curry spices and stir for 1 minute",
-                    "Add cooked beans and coconut milk",
-                    "Simmer for 15-20 minutes until flavors combine",
-                    "Season with salt to taste and serve with rice or chapati"
-                ],
-                "total_cost": 206.0,
-                "nutritional_info": {
-                    "calories": "550 kcal",
-                    "protein": 20,
-                    "carbs": 65,
-                    "fat": 25
-                }
-            },
-            {
-                "name": "Spaghetti with Tomato and Vegetable Sauce",
-                "description": "A comforting vegan pasta dish with a rich tomato and vegetable sauce perfect for dinner. The sauce combines fresh vegetables and herbs for a nutritious and satisfying meal that's both economical and delicious.",
-                "ingredients": [
-                    {"name": "Spaghetti", "amount": "250g", "cost": 40.0},
-                    {"name": "Tomatoes", "amount": "4 large", "cost": 60.0},
-                    {"name": "Onion", "amount": "1 large", "cost": 15.0},
-                    {"name": "Carrots", "amount": "1 medium", "cost": 10.0},
-                    {"name": "Bell pepper", "amount": "1 medium", "cost": 20.0},
-                    {"name": "Garlic", "amount": "3 cloves", "cost": 5.0},
-                    {"name": "Cooking oil", "amount": "2 tablespoons", "cost": 20.0},
-                    {"name": "Mixed herbs", "amount": "1 tablespoon", "cost": 10.0},
-                    {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                ],
-                "instructions": [
-                    "Boil spaghetti in salted water until al dente",
-                    "Chop all vegetables into small pieces",
-                    "Heat oil in a pan and sauté onions and garlic until fragrant",
-                    "Add tomatoes and cook until soft",
-                    "Add remaining vegetables and herbs",
-                    "Simmer for 15-20 minutes until sauce thickens",
-                    "Season with salt to taste",
-                    "Drain pasta and mix with the sauce"
-                ],
-                "total_cost": 181.0,
-                "nutritional_info": {
-                    "calories": "480 kcal",
-                    "protein": 13,
-                    "carbs": 80,
-                    "fat": 14
-                }
-            }
-        ] 
+    return True, ""
 
-def mock_meal_plans(meal_type, budget, preferences=""):
-    """Generate mock meal plans when API fails"""
-    # Process preferences
-    preferences = preferences.lower() if preferences else ""
-    
-    # Return appropriate meals based on dietary preferences
-    if "vegan" in preferences:
-        return create_vegan_mock_meals(meal_type, budget)
-    elif "vegetarian" in preferences:
-        return create_vegetarian_mock_meals(meal_type, budget)
-    else:
-        # Original mock meals (non-vegetarian)
-        budget_float = float(budget)
-        
-        if meal_type == "Breakfast":
-            return [
-                {
-                    "name": "Kenyan Breakfast Combo",
-                    "description": "A hearty Kenyan breakfast featuring eggs, sausage, and toast. This classic combination provides protein and carbohydrates to fuel your morning.",
-                    "ingredients": [
-                        {"name": "Eggs", "amount": "2 large", "cost": 30.0},
-                        {"name": "Sausage", "amount": "2 links", "cost": 50.0},
-                        {"name": "Bread", "amount": "2 slices", "cost": 15.0},
-                        {"name": "Cooking oil", "amount": "1 tablespoon", "cost": 10.0},
-                        {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                    ],
-                    "instructions": [
-                        "Heat oil in a pan",
-                        "Cook sausages until browned",
-                        "In the same pan, fry eggs to your liking",
-                        "Toast bread slices",
-                        "Serve hot with tea or coffee"
-                    ],
-                    "total_cost": 106.0,
-                    "nutritional_info": {
-                        "calories": "450 kcal",
-                        "protein": 25,
-                        "carbs": 30,
-                        "fat": 30
-                    }
-                },
-                {
-                    "name": "Beef and Potato Hash",
-                    "description": "A filling breakfast combining diced beef, potatoes, and vegetables. This protein-rich dish provides long-lasting energy and plenty of flavors to kick-start your day.",
-                    "ingredients": [
-                        {"name": "Ground beef", "amount": "100g", "cost": 60.0},
-                        {"name": "Potatoes", "amount": "2 medium", "cost": 30.0},
-                        {"name": "Onion", "amount": "1 small", "cost": 10.0},
-                        {"name": "Bell pepper", "amount": "1/2 medium", "cost": 10.0},
-                        {"name": "Cooking oil", "amount": "2 tablespoons", "cost": 20.0},
-                        {"name": "Salt and pepper", "amount": "to taste", "cost": 2.0}
-                    ],
-                    "instructions": [
-                        "Dice potatoes into small cubes",
-                        "Heat oil in a large pan",
-                        "Add potatoes and cook until beginning to soften",
-                        "Add ground beef and cook until browned",
-                        "Add diced onions and peppers",
-                        "Season with salt and pepper",
-                        "Cook until vegetables are tender and meat is fully cooked"
-                    ],
-                    "total_cost": 132.0,
-                    "nutritional_info": {
-                        "calories": "520 kcal",
-                        "protein": 30,
-                        "carbs": 40,
-                        "fat": 28
-                    }
-                },
-                {
-                    "name": "Mandazi and Tea",
-                    "description": "Traditional East African doughnuts served with spiced tea. These slightly sweet, cardamom-flavored pastries are a popular breakfast item in Kenya and pair perfectly with a hot cup of chai tea.",
-                    "ingredients": [
-                        {"name": "All-purpose flour", "amount": "2 cups", "cost": 30.0},
-                        {"name": "Sugar", "amount": "1/4 cup", "cost": 10.0},
-                        {"name": "Milk", "amount": "1/2 cup", "cost": 15.0},
-                        {"name": "Eggs", "amount": "1 large", "cost": 15.0},
-                        {"name": "Cooking oil", "amount": "For frying", "cost": 30.0},
-                        {"name": "Cardamom", "amount": "1/4 teaspoon", "cost": 5.0},
-                        {"name": "Tea leaves", "amount": "2 teaspoons", "cost": 10.0}
-                    ],
-                    "instructions": [
-                        "Mix flour, sugar, and cardamom in a bowl",
-                        "Add eggs and milk to form a dough",
-                        "Knead until smooth and let rest for 15 minutes",
-                        "Roll out dough and cut into triangles",
-                        "Deep fry until golden brown",
-                        "Separately, boil water for tea and add tea leaves",
-                        "Serve mandazi with hot tea"
-                    ],
-                    "total_cost": 115.0,
-                    "nutritional_info": {
-                        "calories": "380 kcal",
-                        "protein": 10,
-                        "carbs": 55,
-                        "fat": 15
-                    }
-                }
-            ]
-        elif meal_type == "Lunch":
-            return [
-                {
-                    "name": "Ugali with Sukuma Wiki",
-                    "description": "Traditional Kenyan meal with maize meal and kale, a staple combination that's both nutritious and filling. Sukuma wiki (kale) is rich in vitamins while ugali provides the energy-giving carbohydrates needed for an active day.",
-                    "ingredients": [
-                        {"name": "Maize flour", "amount": "2 cups", "cost": 30.0},
-                        {"name": "Sukuma wiki (kale)", "amount": "1 bunch", "cost": 35.0},
-                        {"name": "Onion", "amount": "1 medium", "cost": 15.0},
-                        {"name": "Tomato", "amount": "1 large", "cost": 15.0},
-                        {"name": "Cooking oil", "amount": "1 tablespoon", "cost": 10.0},
-                        {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                    ],
-                    "instructions": [
-                        "Boil 4 cups of water in a pot",
-                        "Add maize flour gradually while stirring to avoid lumps", 
-                        "Cook ugali until firm, stirring regularly",
-                        "In a separate pan, heat oil and fry onions until translucent",
-                        "Add chopped tomatoes and cook until soft",
-                        "Add chopped sukuma wiki and cook until tender",
-                        "Season with salt to taste and serve with ugali"
-                    ],
-                    "total_cost": 106.0,
-                    "nutritional_info": {
-                        "calories": "480 kcal",
-                        "protein": 15,
-                        "carbs": 75,
-                        "fat": 10
-                    }
-                },
-                {
-                    "name": "Beef Stew with Rice",
-                    "description": "A hearty beef stew with tender meat and vegetables served over fluffy rice. This balanced meal provides protein, carbohydrates, and essential nutrients for a sustaining lunch option.",
-                    "ingredients": [
-                        {"name": "Beef cubes", "amount": "250g", "cost": 150.0},
-                        {"name": "Rice", "amount": "1 cup", "cost": 35.0},
-                        {"name": "Carrots", "amount": "2 medium", "cost": 20.0},
-                        {"name": "Potatoes", "amount": "2 medium", "cost": 30.0},
-                        {"name": "Onion", "amount": "1 large", "cost": 15.0},
-                        {"name": "Tomatoes", "amount": "2 medium", "cost": 30.0},
-                        {"name": "Cooking oil", "amount": "2 tablespoons", "cost": 20.0},
-                        {"name": "Salt", "amount": "to taste", "cost": 1.0},
-                        {"name": "Spices", "amount": "to taste", "cost": 5.0}
-                    ],
-                    "instructions": [
-                        "Heat oil and brown beef cubes",
-                        "Add onions and cook until translucent",
-                        "Add tomatoes and cook until soft",
-                        "Add carrots, potatoes, and spices",
-                        "Add water to cover and simmer until meat is tender",
-                        "Separately, cook rice until fluffy",
-                        "Serve beef stew over rice"
-                    ],
-                    "total_cost": 306.0,
-                    "nutritional_info": {
-                        "calories": "650 kcal",
-                        "protein": 35,
-                        "carbs": 60,
-                        "fat": 25
-                    }
-                },
-                {
-                    "name": "Chicken and Chapati Wrap",
-                    "description": "A flavorful wrap featuring tender chicken pieces with vegetables rolled in a soft chapati. This portable lunch option provides a good balance of protein and carbohydrates with the convenience of a handheld meal.",
-                    "ingredients": [
-                        {"name": "Chicken breast", "amount": "150g", "cost": 100.0},
-                        {"name": "Wheat flour", "amount": "1 cup", "cost": 25.0},
-                        {"name": "Tomato", "amount": "1 medium", "cost": 15.0},
-                        {"name": "Onion", "amount": "1 small", "cost": 10.0},
-                        {"name": "Lettuce", "amount": "2 leaves", "cost": 10.0},
-                        {"name": "Cooking oil", "amount": "2 tablespoons", "cost": 20.0},
-                        {"name": "Spices", "amount": "to taste", "cost": 5.0},
-                        {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                    ],
-                    "instructions": [
-                        "Make chapati dough with flour, water, and salt",
-                        "Roll out and cook chapatis on a hot pan",
-                        "Season and cook chicken pieces until done",
-                        "Slice chicken and vegetables",
-                        "Place chicken and vegetables on chapati",
-                        "Roll up and secure with toothpick if needed"
-                    ],
-                    "total_cost": 186.0,
-                    "nutritional_info": {
-                        "calories": "520 kcal",
-                        "protein": 40,
-                        "carbs": 45,
-                        "fat": 20
-                    }
-                }
-            ]
-        else:  # Supper
-            return [
-                {
-                    "name": "Rice and Beans Dinner",
-                    "description": "A wholesome and filling combination of rice and beans that delivers complete proteins. This economical and satisfying meal is enhanced with aromatic onions and spices for a flavorful dinner option.",
-                    "ingredients": [
-                        {"name": "Rice", "amount": "1 cup", "cost": 35.0},
-                        {"name": "Beans", "amount": "1/2 cup (dry)", "cost": 25.0},
-                        {"name": "Onion", "amount": "1 medium", "cost": 15.0},
-                        {"name": "Tomato", "amount": "1 large", "cost": 15.0},
-                        {"name": "Cooking oil", "amount": "1 tablespoon", "cost": 10.0},
-                        {"name": "Salt", "amount": "to taste", "cost": 1.0},
-                        {"name": "Spices", "amount": "1 teaspoon", "cost": 5.0}
-                    ],
-                    "instructions": [
-                        "Soak beans for at least 4 hours or overnight",
-                        "Cook beans until soft (about 1 hour)",
-                        "In a separate pot, cook rice until fluffy",
-                        "In a pan, fry onions until golden brown",
-                        "Add tomatoes and spices and cook for 3-5 minutes",
-                        "Add the cooked beans to the onion-tomato mixture",
-                        "Mix well and simmer for 5 minutes",
-                        "Serve the beans over rice"
-                    ],
-                    "total_cost": 106.0,
-                    "nutritional_info": {
-                        "calories": "520 kcal",
-                        "protein": 22,
-                        "carbs": 68,
-                        "fat": 10
-                    }
-                },
-                {
-                    "name": "Grilled Fish with Kachumbari",
-                    "description": "Fresh grilled fish served with kachumbari, a traditional East African tomato and onion salad. This light yet satisfying dinner option is rich in protein and offers a refreshing contrast of flavors.",
-                    "ingredients": [
-                        {"name": "Tilapia fish", "amount": "1 medium", "cost": 180.0},
-                        {"name": "Tomatoes", "amount": "2 large", "cost": 30.0},
-                        {"name": "Onion", "amount": "1 large", "cost": 15.0},
-                        {"name": "Lemon", "amount": "1 whole", "cost": 15.0},
-                        {"name": "Coriander", "amount": "1 small bunch", "cost": 10.0},
-                        {"name": "Cooking oil", "amount": "1 tablespoon", "cost": 10.0},
-                        {"name": "Salt", "amount": "to taste", "cost": 1.0},
-                        {"name": "Spices", "amount": "to taste", "cost": 5.0}
-                    ],
-                    "instructions": [
-                        "Clean and score the fish on both sides",
-                        "Season with salt, spices, and lemon juice",
-                        "Grill fish until cooked through, about 5-7 minutes per side",
-                        "For kachumbari, dice tomatoes and onions",
-                        "Mix with chopped coriander and lemon juice",
-                        "Season with salt to taste",
-                        "Serve grilled fish with kachumbari on the side"
-                    ],
-                    "total_cost": 266.0,
-                    "nutritional_info": {
-                        "calories": "380 kcal",
-                        "protein": 45,
-                        "carbs": 15,
-                        "fat": 18
-                    }
-                },
-                {
-                    "name": "Beef Pilau",
-                    "description": "A fragrant one-pot rice dish cooked with beef and aromatic spices. This flavor-packed East African favorite is perfect for dinner, combining tender meat with spice-infused rice for a satisfying meal.",
-                    "ingredients": [
-                        {"name": "Rice", "amount": "2 cups", "cost": 70.0},
-                        {"name": "Beef cubes", "amount": "200g", "cost": 120.0},
-                        {"name": "Onion", "amount": "2 large", "cost": 30.0},
-                        {"name": "Garlic", "amount": "3 cloves", "cost": 5.0},
-                        {"name": "Pilau masala", "amount": "1 tablespoon", "cost": 15.0},
-                        {"name": "Cooking oil", "amount": "3 tablespoons", "cost": 30.0},
-                        {"name": "Salt", "amount": "to taste", "cost": 1.0}
-                    ],
-                    "instructions": [
-                        "Heat oil and fry onions until golden brown",
-                        "Add beef and cook until browned",
-                        "Add garlic and pilau masala and cook for 1 minute",
-                        "Add rice and stir to coat with spices",
-                        "Add water (2 cups water to 1 cup rice) and salt",
-                        "Bring to a boil, then reduce heat",
-                        "Cover and simmer until rice is cooked and water is absorbed"
-                    ],
-                    "total_cost": 271.0,
-                    "nutritional_info": {
-                        "calories": "650 kcal",
-                        "protein": 35,
-                        "carbs": 70,
-                        "fat": 25
-                    }
-                }
-            ] 
-
-def fix_json_formatting(json_str):
-    """Apply various fixes to common JSON formatting issues in API responses"""
-    # Fix KES values in JSON (replace "cost": 5 KES with "cost": 5)
-    json_str = re.sub(r'"cost":\s*(\d+(?:\.\d+)?)\s*KES', r'"cost": \1', json_str)
-    
-    # Fix non-quoted values in amount field (e.g., amount: 1 slice)
-    json_str = re.sub(r'"amount":\s*([^",\d\}]+)(?=,|\})', r'"amount": "\1"', json_str)
-    
-    # Fix unquoted numeric values in amount field (e.g., "amount": 2, -> "amount": "2",)
-    json_str = re.sub(r'"amount":\s*(\d+(?:\.\d+)?)(?=,|\})', r'"amount": "\1"', json_str)
-    
-    # Convert single quotes to double quotes for JSON compatibility
-    json_str = json_str.replace("'", '"')
+def try_parse_json(content):
+    """
+    Parse the meals out of a possibly malformed API response
     
-    # Fix missing quotes around any property values
-    json_str = re.sub(r':\s*([^",\d\{\}\[\]]+)(?=,|\})', r': "\1"', json_str)
+    Well-formed JSON is decoded directly; anything else goes through the
+    tolerant single-pass meal parser, which repairs common defects and
+    salvages complete meals from truncated output.
     
-    return json_str
-
-def try_parse_json(content):
-    """Try multiple approaches to parse potentially malformed JSON"""
+    Returns:
+        tuple: (meal_plans, method) where meal_plans is None if nothing could be parsed
+    """
     # First try direct parsing
     try:
         json_obj = json.loads(content)
@@ -1236,119 +955,9 @@ def try_parse_json(content):
     except json.JSONDecodeError:
         pass
     
-    # Try to extract JSON object with regex
-    json_match = re.search(r'\{.*"meals"\s*:\s*\[\s*\{.*\}\s*\]\s*\}', content, re.DOTALL)
-    if json_match:
-        json_str = fix_json_formatting(json_match.group(0))
-        try:
-            json_obj = json.loads(json_str)
-            if "meals" in json_obj and isinstance(json_obj["meals"], list):
-                return json_obj["meals"], "regex_extracted_meals"
-            else:
-                print(f"Extracted JSON with regex but missing meals array: {json_obj.keys()}")
-        except json.JSONDecodeError:
-            pass
-    
-    # Try to extract JSON array with regex (old format)
-    json_match = re.search(r'\[\s*\{.*\}\s*\]', content, re.DOTALL)
-    if json_match:
-        json_str = fix_json_formatting(json_match.group(0))
-        try:
-            return json.loads(json_str), "regex_extracted"
-        except json.JSONDecodeError:
-            pass
-    
-    # Try cleaning up code blocks
-    cleaned_content = content.strip()
-    if cleaned_content.startswith("Here is the response in the required JSON format:"):
-        cleaned_content = cleaned_content.replace("Here is the response in the required JSON format:", "", 1).strip()
-    if cleaned_content.startswith("```json"):
-        cleaned_content = cleaned_content.replace("```json", "", 1)
-    if cleaned_content.startswith("```"):
-        cleaned_content = cleaned_content.replace("```", "", 1)
-    if cleaned_content.endswith("```"):
-        cleaned_content = cleaned_content[:cleaned_content.rfind("```")]
-        
-    cleaned_content = fix_json_formatting(cleaned_content.strip())
-    
-    try:
-        json_obj = json.loads(cleaned_content)
-        # Check for meals array
-        if isinstance(json_obj, dict) and "meals" in json_obj and isinstance(json_obj["meals"], list):
-            return json_obj["meals"], "code_block_cleanup_with_meals"
-        elif isinstance(json_obj, list):
-            return json_obj, "code_block_cleanup"
-        else:
-            print(f"Cleaned JSON parsed but unexpected structure: {json_obj.keys() if isinstance(json_obj, dict) else type(json_obj)}")
-    except json.JSONDecodeError:
-        pass
-    
-    # If we still haven't successfully parsed, try reconstructing the JSON
-    print("All JSON parsing attempts failed, attempting reconstruction")
-    try:
-        # Extreme measures - try to rebuild meal plans from extracted pieces
-        meal_plans = []
-        
-        # Extract meal names
-        meal_names = re.findall(r'"name":\s*"([^"]+)"', content)
-        descriptions = re.findall(r'"description":\s*"([^"]+)"', content)
-        
-        # Extract ingredients sections
-        ingredients_sections = re.findall(r'"ingredients":\s*\[(.*?)\]', content, re.DOTALL)
-        
-        # Extract instructions sections
-        instructions_sections = re.findall(r'"instructions":\s*\[(.*?)\]', content, re.DOTALL)
-        
-        # Extract total costs
-        total_costs = re.findall(r'"total_cost":\s*(\d+(?:\.\d+)?)', content)
-        
-        # If we have basic elements, try to construct meals
-        if meal_names:
-            for i in range(min(3, len(meal_names))):
-                meal = {
-                    "name": meal_names[i] if i < len(meal_names) else f"Meal Option {i+1}",
-                    "description": descriptions[i] if i < len(descriptions) else "A delicious meal option.",
-                    "total_cost": float(total_costs[i]) if i < len(total_costs) else 0,
-                    "nutritional_info": {
-                        "calories": "300 kcal",
-                        "protein": 15,
-                        "carbs": 45,
-                        "fat": 10
-                    }
-                }
-                
-                # Try to extract ingredients
-                if i < len(ingredients_sections):
-                    try:
-                        # Fix the ingredients section formatting
-                        ingredients_json = "[" + fix_json_formatting(ingredients_sections[i]) + "]"
-                        ingredients = json.loads(ingredients_json)
-                        meal["ingredients"] = ingredients
-                    except json.JSONDecodeError:
-                        # Fallback to minimal ingredients
-                        meal["ingredients"] = [{"name": "Various ingredients", "amount": "as needed", "cost": 0}]
-                else:
-                    meal["ingredients"] = [{"name": "Various ingredients", "amount": "as needed", "cost": 0}]
-                
-                # Try to extract instructions
-                if i < len(instructions_sections):
-                    try:
-                        # Fix the instructions section formatting
-                        instructions_json = "[" + fix_json_formatting(instructions_sections[i]) + "]"
-                        instructions = json.loads(instructions_json)
-                        meal["instructions"] = instructions
-                    except json.JSONDecodeError:
-                        # Fallback to minimal instructions
-                        meal["instructions"] = ["Prepare and serve"]
-                else:
-                    meal["instructions"] = ["Prepare and serve"]
-                
-                meal_plans.append(meal)
-                
-            if meal_plans:
-                return meal_plans, "reconstructed"
-    except Exception as e:
-        print(f"Error during reconstruction: {str(e)}")
+    meal_plans = parse_meals(content)
+    if meal_plans:
+        return meal_plans, "incremental_repair"
     
     # All parsing approaches failed
-    return None, "failed" 
\ No newline at end of file
+    return None, "failed"
@@ -0,0 +1,208 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+DEFAULT_PERCENTILE = 95.0
+DEFAULT_MIN_DELAY = 1.0
+DEFAULT_MAX_HEDGE_RATE = 0.1
+DEFAULT_WINDOW = 200
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_MAX_WORKERS = 16
+
+# Process-wide policy, built once by init_hedging() during create_app
+_hedge_policy = None
+
+
+def _is_ok_response(response):
+    return response.status_code == 200
+
+
+class HedgePolicy:
+    """
+    Hedged requests for provider calls.
+
+    The call is started once. If it has not answered after the configured
+    percentile of recent latencies, an identical second request is sent and
+    the first valid response wins; the other attempt is told to cancel. The
+    share of hedged calls over the last `window` calls is capped by
+    max_hedge_rate so hedging cannot double provider spend, and no hedging
+    happens until min_samples latencies have been observed.
+    """
+
+    def __init__(self, enabled=False, percentile=DEFAULT_PERCENTILE, min_delay=DEFAULT_MIN_DELAY,
+                 max_hedge_rate=DEFAULT_MAX_HEDGE_RATE, window=DEFAULT_WINDOW, min_samples=DEFAULT_MIN_SAMPLES,
+                 max_workers=DEFAULT_MAX_WORKERS):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+
+        self._latencies = deque(maxlen=window)
+        self._recent_calls = deque(maxlen=window)  # True for calls that were hedged
+        self._counters = {
+            'calls': 0,
+            'hedges_sent': 0,
+            'hedges_won': 0,
+            'hedges_over_budget': 0,
+            'losers_cancelled': 0
+        }
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedged-call')
+
+    def call(self, fn, deadline=None, is_valid=_is_ok_response):
+        """
+        Run fn, hedging it with a second identical call if it is slow
+
+        Args:
+            fn (callable): Called as fn(cancel_event); should stop early once the event is set
+            deadline (Deadline, optional): No hedge is sent if the delay would outlive it
+            is_valid (callable, optional): Decides whether a result may win the race
+
+        Returns:
+            The winning result, or the primary's result if no attempt was valid
+
+        Raises:
+            Exception: The primary's error if every attempt failed
+        """
+        if not self.enabled:
+            return fn(None)
+
+        delay = self.hedge_delay()
+        primary_cancel = threading.Event()
+        primary = self._executor.submit(self._timed, fn, primary_cancel)
+
+        hedge = None
+        hedge_cancel = threading.Event()
+        if delay is not None and (deadline is None or deadline.allows(delay)):
+            done, _ = wait([primary], timeout=delay)
+            if not done:
+                if self._acquire_hedge():
+                    print(f"Provider call slower than {delay:.2f}s, sending hedged request")
+                    hedge = self._executor.submit(self._timed, fn, hedge_cancel)
+                else:
+                    self._count('hedges_over_budget')
+
+        if hedge is None:
+            self._record_call(hedged=False)
+            result, latency = primary.result()
+            if is_valid(result):
+                self._record_latency(latency)
+            return result
+
+        return self._race({primary: primary_cancel, hedge: hedge_cancel}, primary, hedge, is_valid)
+
+    def _race(self, attempts, primary, hedge, is_valid):
+        """Return the first valid result of the two attempts and cancel the other one"""
+        outcomes = {}
+        while attempts:
+            done, _ = wait(attempts, return_when=FIRST_COMPLETED)
+            for future in done:
+                attempts.pop(future)
+                try:
+                    result, latency = future.result()
+                except Exception as e:
+                    outcomes[future] = e
+                    continue
+
+                if is_valid(result):
+                    for loser_cancel in attempts.values():
+                        loser_cancel.set()
+                        self._count('losers_cancelled')
+                    if future is hedge:
+                        self._count('hedges_won')
+                    self._record_latency(latency)
+                    return result
+                outcomes[future] = result
+
+        # Neither attempt was valid: behave as if only the primary had been sent
+        if isinstance(outcomes[primary], Exception):
+            raise outcomes[primary]
+        return outcomes[primary]
+
+    def _timed(self, fn, cancel_event):
+        started = time.monotonic()
+        result = fn(cancel_event)
+        latency = time.monotonic() - started
+        return result, latency
+
+    def hedge_delay(self):
+        """Seconds to wait before hedging, or None while there are too few samples"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(self.percentile / 100 * len(ordered)) - 1))
+        return max(self.min_delay, ordered[index])
+
+    def _acquire_hedge(self):
+        """Reserve a hedge if it keeps the recent hedge rate within budget"""
+        with self._lock:
+            hedged = sum(self._recent_calls) + 1
+            if hedged / (len(self._recent_calls) + 1) > self.max_hedge_rate:
+                return False
+            self._recent_calls.append(True)
+            self._counters['calls'] += 1
+            self._counters['hedges_sent'] += 1
+            return True
+
+    def _record_call(self, hedged):
+        with self._lock:
+            self._recent_calls.append(hedged)
+            self._counters['calls'] += 1
+
+    def _record_latency(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        """Hedge counters, for the admin dashboard"""
+        with self._lock:
+            counters = dict(self._counters)
+            recent = len(self._recent_calls)
+            recent_rate = sum(self._recent_calls) / recent if recent else 0.0
+        delay = self.hedge_delay()
+        counters.update({
+            'enabled': self.enabled,
+            'recent_hedge_rate': round(recent_rate, 3),
+            'max_hedge_rate': self.max_hedge_rate,
+            'hedge_delay': round(delay, 3) if delay is not None else None
+        })
+        return counters
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+def init_hedging(app):
+    """Build the shared hedging policy from app config and register it on the app"""
+    global _hedge_policy
+
+    if _hedge_policy is not None:
+        _hedge_policy.close()
+
+    _hedge_policy = HedgePolicy(
+        enabled=app.config['HEDGE_ENABLED'],
+        percentile=app.config['HEDGE_PERCENTILE'],
+        min_delay=app.config['HEDGE_MIN_DELAY'],
+        max_hedge_rate=app.config['HEDGE_MAX_RATE'],
+        window=app.config['HEDGE_WINDOW'],
+        min_samples=app.config['HEDGE_MIN_SAMPLES']
+    )
+    app.extensions['hedging'] = _hedge_policy
+    return _hedge_policy
+
+
+def get_hedge_policy():
+    """Return the shared hedging policy, creating a disabled one outside of create_app"""
+    global _hedge_policy
+
+    if _hedge_policy is None:
+        _hedge_policy = HedgePolicy()
+    return _hedge_policy
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from datetime import datetime
+from flask import Response, current_app, stream_with_context
+from app import db
+from app.models.meal import MealHistory
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Export columns, in CSV header order
+SUMMARY_FIELDS = ('id', 'user_id', 'meal_type', 'meal_name', 'budget', 'total_cost', 'preferences', 'date_selected')
+PAYLOAD_FIELDS = ('description', 'ingredients', 'instructions', 'nutritional_info')
+# Payload fields written as JSON text in CSV cells
+JSON_FIELDS = ('ingredients', 'instructions', 'nutritional_info')
+
+
+def _export_record(meal, username=None):
+    record = {field: getattr(meal, field) for field in SUMMARY_FIELDS}
+    record['date_selected'] = meal.date_selected.strftime('%Y-%m-%d %H:%M:%S') if meal.date_selected else None
+    if username is not None:
+        record['username'] = username
+    record['description'] = meal.description
+    record['ingredients'] = meal.ingredients_data
+    record['instructions'] = meal.instructions_data
+    record['nutritional_info'] = meal.nutritional_data
+    return record
+
+
+def export_chunks(query, export_format, with_username=False, chunk_size=None):
+    """
+    Yield a meal history export as NDJSON or CSV text, a chunk of rows at a time
+
+    The query is read with yield_per, which streams rows from a
+    server-side cursor, and each chunk is yielded as soon as it is
+    encoded. Memory use stays flat however many rows are exported.
+
+    Args:
+        query: Query over MealHistory, or over (MealHistory, username) if with_username
+        export_format (str): 'ndjson' or 'csv'
+        with_username (bool): Whether rows carry the user's name
+        chunk_size (int, optional): Rows fetched and yielded at a time
+
+    Yields:
+        str: Encoded rows
+    """
+    chunk_size = chunk_size or current_app.config['HISTORY_EXPORT_CHUNK_SIZE']
+    fields = SUMMARY_FIELDS + (('username',) if with_username else ()) + PAYLOAD_FIELDS
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    if writer:
+        writer.writerow(fields)
+
+    rows = query.options(db.undefer_group('payload')) \
+        .order_by(MealHistory.date_selected.desc(), MealHistory.id.desc()) \
+        .yield_per(chunk_size)
+
+    pending = 0
+    for row in rows:
+        record = _export_record(*row) if with_username else _export_record(row)
+        if writer:
+            writer.writerow([json.dumps(record[field]) if field in JSON_FIELDS else record[field] for field in fields])
+        else:
+            buffer.write(json.dumps(record) + "\n")
+
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(query, export_format, filename, with_username=False):
+    """
+    Stream an export as a file download
+
+    No Content-Length is set, so the response goes out with chunked
+    transfer encoding as rows are read.
+
+    Args:
+        query: Query to export (see export_chunks)
+        export_format (str): 'ndjson' or 'csv'
+        filename (str): Download name, without extension
+        with_username (bool): Whether rows carry the user's name
+
+    Returns:
+        Response: Streaming response
+    """
+    stamp = datetime.utcnow().strftime('%Y%m%d')
+    return Response(stream_with_context(export_chunks(query, export_format, with_username)),
+                    mimetype=EXPORT_FORMATS[export_format],
+                    headers={
+                        'Content-Disposition': f'attachment; filename={filename}-{stamp}.{export_format}',
+                        'X-Accel-Buffering': 'no'  # Stop nginx from buffering the stream
+                    })
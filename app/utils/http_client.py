@@ -0,0 +1,168 @@
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 16
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_TOTAL_TIMEOUT = 30.0
+
+# Process-wide client, built once by init_http_client() during create_app
+_client = None
+
+
+class TotalTimeoutError(requests.exceptions.Timeout):
+    """Raised when a provider response is not fully received within the total timeout"""
+
+
+class RequestCancelled(requests.exceptions.RequestException):
+    """Raised when a caller cancels a request that is no longer needed (e.g. a lost hedge)"""
+
+
+class ProviderHTTPClient:
+    """
+    Shared keep-alive HTTP client for LLM provider calls.
+
+    Wraps a single requests.Session so every provider call reuses pooled
+    TCP/TLS connections instead of paying a fresh handshake per request.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 total_timeout=DEFAULT_TOTAL_TIMEOUT):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive"})
+
+        # Retries are handled by the caller, so the adapter never retries on its own
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post_json(self, url, headers=None, payload=None, total_timeout=None, cancel_event=None):
+        """
+        POST a JSON payload and read the full response body.
+
+        Args:
+            url (str): Endpoint URL
+            headers (dict, optional): Extra request headers
+            payload (dict, optional): JSON request body
+            total_timeout (float, optional): Overrides the client's total timeout
+            cancel_event (threading.Event, optional): When set, the response is abandoned
+                and its connection closed instead of being read to the end
+
+        Returns:
+            requests.Response: Response with its body already loaded
+
+        Raises:
+            TotalTimeoutError: If the total timeout is already used up
+        """
+        total_timeout = self._total_timeout(total_timeout)
+        deadline = time.monotonic() + total_timeout
+
+        response = self.session.post(
+            url,
+            headers=headers,
+            json=payload,
+            timeout=(min(self.connect_timeout, total_timeout), min(self.read_timeout, total_timeout)),
+            stream=True
+        )
+
+        # The read timeout only bounds the gap between bytes, so enforce the
+        # total budget while the body is being received
+        try:
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=8192):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise RequestCancelled("Request cancelled by caller")
+                body.extend(chunk)
+                if time.monotonic() > deadline:
+                    raise TotalTimeoutError(f"Response not received within {total_timeout:.1f}s")
+            response._content = bytes(body)
+        finally:
+            # Returns the connection to the pool (or drops it on error)
+            response.close()
+
+        return response
+
+    def stream_lines(self, url, headers=None, payload=None, total_timeout=None):
+        """
+        POST a JSON payload and yield the response body line by line as it arrives
+
+        Used for streamed (server-sent events) completions. Non-200 responses
+        raise requests.HTTPError before any line is yielded.
+
+        Yields:
+            str: Decoded response line
+
+        Raises:
+            TotalTimeoutError: If the total timeout is already used up
+        """
+        total_timeout = self._total_timeout(total_timeout)
+        deadline = time.monotonic() + total_timeout
+
+        response = self.session.post(
+            url,
+            headers=headers,
+            json=payload,
+            timeout=(min(self.connect_timeout, total_timeout), min(self.read_timeout, total_timeout)),
+            stream=True
+        )
+
+        try:
+            if response.status_code != 200:
+                raise requests.HTTPError(
+                    f"Streaming request failed with {response.status_code}: {response.text[:500]}",
+                    response=response
+                )
+
+            # text/event-stream defaults to ISO-8859-1 in requests; providers send UTF-8
+            response.encoding = 'utf-8'
+            for line in response.iter_lines(decode_unicode=True):
+                if time.monotonic() > deadline:
+                    raise TotalTimeoutError(f"Stream not completed within {total_timeout:.1f}s")
+                if line:
+                    yield line
+        finally:
+            response.close()
+
+    def _total_timeout(self, total_timeout):
+        """The effective total timeout; a caller's deadline may leave none, which requests can't take"""
+        total_timeout = self.total_timeout if total_timeout is None else total_timeout
+        if total_timeout <= 0:
+            raise TotalTimeoutError("No time left for the request")
+        return total_timeout
+
+    def close(self):
+        self.session.close()
+
+
+def init_http_client(app):
+    """Build the shared provider client from app config and register it on the app"""
+    global _client
+
+    if _client is not None:
+        _client.close()
+
+    _client = ProviderHTTPClient(
+        pool_connections=app.config['GROQ_HTTP_POOL_CONNECTIONS'],
+        pool_maxsize=app.config['GROQ_HTTP_POOL_MAXSIZE'],
+        connect_timeout=app.config['GROQ_HTTP_CONNECT_TIMEOUT'],
+        read_timeout=app.config['GROQ_HTTP_READ_TIMEOUT'],
+        total_timeout=app.config['GROQ_HTTP_TOTAL_TIMEOUT']
+    )
+    app.extensions['provider_http_client'] = _client
+    return _client
+
+
+def get_http_client():
+    """Return the shared provider client, creating a default one outside of create_app"""
+    global _client
+
+    if _client is None:
+        _client = ProviderHTTPClient()
+    return _client
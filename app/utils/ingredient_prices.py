@@ -0,0 +1,273 @@
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+import numpy as np
+from flask import current_app, has_app_context
+
+DEFAULT_PRICES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'ingredient_prices.json')
+
+# 'correct' repairs costs, 'flag' only reports mismatches, 'off' skips verification
+DEFAULT_MODE = 'correct'
+# A stated ingredient cost within this share of the table price (plus MIN_COST_DIFFERENCE) is kept
+DEFAULT_TOLERANCE = 0.5
+# A stated total within this share of the ingredient sum (plus MIN_COST_DIFFERENCE) is kept
+TOTAL_TOLERANCE = 0.05
+MIN_COST_DIFFERENCE = 5.0
+# Ingredient names (free text from the LLM) whose table entry is remembered per table
+LOOKUP_CACHE_SIZE = 4096
+
+# Amount words -> (unit, quantity of that unit); teaspoons and the like are fractions of a cup
+AMOUNT_UNITS = {
+    'g': ('kg', 0.001), 'gram': ('kg', 0.001), 'grams': ('kg', 0.001),
+    'kg': ('kg', 1.0), 'kilo': ('kg', 1.0), 'kilos': ('kg', 1.0), 'kilogram': ('kg', 1.0), 'kilograms': ('kg', 1.0),
+    'ml': ('l', 0.001), 'l': ('l', 1.0), 'litre': ('l', 1.0), 'litres': ('l', 1.0), 'liter': ('l', 1.0), 'liters': ('l', 1.0),
+    'cup': ('cup', 1.0), 'cups': ('cup', 1.0), 'mug': ('cup', 1.0), 'mugs': ('cup', 1.0),
+    'tablespoon': ('cup', 1 / 16), 'tablespoons': ('cup', 1 / 16), 'tbsp': ('cup', 1 / 16),
+    'teaspoon': ('cup', 1 / 48), 'teaspoons': ('cup', 1 / 48), 'tsp': ('cup', 1 / 48),
+    'pinch': ('cup', 1 / 768), 'pinches': ('cup', 1 / 768),
+    'piece': ('piece', 1.0), 'pieces': ('piece', 1.0), 'whole': ('piece', 1.0),
+    'head': ('head', 1.0), 'heads': ('head', 1.0), 'link': ('link', 1.0), 'links': ('link', 1.0),
+    'slice': ('slice', 1.0), 'slices': ('slice', 1.0), 'clove': ('clove', 1.0), 'cloves': ('clove', 1.0),
+    'leaf': ('leaf', 1.0), 'leaves': ('leaf', 1.0), 'bunch': ('bunch', 1.0), 'bunches': ('bunch', 1.0),
+    'inch': ('inch', 1.0), 'inches': ('inch', 1.0), 'bag': ('bag', 1.0), 'bags': ('bag', 1.0)
+}
+SIZE_WORDS = {'small': 0.7, 'medium': 1.0, 'large': 1.3}
+MASS_VOLUME_UNITS = ('kg', 'l')
+LITRES_PER_CUP = 0.25
+
+AMOUNT_RE = re.compile(r"^\s*(\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)\s*(.*)$")
+NUMBER_RE = re.compile(r"(\d+(?:\.\d+)?)")
+WORD_RE = re.compile(r"[a-z]+")
+
+# Process-wide price table, loaded once by init_price_table() during create_app
+_price_table = None
+_price_table_lock = threading.Lock()
+
+
+def _singular(word):
+    return word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+
+
+def _normalize_name(name):
+    return tuple(_singular(word) for word in WORD_RE.findall(str(name).lower()))
+
+
+def parse_number(value):
+    """A stated number as a float ('120 KES' -> 120.0, '450 kcal' -> 450.0), NaN when there is none"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        match = NUMBER_RE.search(value.replace(',', ''))
+        if match:
+            return float(match.group(1))
+    return float('nan')
+
+
+@lru_cache(maxsize=4096)
+def parse_amount(amount):
+    """
+    Parse an ingredient amount such as "2 cups", "1/2 medium" or "200g"
+
+    Args:
+        amount (str): Amount as written in the meal
+
+    Returns:
+        tuple: (quantity, unit) with unit one of the AMOUNT_UNITS units, or None
+            when the amount has no number ("to taste")
+    """
+    match = AMOUNT_RE.match(str(amount).lower())
+    if not match:
+        return None
+
+    number, rest = match.groups()
+    quantity = 0.0
+    for part in number.split():
+        if '/' in part:
+            numerator, denominator = part.split('/')
+            quantity += float(numerator) / float(denominator) if float(denominator) else 0.0
+        else:
+            quantity += float(part)
+
+    unit = 'piece'
+    for word in WORD_RE.findall(rest):
+        if word in SIZE_WORDS:
+            quantity *= SIZE_WORDS[word]
+        elif word in AMOUNT_UNITS:
+            unit, factor = AMOUNT_UNITS[word]
+            quantity *= factor
+            break
+    return quantity, unit
+
+
+class IngredientPriceTable:
+    """
+    Ingredient prices with units, indexed by normalized name and alias.
+
+    Names are matched on their longest known phrase, so "Beef cubes" is
+    priced as beef and "Coconut milk" as coconut milk rather than milk.
+    `verify` recomputes the cost of a whole batch of meals at once.
+    """
+
+    def __init__(self, ingredients):
+        self._entries = list(ingredients)
+        self._index = {}
+        for position, entry in enumerate(self._entries):
+            for name in [entry['name']] + entry.get('aliases', []):
+                self._index.setdefault(_normalize_name(name), position)
+        self._longest_name = max((len(key) for key in self._index), default=0)
+        # Bounded and thread-safe: names come from the LLM and lookups run on the generation threads
+        self._lookup = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._find)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PRICES_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)['ingredients'])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, name):
+        """Return the price entry for an ingredient name, or None if it isn't in the table"""
+        return self._lookup(str(name).lower())
+
+    def _find(self, name):
+        words = _normalize_name(name)
+        for size in range(min(len(words), self._longest_name), 0, -1):
+            for start in range(len(words) - size + 1):
+                position = self._index.get(words[start:start + size])
+                if position is not None:
+                    return self._entries[position]
+        return None
+
+    def quantity(self, entry, amount):
+        """Convert an amount into the entry's price unit, or None if it can't be converted"""
+        parsed = parse_amount(amount)
+        if parsed is None:
+            return None
+        quantity, unit = parsed
+        per = entry.get('per', {})
+
+        if unit == entry['unit']:
+            return quantity
+        if unit in MASS_VOLUME_UNITS and entry['unit'] in MASS_VOLUME_UNITS:
+            return quantity  # Close enough for kitchen amounts: 1 litre ~ 1 kg
+        if unit in per:
+            return quantity * per[unit]
+        if unit == 'cup' and entry['unit'] == 'l':
+            return quantity * LITRES_PER_CUP
+        if unit in ('piece', 'head') and entry['unit'] in ('piece', 'bunch'):
+            return quantity
+        return None
+
+    def verify(self, meals, correct=True, tolerance=DEFAULT_TOLERANCE):
+        """
+        Recompute meal costs from ingredient amounts and repair or flag mismatches
+
+        Every ingredient line of every meal is priced in one vectorized pass.
+        A stated ingredient cost far from its table price is replaced by the
+        table price; ingredients missing from the table keep their stated
+        cost. A meal's total_cost is then checked against the sum of its
+        ingredient costs.
+
+        Args:
+            meals (list): Meal dicts, repaired in place when `correct` is set
+            correct (bool): Repair costs rather than only reporting them
+            tolerance (float): Allowed relative difference from the table price
+
+        Returns:
+            list: (meal, stated total, recomputed total) for meals whose total was wrong
+        """
+        if not meals:
+            return []
+
+        lines = []
+        rows = []
+        for meal_index, meal in enumerate(meals):
+            for ingredient in meal.get('ingredients') or []:
+                if not isinstance(ingredient, dict):
+                    continue
+                entry = self.lookup(ingredient.get('name', ''))
+                quantity = self.quantity(entry, ingredient.get('amount', '')) if entry else None
+                lines.append(ingredient)
+                rows.append((meal_index,
+                             quantity if quantity is not None else np.nan,
+                             entry['price'] if entry else np.nan,
+                             parse_number(ingredient.get('cost'))))
+
+        table = np.array(rows, dtype=float).reshape(-1, 4)
+        meal_index = table[:, 0].astype(int)
+        computed = table[:, 1] * table[:, 2]
+        stated = table[:, 3]
+
+        priced = ~np.isnan(computed)
+        wrong_lines = priced & (np.isnan(stated) | (np.abs(stated - computed) > tolerance * computed + MIN_COST_DIFFERENCE))
+        line_costs = np.where(wrong_lines, computed, stated)
+        costed = ~np.isnan(line_costs)
+        totals = np.bincount(meal_index, weights=np.where(costed, line_costs, 0.0), minlength=len(meals))
+        costed_lines = np.bincount(meal_index, weights=costed, minlength=len(meals))
+
+        stated_totals = np.array([parse_number(meal.get('total_cost')) for meal in meals], dtype=float)
+        wrong_totals = (costed_lines > 0) & (np.isnan(stated_totals) |
+                                             (np.abs(stated_totals - totals) > TOTAL_TOLERANCE * totals + MIN_COST_DIFFERENCE))
+
+        mismatches = []
+        for position in np.flatnonzero(wrong_totals):
+            meal = meals[position]
+            mismatches.append((meal, stated_totals[position], round(float(totals[position]))))
+            repaired = int(np.count_nonzero(wrong_lines[meal_index == position]))
+            if correct:
+                print(f"Corrected cost of '{meal.get('name', 'unknown')}' from {meal.get('total_cost')} "
+                      f"to {round(float(totals[position]))} KES ({repaired} ingredient costs repaired)")
+            else:
+                print(f"Cost of '{meal.get('name', 'unknown')}' looks wrong: stated {meal.get('total_cost')}, "
+                      f"ingredients add up to {round(float(totals[position]))} KES")
+
+        if correct:
+            for position in np.flatnonzero(wrong_lines):
+                lines[position]['cost'] = round(float(computed[position]))
+            for position in range(len(meals)):
+                if wrong_totals[position]:
+                    meals[position]['total_cost'] = round(float(totals[position]))
+                elif not np.isnan(stated_totals[position]):
+                    meals[position]['total_cost'] = float(stated_totals[position])
+
+        return mismatches
+
+
+def verify_meal_costs(meals):
+    """
+    Check generated meals' costs against the ingredient price table (COST_VERIFICATION mode)
+
+    Args:
+        meals (list): Meal dicts, repaired in place in 'correct' mode
+
+    Returns:
+        list: (meal, stated total, recomputed total) for meals whose total was wrong
+    """
+    mode = current_app.config['COST_VERIFICATION'] if has_app_context() else DEFAULT_MODE
+    if mode == 'off':
+        return []
+    tolerance = current_app.config['COST_VERIFICATION_TOLERANCE'] if has_app_context() else DEFAULT_TOLERANCE
+    return get_price_table().verify(meals, correct=mode == 'correct', tolerance=tolerance)
+
+
+def init_price_table(app):
+    """Load the ingredient price table from INGREDIENT_PRICES_PATH and register it on the app"""
+    global _price_table
+
+    _price_table = IngredientPriceTable.load(app.config['INGREDIENT_PRICES_PATH'])
+    app.extensions['ingredient_prices'] = _price_table
+    return _price_table
+
+
+def get_price_table():
+    """Return the ingredient price table, loading the bundled one outside of create_app"""
+    global _price_table
+
+    if _price_table is None:
+        with _price_table_lock:
+            if _price_table is None:
+                _price_table = IngredientPriceTable.load()
+    return _price_table
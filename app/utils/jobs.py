@@ -0,0 +1,188 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_RESULT_TTL = 600
+DEFAULT_MAX_JOBS = 1000
+
+# Process-wide queue, built once by init_job_queue() during create_app
+_job_queue = None
+
+
+class Job:
+    """A single background generation job and its outcome"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    def __init__(self, owner_id=None):
+        self.id = uuid.uuid4().hex
+        self.owner_id = owner_id
+        self.state = Job.QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.state in (Job.SUCCEEDED, Job.FAILED)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'state': self.state,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class ThreadPoolBackend:
+    """Run jobs on an in-process thread pool (default backend)"""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='meal-jobs')
+
+    def submit(self, fn):
+        self._executor.submit(fn)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class InlineBackend:
+    """Run jobs synchronously in the submitting thread (useful for scripts and debugging)"""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def submit(self, fn):
+        fn()
+
+    def shutdown(self):
+        pass
+
+
+# Local backends selectable with the GENERATION_JOB_BACKEND setting
+JOB_BACKENDS = {
+    'thread': ThreadPoolBackend,
+    'inline': InlineBackend
+}
+
+
+class JobQueue:
+    """
+    Track background jobs and hand them to a pluggable execution backend.
+
+    Jobs run inside an application context so they can use the database.
+    Finished jobs are kept for result_ttl seconds so clients can poll for
+    the result, and the number of tracked jobs is bounded by max_jobs.
+    """
+
+    def __init__(self, app=None, backend=None, result_ttl=DEFAULT_RESULT_TTL, max_jobs=DEFAULT_MAX_JOBS):
+        self.app = app
+        self.backend = backend or ThreadPoolBackend()
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, owner_id=None, **kwargs):
+        """
+        Queue fn(*args, **kwargs) for background execution
+
+        Args:
+            fn (callable): Function to run
+            owner_id (int, optional): User allowed to read the job
+
+        Returns:
+            Job: The queued job
+        """
+        job = Job(owner_id=owner_id)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+
+        self.backend.submit(lambda: self._run(job, fn, args, kwargs))
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.state = Job.RUNNING
+        job.started_at = time.time()
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    job.result = fn(*args, **kwargs)
+            else:
+                job.result = fn(*args, **kwargs)
+            job.state = Job.SUCCEEDED
+        except Exception as e:
+            print(f"Background job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.state = Job.FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        """Drop expired finished jobs, then the oldest finished ones if still over the bound"""
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and now - job.finished_at > self.result_ttl]:
+            del self._jobs[job_id]
+
+        if len(self._jobs) >= self.max_jobs:
+            finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+            for job in finished[:len(self._jobs) - self.max_jobs + 1]:
+                del self._jobs[job.id]
+
+    def stats(self):
+        with self._lock:
+            states = {}
+            for job in self._jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            return {
+                'backend': type(self.backend).__name__,
+                'tracked_jobs': len(self._jobs),
+                'states': states
+            }
+
+
+def init_job_queue(app):
+    """Build the shared job queue from app config and register it on the app"""
+    global _job_queue
+
+    backend_name = app.config['GENERATION_JOB_BACKEND']
+    if backend_name not in JOB_BACKENDS:
+        raise ValueError(f"Unknown GENERATION_JOB_BACKEND '{backend_name}'. Choose from: {', '.join(JOB_BACKENDS)}")
+
+    if _job_queue is not None:
+        _job_queue.backend.shutdown()
+
+    _job_queue = JobQueue(
+        app=app,
+        backend=JOB_BACKENDS[backend_name](max_workers=app.config['GENERATION_JOB_WORKERS']),
+        result_ttl=app.config['GENERATION_JOB_RESULT_TTL']
+    )
+    app.extensions['generation_jobs'] = _job_queue
+    return _job_queue
+
+
+def get_job_queue():
+    """Return the shared job queue, creating a default one outside of create_app"""
+    global _job_queue
+
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
@@ -0,0 +1,112 @@
+import json
+from sqlalchemy import bindparam, text
+from app import db
+
+# JSON payload columns per table, with the value stored for rows that have no payload
+JSON_COLUMNS = {
+    'meals': {'ingredients': '[]', 'instructions': None, 'nutritional_info': None},
+    'meal_history': {'ingredients': None, 'instructions': None, 'nutritional_info': None}
+}
+
+
+def normalize_json_text(raw, empty=None):
+    """
+    Turn a legacy Text payload into valid JSON text
+
+    Args:
+        raw (str): Stored value
+        empty (str, optional): Value for empty payloads
+
+    Returns:
+        str: The value unchanged if it is valid JSON, `empty` if it is blank,
+        otherwise the text encoded as a JSON string so nothing is lost
+    """
+    if raw is None or not str(raw).strip():
+        return empty
+    try:
+        json.loads(raw)
+        return raw
+    except ValueError:
+        return json.dumps(str(raw))
+
+
+def backfill_json_columns(chunk_size=1000, echo=print):
+    """
+    Rewrite payloads that aren't valid JSON, one small transaction per chunk
+
+    Rows are walked in primary key order so the app can keep serving and
+    writing while this runs; new rows are always written as JSON. Run it
+    before converting the columns to the native JSON type, which rejects
+    invalid documents.
+
+    Args:
+        chunk_size (int): Rows read and updated per transaction
+        echo (callable): Progress output
+
+    Returns:
+        dict: Number of rewritten rows per table
+    """
+    summary = {}
+    for table, columns in JSON_COLUMNS.items():
+        names = list(columns)
+        select = text(f"SELECT id, {', '.join(names)} FROM {table} WHERE id > :last_id ORDER BY id LIMIT :limit")
+        update = text(f"UPDATE {table} SET {', '.join(f'{name} = :{name}' for name in names)} WHERE id = :id")
+
+        last_id, fixed = 0, 0
+        while True:
+            rows = db.session.execute(select, {'last_id': last_id, 'limit': chunk_size}).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            changes = []
+            for row in rows:
+                values = {name: normalize_json_text(row[position + 1], columns[name]) for position, name in enumerate(names)}
+                if any(values[name] != row[position + 1] for position, name in enumerate(names)):
+                    changes.append(dict(values, id=row[0]))
+            if changes:
+                db.session.execute(update, changes)
+            db.session.commit()
+
+            fixed += len(changes)
+            echo(f"{table}: checked up to id {last_id}, rewrote {fixed} rows")
+
+        summary[table] = fixed
+    return summary
+
+
+def convert_json_columns(echo=print):
+    """
+    Change the payload columns to the native JSON type where the database has one
+
+    MySQL rebuilds the table for this, so run it off-peak after
+    backfill_json_columns(). Tables whose columns are already JSON are
+    skipped. SQLite keeps JSON as text and needs no change.
+
+    Returns:
+        bool: True if any table was altered
+    """
+    dialect = db.engine.dialect.name
+    if dialect != 'mysql':
+        echo(f"{dialect} stores JSON as text, no column conversion needed")
+        return False
+
+    types = dict(((table, name), data_type.lower()) for table, name, data_type in db.session.execute(text(
+        "SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :tables"
+    ).bindparams(bindparam('tables', expanding=True)), {'tables': list(JSON_COLUMNS)}))
+
+    converted = False
+    for table, columns in JSON_COLUMNS.items():
+        if all(types.get((table, name)) == 'json' for name in columns):
+            echo(f"{table} payload columns are already JSON")
+            continue
+        changes = []
+        for name in columns:
+            nullable = 'NOT NULL' if (table, name) == ('meals', 'ingredients') else 'NULL'
+            changes.append(f"MODIFY {name} JSON {nullable}")
+        db.session.execute(text(f"ALTER TABLE {table} {', '.join(changes)}"))
+        db.session.commit()
+        echo(f"Converted {table} payload columns to JSON")
+        converted = True
+    return converted
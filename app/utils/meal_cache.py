@@ -0,0 +1,183 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from app.utils.preferences import parse_preferences
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL = 3600
+DEFAULT_BUDGET_BUCKET = 10
+
+# Process-wide cache, built once by init_meal_cache() during create_app
+_cache = None
+
+
+def quantize_budget(budget, bucket_size):
+    """Round a budget to the nearest bucket so nearby budgets share a cache entry"""
+    budget = float(budget)
+    if not bucket_size or bucket_size <= 0:
+        return budget
+    return float(round(budget / bucket_size) * bucket_size)
+
+
+class MealPlanCache:
+    """
+    Thread-safe LRU cache for generated meal plans with a TTL and size bound.
+
+    Keys are (meal_type, budget bucket, canonical preferences) so that
+    requests such as "Breakfast, 100 KES, no preferences" share one entry,
+    and so do differently worded but equivalent preferences.
+
+    When cache_dir is set, entries are also written there as JSON files.
+    Other worker processes (and the prewarm command) read them on a memory
+    miss, so plans generated anywhere on the host are served everywhere.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL,
+                 budget_bucket=DEFAULT_BUDGET_BUCKET, enabled=True, cache_dir=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.budget_bucket = budget_bucket
+        self.enabled = enabled
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, meal_type, budget, preferences=None):
+        return (
+            str(meal_type).strip().lower(),
+            quantize_budget(budget, self.budget_bucket),
+            parse_preferences(preferences).canonical
+        )
+
+    def get(self, key):
+        """Return a copy of the cached meal plans for key, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                meal_plans = entry[1]
+
+        if entry is None:
+            meal_plans, ttl = self._read_disk(key)
+            with self._lock:
+                if meal_plans is None:
+                    self.misses += 1
+                    return None
+                self.hits += 1
+                self._store(key, meal_plans, ttl)
+
+        # Callers post-process meals in place, so never hand out the stored object
+        return copy.deepcopy(meal_plans)
+
+    def set(self, key, meal_plans, ttl=None):
+        if not self.enabled:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._store(key, copy.deepcopy(meal_plans), ttl)
+        self._write_disk(key, meal_plans, ttl)
+
+    def _store(self, key, meal_plans, ttl):
+        self._entries[key] = (time.monotonic() + ttl, meal_plans)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _read_disk(self, key):
+        """Return (meal_plans, remaining ttl) from the shared directory, or (None, None)"""
+        if not self.cache_dir:
+            return None, None
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            # Wall-clock expiry, since monotonic clocks aren't comparable between processes
+            remaining = entry['expires_at'] - time.time()
+            if remaining <= 0:
+                return None, None
+            return entry['meal_plans'], remaining
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, None
+
+    def _write_disk(self, key, meal_plans, ttl):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'expires_at': time.time() + ttl, 'meal_plans': meal_plans}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Could not write meal plan cache entry: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'budget_bucket': self.budget_bucket,
+                'shared_dir': self.cache_dir,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+def init_meal_cache(app):
+    """Build the shared meal plan cache from app config and register it on the app"""
+    global _cache
+
+    _cache = MealPlanCache(
+        max_entries=app.config['MEAL_CACHE_MAX_ENTRIES'],
+        ttl=app.config['MEAL_CACHE_TTL'],
+        budget_bucket=app.config['MEAL_CACHE_BUDGET_BUCKET'],
+        enabled=app.config['MEAL_CACHE_ENABLED'],
+        cache_dir=app.config['MEAL_CACHE_DIR']
+    )
+    app.extensions['meal_plan_cache'] = _cache
+    return _cache
+
+
+def get_meal_cache():
+    """Return the shared meal plan cache, creating a default one outside of create_app"""
+    global _cache
+
+    if _cache is None:
+        _cache = MealPlanCache()
+    return _cache
@@ -0,0 +1,162 @@
+import bisect
+import copy
+import json
+import os
+import threading
+from app.utils.preferences import CATEGORY_KEYWORDS, DIETS, meal_tokens, parse_preferences
+from app.utils.nutrition import get_nutrient_matrix
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'mock_meals.json')
+
+# Excluded items and allergens (singular, as parsed) that map to a catalog 'contains' tag
+EXCLUSION_TAGS = {
+    'beef': 'beef', 'chicken': 'chicken', 'pork': 'pork', 'bacon': 'pork', 'ham': 'pork',
+    'meat': 'meat', 'sausage': 'meat',
+    'fish': 'fish', 'tilapia': 'fish', 'seafood': 'fish',
+    'egg': 'egg',
+    'dairy': 'dairy', 'milk': 'dairy', 'lactose': 'dairy', 'cheese': 'dairy', 'yogurt': 'dairy', 'butter': 'dairy',
+    'honey': 'honey',
+    'nut': 'nuts', 'peanut': 'nuts', 'groundnut': 'nuts',
+    'gluten': 'gluten', 'wheat': 'gluten', 'bread': 'gluten'
+}
+
+# Process-wide catalog, loaded once by init_meal_catalog() during create_app
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+class MealCatalog:
+    """
+    Indexed catalog of ready-made meals used when the provider can't be used.
+
+    Meals are indexed by meal type (sorted by cost), by diet tag and by the
+    ingredient categories they contain, so a fallback lookup only touches
+    the meals of one type and set operations rule out diets and exclusions.
+    """
+
+    def __init__(self, entries):
+        self._entries = {}
+        self._by_type = {}
+        self._by_diet = {}
+        self._by_contains = {}
+        self._tokens = {}
+
+        for entry in entries:
+            meal_id = entry['id']
+            meal_type = entry['meal_type'].lower()
+            self._entries[meal_id] = entry
+            self._by_type.setdefault(meal_type, []).append((float(entry['meal']['total_cost']), meal_id))
+            for tag in entry.get('diet_tags', []):
+                self._by_diet.setdefault(tag, set()).add(meal_id)
+            for tag in entry.get('contains', []):
+                self._by_contains.setdefault(tag, set()).add(meal_id)
+            # Ingredient and name words, for exclusions and includes without a tag
+            self._tokens[meal_id] = meal_tokens(entry['meal'])
+
+        for meals in self._by_type.values():
+            meals.sort()
+
+    @classmethod
+    def load(cls, path=DEFAULT_CATALOG_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)['meals']
+        # Fallback meals get the same computed nutrition as generated ones
+        get_nutrient_matrix().verify([entry['meal'] for entry in entries])
+        return cls(entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def find(self, meal_type, budget, preferences=None, count=3):
+        """
+        Pick the meals closest to the budget that satisfy the preferences
+
+        Diet words (vegan, vegetarian) and exclusions ("no beef", "allergic
+        to nuts") are hard filters and are never relaxed, since this is the
+        fallback for when the provider is down; if too few meals qualify,
+        fewer than `count` are returned. Requested items ("tea", "chapati")
+        only rank matching meals first.
+
+        Args:
+            meal_type (str): Breakfast, Lunch, or Supper
+            budget (float): Budget in KES
+            preferences (str or PreferenceConstraints, optional): User's meal preferences
+            count (int): Number of meals to return
+
+        Returns:
+            list: Copies of the chosen meal dicts
+        """
+        budget = float(budget)
+        candidates = self._by_type.get(str(meal_type).lower(), [])
+        constraints = parse_preferences(preferences)
+
+        excluded = constraints.excluded_items + constraints.allergens
+        excluded_tags = {EXCLUSION_TAGS[word] for word in excluded if word in EXCLUSION_TAGS}
+        excluded_words = set()
+        for word in excluded:
+            if word not in EXCLUSION_TAGS:
+                excluded_words.add(word)
+                excluded_words.update(CATEGORY_KEYWORDS.get(word, ()))
+        included = constraints.include_words
+
+        allowed = {meal_id for _, meal_id in candidates}
+        if constraints.diet in DIETS:
+            allowed &= self._by_diet.get(constraints.diet, set())
+        for tag in excluded_tags:
+            allowed -= self._by_contains.get(tag, set())
+        allowed = {meal_id for meal_id in allowed if not self._tokens[meal_id] & excluded_words}
+
+        chosen = []
+        for meal_id in self._closest(candidates, budget, allowed, included):
+            if len(chosen) >= count:
+                break
+            if not self._same_name(meal_id, chosen):
+                chosen.append(meal_id)
+        if len(chosen) < count:
+            print(f"Only {len(chosen)} catalog meals match '{constraints.canonical}'")
+
+        return [copy.deepcopy(self._entries[meal_id]['meal']) for meal_id in chosen]
+
+    def _closest(self, candidates, budget, pool, included):
+        """Order meal ids from pool: requested items first, then nearest cost to the budget"""
+        # Walk outwards from the budget's position in the cost-sorted list
+        position = bisect.bisect_left(candidates, (budget, ''))
+        below, above = position - 1, position
+        ordered = []
+        while below >= 0 or above < len(candidates):
+            if above >= len(candidates) or (below >= 0 and budget - candidates[below][0] <= candidates[above][0] - budget):
+                cost, meal_id = candidates[below]
+                below -= 1
+            else:
+                cost, meal_id = candidates[above]
+                above += 1
+            if meal_id in pool:
+                ordered.append(meal_id)
+
+        if included:
+            ordered.sort(key=lambda meal_id: not self._tokens[meal_id] & included)
+        return ordered
+
+    def _same_name(self, meal_id, chosen):
+        name = self._entries[meal_id]['meal']['name']
+        return any(self._entries[other]['meal']['name'] == name for other in chosen)
+
+
+def init_meal_catalog(app):
+    """Load the fallback meal catalog from MEAL_CATALOG_PATH and register it on the app"""
+    global _catalog
+
+    _catalog = MealCatalog.load(app.config['MEAL_CATALOG_PATH'])
+    app.extensions['meal_catalog'] = _catalog
+    return _catalog
+
+
+def get_meal_catalog():
+    """Return the fallback meal catalog, loading the bundled one outside of create_app"""
+    global _catalog
+
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = MealCatalog.load()
+    return _catalog
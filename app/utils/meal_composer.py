@@ -0,0 +1,285 @@
+import json
+import os
+import threading
+from functools import reduce
+import numpy as np
+from flask import current_app, has_app_context
+from app.utils.ingredient_prices import get_price_table
+from app.utils.nutrition import NUTRIENTS, get_nutrient_matrix
+from app.utils.preferences import meal_tokens, parse_preferences
+
+DEFAULT_TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'meal_templates.json')
+
+# 'simple' composes requests whose preferences are fully understood, 'always' every request, 'off' none
+DEFAULT_MODE = 'simple'
+
+# Per meal type: (min kcal, max kcal, target kcal, min protein g)
+NUTRITION_TARGETS = {
+    'breakfast': (350, 750, 500, 10),
+    'lunch': (550, 1100, 750, 20),
+    'supper': (550, 1100, 750, 20)
+}
+# Composed meals aim for this share of the budget, within the 50%-100% the prompt asks of the provider
+TARGET_BUDGET_SHARE = 0.85
+
+# Units written as whole grams/millilitres rather than quarter fractions
+METRIC_UNITS = ('g', 'ml')
+FRACTIONS = {0.25: '1/4', 0.5: '1/2', 0.75: '3/4'}
+PLURAL_UNITS = {'cup': 'cups', 'teaspoon': 'teaspoons', 'tablespoon': 'tablespoons', 'slice': 'slices',
+                'piece': 'pieces', 'bunch': 'bunches', 'head': 'heads', 'inch': 'inches', 'pinch': 'pinches'}
+
+# Process-wide composer, built once by init_meal_composer() during create_app
+_composer = None
+_composer_lock = threading.Lock()
+
+
+def round_quantity(quantity, unit):
+    """Round to what a recipe would write: tens of grams, quarters of anything else"""
+    if unit in METRIC_UNITS:
+        return max(round(quantity / 10.0) * 10, 10)
+    return max(round(quantity * 4) / 4, 0.25)
+
+
+def format_amount(quantity, unit):
+    """Write a rounded quantity as an amount: "1 1/2 cups", "150g", "2 medium" """
+    quantity = round_quantity(quantity, unit)
+    if unit in METRIC_UNITS:
+        return f"{int(quantity)}{unit}"
+    whole, fraction = int(quantity), quantity - int(quantity)
+    number = ' '.join(part for part in (str(whole) if whole else '', FRACTIONS.get(fraction, '')) if part)
+    return f"{number} {PLURAL_UNITS.get(unit, unit) if quantity > 1 else unit}"
+
+
+class _Choice:
+    """One option of a template group at one portion size, priced and with its nutrients"""
+
+    def __init__(self, label, items, steps, price_table, nutrient_matrix):
+        self.label = label
+        self.steps = steps
+        self.lines = []
+        self.cost = 0.0
+        self.nutrients = np.zeros(len(NUTRIENTS))
+
+        for ingredient, quantity, unit in items:
+            quantity = round_quantity(quantity, unit)
+            entry = price_table.lookup(ingredient)
+            units = price_table.quantity(entry, format_amount(quantity, unit)) if entry else None
+            if units is None:
+                raise ValueError(f"Template amount '{quantity} {unit}' of '{ingredient}' can't be priced")
+            self.lines.append((ingredient, quantity, unit))
+            self.cost += units * entry['price']
+            self.nutrients += units * nutrient_matrix.per_unit(entry['name'])
+
+        self.tokens = meal_tokens({'name': label, 'ingredients': [{'name': item[0]} for item in items]})
+
+
+class _Template:
+    """A meal template with every group option expanded into priced choices"""
+
+    def __init__(self, data, price_table, nutrient_matrix):
+        self.id = data['id']
+        self.meal_types = {meal_type.lower() for meal_type in data['meal_types']}
+        self.name = data['name']
+        self.vary = data['vary']
+        self.finish = data.get('finish', [])
+        self.groups = []
+        for group in data['groups']:
+            choices = [_Choice(option['label'], [(item[0], item[1] * portion, item[2]) for item in option['items']],
+                               option['steps'], price_table, nutrient_matrix)
+                       for option in group['options'] for portion in option.get('portions', [1])]
+            self.groups.append((group['role'], group.get('optional', False), choices))
+        self.fixed = _Choice('', data.get('fixed', []), [], price_table, nutrient_matrix)
+
+
+class MealComposer:
+    """
+    Builds meals locally from templates, the ingredient price table and the nutrient matrix.
+
+    A template has groups (a stew, a starch, greens...), each with options
+    at a few portion sizes. Composing picks one option per group so that
+    the meal costs 50%-100% of the budget, gets close to the calorie and
+    protein targets of the meal type and respects the preferences. This is
+    a small multiple-choice knapsack: a template has at most a few thousand
+    combinations, so it is solved exactly by scoring all of them at once.
+    """
+
+    def __init__(self, templates, price_table, nutrient_matrix):
+        self._price_table = price_table
+        self._templates = [_Template(template, price_table, nutrient_matrix) for template in templates]
+
+    @classmethod
+    def load(cls, templates_path=DEFAULT_TEMPLATES_PATH, price_table=None, nutrient_matrix=None):
+        with open(templates_path, 'r', encoding='utf-8') as f:
+            templates = json.load(f)['templates']
+        return cls(templates, price_table or get_price_table(), nutrient_matrix or get_nutrient_matrix())
+
+    def compose(self, meal_type, budget, preferences=None, count=3):
+        """
+        Compose meals for a request
+
+        Args:
+            meal_type (str): Breakfast, Lunch, or Supper
+            budget (float): Budget in KES
+            preferences (str or PreferenceConstraints, optional): User's meal preferences
+            count (int): Number of meals to return
+
+        Returns:
+            list: `count` meal plan dicts, or None if the templates can't cover the request
+        """
+        budget = float(budget)
+        targets = NUTRITION_TARGETS.get(str(meal_type).lower())
+        if targets is None or budget <= 0:
+            return None
+        constraints = parse_preferences(preferences)
+
+        candidates = []
+        for template in self._templates:
+            if str(meal_type).lower() in template.meal_types:
+                candidates.extend(self._best_combinations(template, budget, constraints, targets, count))
+
+        # Best first, with a different main option (the template's 'vary' group) for every meal
+        meals = []
+        seen = set()
+        for score, template, picks in sorted(candidates, key=lambda candidate: -candidate[0]):
+            main = next(choice.label for (role, _, _), choice in zip(template.groups, picks) if role == template.vary)
+            if (template.id, main) in seen:
+                continue
+            meal = self._build_meal(template, picks, meal_type, budget)
+            if meal and meal['name'] not in {other['name'] for other in meals}:
+                seen.add((template.id, main))
+                meals.append(meal)
+                if len(meals) >= count:
+                    return meals
+        return None
+
+    def _best_combinations(self, template, budget, constraints, targets, count):
+        """Score every combination of one choice per group and return the best few for each main option"""
+        forbidden = constraints.forbidden.keys()
+        allowed = []
+        for role, optional, choices in template.groups:
+            usable = [choice for choice in choices if not choice.tokens & forbidden]
+            if optional:
+                usable.append(None)
+            if not usable:
+                return []
+            allowed.append(usable)
+
+        def combine(value):
+            """Value of every combination, in np.unravel_index order"""
+            return reduce(np.add.outer, [np.array([value(choice) if choice else 0.0 for choice in usable])
+                                         for usable in allowed]).ravel()
+
+        cost = combine(lambda choice: choice.cost) + template.fixed.cost
+        kcal = combine(lambda choice: choice.nutrients[0]) + template.fixed.nutrients[0]
+        protein = combine(lambda choice: choice.nutrients[1]) + template.fixed.nutrients[1]
+        hits = combine(lambda choice: float(bool(choice.tokens & constraints.include_words)))
+
+        kcal_min, kcal_max, kcal_target, protein_min = targets
+        nutritious = (kcal >= kcal_min) & (kcal <= kcal_max) & (protein >= protein_min)
+        score = (1 - np.abs(cost - TARGET_BUDGET_SHARE * budget) / (0.5 * budget)) \
+            + (1 - np.abs(kcal - kcal_target) / kcal_target) \
+            + np.minimum(protein / protein_min, 2) / 2 \
+            - 2 * ~nutritious
+
+        feasible = (cost >= 0.5 * budget) & (cost <= budget)
+        if constraints.include_words:
+            feasible &= hits > 0
+        indexes = np.flatnonzero(feasible)
+        if not len(indexes):
+            return []
+
+        # Rank within each main option so every stew (say) gets a shot, not just the best scoring one
+        shape = tuple(len(usable) for usable in allowed)
+        vary = next(position for position, (role, _, _) in enumerate(template.groups) if role == template.vary)
+        labels = [choice.label if choice else '' for choice in allowed[vary]]
+        mains = np.array([labels.index(label) for label in labels])[np.unravel_index(indexes, shape)[vary]]
+        ranked = indexes[np.lexsort((-score[indexes], mains))]
+        ranked_mains = np.sort(mains)
+        rank = np.arange(len(ranked)) - np.searchsorted(ranked_mains, ranked_mains)
+        best = ranked[rank < count]
+        return [(float(score[index]), template,
+                 [allowed[group][position] for group, position in enumerate(np.unravel_index(index, shape))])
+                for index in best]
+
+    def _build_meal(self, template, picks, meal_type, budget):
+        """Turn one choice per group into a meal plan dict, or None if it falls outside the budget range"""
+        chosen = [choice for choice in picks if choice]
+        name = template.name.format(**{role: choice.label for (role, _, _), choice in zip(template.groups, picks)
+                                       if choice})
+        for (role, optional, _), choice in zip(template.groups, picks):
+            if optional and choice:
+                name += f" and {choice.label}"
+
+        # Ingredients shared by several choices (onions, oil) are listed once
+        quantities = {}
+        for choice in chosen + [template.fixed]:
+            for ingredient, quantity, unit in choice.lines:
+                quantities[(ingredient, unit)] = quantities.get((ingredient, unit), 0) + quantity
+
+        ingredients = []
+        for (ingredient, unit), quantity in quantities.items():
+            amount = format_amount(quantity, unit)
+            entry = self._price_table.lookup(ingredient)
+            cost = self._price_table.quantity(entry, amount) * entry['price']
+            ingredients.append({'name': ingredient.capitalize(), 'amount': amount, 'cost': round(cost)})
+
+        total_cost = sum(ingredient['cost'] for ingredient in ingredients)
+        if not 0.5 * budget <= total_cost <= 1.1 * budget:
+            return None
+
+        kcal, protein, carbs, fat = sum((choice.nutrients for choice in chosen), template.fixed.nutrients)
+        energy = max(protein * 4 + carbs * 4 + fat * 9, 1)
+
+        return {
+            'name': name,
+            'description': (f"{name}: a home-style Kenyan {str(meal_type).lower()} with about {round(kcal)} kcal "
+                            f"and {round(protein)} g of protein, put together from everyday ingredients to fit "
+                            f"a budget of {budget:g} KES."),
+            'ingredients': ingredients,
+            'instructions': [step for choice in chosen for step in choice.steps] + template.finish,
+            'total_cost': total_cost,
+            'nutritional_info': {
+                'calories': f"{round(kcal)} kcal",
+                'protein': round(protein * 4 * 100 / energy),
+                'carbs': round(carbs * 4 * 100 / energy),
+                'fat': round(fat * 9 * 100 / energy)
+            }
+        }
+
+
+def compose_meal_plans(meal_type, budget, preferences=None):
+    """
+    Compose meal plans locally when MEAL_COMPOSER_MODE allows it for this request
+
+    In 'simple' mode only requests whose preferences parse completely (no
+    free-text notes left over) are composed; anything else needs the LLM.
+
+    Returns:
+        list: 3 meal plan dicts, or None to fall through to the other strategies
+    """
+    mode = current_app.config['MEAL_COMPOSER_MODE'] if has_app_context() else DEFAULT_MODE
+    if mode == 'off':
+        return None
+    if mode == 'simple' and parse_preferences(preferences).notes:
+        return None
+    return get_meal_composer().compose(meal_type, budget, preferences)
+
+
+def init_meal_composer(app):
+    """Build the meal composer from MEAL_TEMPLATES_PATH and register it on the app"""
+    global _composer
+
+    _composer = MealComposer.load(app.config['MEAL_TEMPLATES_PATH'])
+    app.extensions['meal_composer'] = _composer
+    return _composer
+
+
+def get_meal_composer():
+    """Return the meal composer, building it from the bundled data outside of create_app"""
+    global _composer
+
+    if _composer is None:
+        with _composer_lock:
+            if _composer is None:
+                _composer = MealComposer.load()
+    return _composer
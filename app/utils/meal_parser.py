@@ -0,0 +1,234 @@
+import json
+import re
+
+NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?')
+# Numbers written with a currency marker, e.g. 50 KES, Ksh 50, 50/=
+CURRENCY_RE = re.compile(r'(?:kes|kshs?\.?)?\s*(-?\d+(?:\.\d+)?)\s*(?:kes|kshs?|/=|/-)?', re.IGNORECASE)
+
+# Fields a meal salvaged from a truncated response must have to be usable
+REQUIRED_MEAL_FIELDS = ('name', 'ingredients', 'instructions', 'total_cost')
+
+
+class IncrementalMealParser:
+    """
+    Single-pass, tolerant parser for the meal plan JSON returned by the LLM.
+
+    Text is fed in chunks as it arrives and each object of the meals array -
+    {"meals": [...]} or a bare [...] - is returned as a dict as soon as its
+    closing brace is seen. While scanning, the parser rewrites the defects
+    the model commonly produces into valid JSON:
+
+    - prose and code fences around the JSON are skipped
+    - single-quoted strings and unquoted keys are quoted
+    - currency suffixes on numbers ("cost": 50 KES) are dropped
+    - unquoted text values ("amount": 1 slice, "amount": 2) are quoted
+    - trailing and missing commas, and unclosed brackets, are fixed up
+
+    Every character is visited once, so parse time is linear in the size of
+    the response.
+    """
+
+    def __init__(self):
+        self._stack = []
+        self._quote = None
+        self._escaped = False
+        self._string = []
+        self._bare = None
+        self._last = None
+        self._last_key = None
+        self._meal_depth = None
+        self._out = None
+
+    def feed(self, chunk):
+        """
+        Consume a chunk of response text
+
+        Args:
+            chunk (str): Next piece of the response
+
+        Returns:
+            list: Every meal dict completed by this chunk
+        """
+        completed = []
+
+        for char in chunk:
+            if self._quote:
+                self._read_string_char(char)
+                continue
+
+            if self._bare is not None:
+                if char not in ',:}]\n':
+                    self._bare.append(char)
+                    continue
+                self._end_bare()
+
+            # Ignore anything outside the JSON document (prose, code fences)
+            if not self._stack and char not in '{[':
+                continue
+
+            if char in '"\'':
+                self._quote = char
+                self._string = []
+            elif char in '{[':
+                self._open(char)
+            elif char in '}]':
+                meal = self._close(char)
+                if meal is not None:
+                    completed.append(meal)
+            elif char == ',':
+                if self._last not in ('open', 'comma', None):
+                    self._emit(',', 'comma')
+            elif char == ':':
+                self._emit(':', 'colon')
+            elif not char.isspace():
+                self._bare = [char]
+
+        return completed
+
+    def finish(self):
+        """
+        Flush the parser at the end of the response
+
+        A meal cut off by a truncated response is closed and returned if it
+        already has a value for all of its required fields; one whose cut-off
+        total_cost was dropped is not.
+
+        Returns:
+            list: The salvaged meal dict, if any
+        """
+        if self._quote:
+            self._end_string()
+        # A bare value cut off mid-way (e.g. a number) can't be trusted, so drop it
+        self._bare = None
+
+        salvaged = []
+        while self._meal_depth is not None and self._stack:
+            meal = self._close('}' if self._stack[-1] == '{' else ']')
+            if meal is not None and all(meal.get(field) is not None for field in REQUIRED_MEAL_FIELDS):
+                salvaged.append(meal)
+
+        return salvaged
+
+    def _read_string_char(self, char):
+        if self._escaped:
+            self._escaped = False
+            if char == "'":
+                # \' is not a valid JSON escape
+                self._string[-1] = "'"
+                return
+            self._string.append(char)
+        elif char == '\\':
+            self._escaped = True
+            self._string.append(char)
+        elif char == self._quote:
+            self._end_string()
+        elif char == '"':
+            self._string.append('\\"')
+        elif char == '\n':
+            self._string.append('\\n')
+        else:
+            self._string.append(char)
+
+    def _end_string(self):
+        text = ''.join(self._string)
+        self._quote = None
+        self._escaped = False
+        self._string = []
+        self._value('"' + text + '"', text)
+
+    def _end_bare(self):
+        token = ''.join(self._bare).strip()
+        self._bare = None
+        if not token:
+            return
+
+        if self._at_key():
+            self._value(json.dumps(token), token)
+        elif self._last_key == 'amount':
+            self._value(json.dumps(token), token)
+        elif token in ('true', 'false', 'null') or NUMBER_RE.fullmatch(token):
+            self._value(token, token)
+        else:
+            currency = CURRENCY_RE.fullmatch(token)
+            self._value(currency.group(1) if currency else json.dumps(token), token)
+
+    def _value(self, text, raw):
+        """Emit a key or value, inserting a comma the model left out"""
+        is_key = self._at_key()
+        if self._last in ('value', 'close'):
+            self._emit(',', 'comma')
+        if is_key:
+            self._last_key = raw
+        self._emit(text, 'key' if is_key else 'value')
+
+    def _at_key(self):
+        return bool(self._stack) and self._stack[-1] == '{' and self._last != 'colon'
+
+    def _open(self, char):
+        if self._last in ('value', 'close'):
+            self._emit(',', 'comma')
+
+        if char == '{' and self._meal_depth is None and self._stack in (['['], ['{', '[']):
+            self._meal_depth = len(self._stack) + 1
+            self._out = []
+
+        self._stack.append(char)
+        self._emit(char, 'open')
+
+    def _close(self, char):
+        opener = '{' if char == '}' else '['
+        if opener not in self._stack:
+            return None
+
+        meal = None
+        while self._stack:
+            top = self._stack[-1]
+            if self._last == 'comma' and self._out:
+                self._out.pop()
+            if self._last == 'key':
+                self._emit(':', 'colon')
+            if self._last == 'colon':
+                self._emit('null', 'value')
+
+            closing_meal = self._meal_depth == len(self._stack)
+            self._emit('}' if top == '{' else ']', 'close')
+            self._stack.pop()
+
+            if closing_meal:
+                meal = self._decode_meal(''.join(self._out))
+                self._meal_depth = None
+                self._out = None
+
+            if top == opener:
+                break
+
+        return meal
+
+    def _decode_meal(self, text):
+        try:
+            meal = json.loads(text)
+        except (ValueError, RecursionError) as e:
+            print(f"Could not parse meal object: {str(e)}")
+            return None
+        return meal if isinstance(meal, dict) else None
+
+    def _emit(self, text, kind):
+        if self._out is not None:
+            self._out.append(text)
+        self._last = kind
+
+
+def parse_meals(content):
+    """
+    Parse a complete LLM response into a list of meal dicts
+
+    Args:
+        content (str): Full response text
+
+    Returns:
+        list: Meal dicts found in the response (may be empty)
+    """
+    parser = IncrementalMealParser()
+    meals = parser.feed(content)
+    meals.extend(parser.finish())
+    return meals
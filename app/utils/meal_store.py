@@ -0,0 +1,122 @@
+import json
+from flask import current_app, has_app_context
+from sqlalchemy import func, or_
+from app import db
+from app.models.meal import Meal
+from app.utils.preferences import diet_tags, parse_preferences
+from app.utils.nutrition import verify_meal_nutrition
+
+
+def retrieval_enabled():
+    return has_app_context() and current_app.config['MEAL_RETRIEVAL_ENABLED']
+
+
+def find_stored_meals(meal_type, budget, preferences=None, count=3):
+    """
+    Serve meal plans from the meals table when enough stored meals fit the request
+
+    Candidates come from the (meal_type, estimated_cost) index within the
+    same 50%-110% budget range generated meals must meet, closest to the
+    budget and most popular first. Each candidate is then checked against
+    the parsed preferences like a generated meal.
+
+    Args:
+        meal_type (str): Breakfast, Lunch, or Supper
+        budget (float): Budget in KES
+        preferences (str, optional): User's meal preferences
+        count (int): Number of meals needed
+
+    Returns:
+        list: `count` meal plan dicts, or None if the table can't serve the request
+    """
+    if not retrieval_enabled():
+        return None
+
+    budget = float(budget)
+    constraints = parse_preferences(preferences)
+
+    query = Meal.query.filter(Meal.meal_type == meal_type,
+                              Meal.estimated_cost.between(budget * 0.5, budget * 1.1))
+    if constraints.diet:
+        # Meals added before diet tags existed are checked against the preferences below
+        query = query.filter(or_(Meal.diet_tags.contains(constraints.diet), Meal.diet_tags.is_(None)))
+    query = query.order_by(func.abs(Meal.estimated_cost - budget), Meal.popularity.desc()) \
+        .limit(current_app.config['MEAL_RETRIEVAL_CANDIDATES'])
+
+    try:
+        candidates = query.all()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Meal retrieval failed: {str(e)}")
+        return None
+
+    meal_plans = []
+    names = set()
+    for meal in candidates:
+        meal_plan = meal.to_meal_plan()
+        name = meal.name.strip().lower()
+        if name in names or constraints.violations(meal_plan):
+            continue
+        names.add(name)
+        meal_plans.append(meal_plan)
+        if len(meal_plans) >= count:
+            # Meals added by admins never went through generation's nutrition check
+            verify_meal_nutrition(meal_plans)
+            return meal_plans
+
+    return None
+
+
+def store_generated_meals(meal_type, meal_plans):
+    """
+    Add validated generated meals to the meals table so later requests can be served from it
+
+    Meals whose name is already stored for the meal type (ignoring case), or whose cost
+    isn't a plain number, are skipped.
+
+    Args:
+        meal_type (str): Breakfast, Lunch, or Supper
+        meal_plans (list): Meal plan dicts that passed validation
+
+    Returns:
+        int: Number of meals added
+    """
+    if not retrieval_enabled() or not current_app.config['MEAL_WRITE_BACK_ENABLED'] or not meal_plans:
+        return 0
+
+    try:
+        names = [meal['name'].strip().lower() for meal in meal_plans]
+        existing = {name.lower() for (name,) in db.session.query(Meal.name)
+                    .filter(Meal.meal_type == meal_type, func.lower(Meal.name).in_(names))}
+
+        added = 0
+        for meal_plan in meal_plans:
+            name = meal_plan['name'].strip()
+            try:
+                cost = float(meal_plan['total_cost'])
+            except (KeyError, ValueError, TypeError):
+                continue
+            if name.lower() in existing:
+                continue
+            existing.add(name.lower())
+            db.session.add(Meal(
+                name=name[:100],
+                description=meal_plan.get('description'),
+                ingredients=json.dumps(meal_plan.get('ingredients') or []),
+                instructions=json.dumps(meal_plan.get('instructions') or []),
+                meal_type=meal_type,
+                estimated_cost=cost,
+                nutritional_info=json.dumps(meal_plan.get('nutritional_info') or {}),
+                diet_tags=','.join(diet_tags(meal_plan)),
+                source='generated'
+            ))
+            added += 1
+
+        db.session.commit()
+        if added:
+            print(f"Stored {added} generated {meal_type} meals for retrieval")
+        return added
+    except Exception as e:
+        db.session.rollback()
+        print(f"Could not store generated meals: {str(e)}")
+        return 0
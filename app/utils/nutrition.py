@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+import numpy as np
+from flask import current_app, has_app_context
+from app.utils.ingredient_prices import get_price_table, parse_amount, parse_number
+
+DEFAULT_NUTRIENTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'ingredient_nutrients.json')
+
+NUTRIENTS = ('kcal', 'protein', 'carbs', 'fat')
+# Energy per gram of protein, carbs and fat, for the macro percentages
+KCAL_PER_GRAM = np.array([4.0, 4.0, 9.0])
+
+# 'correct' replaces wrong and missing values, 'fill' only missing ones, 'off' skips the calculator
+MODES = ('correct', 'fill', 'off')
+DEFAULT_MODE = 'correct'
+# Stated calories within this share of the computed calories are kept
+DEFAULT_TOLERANCE = 0.35
+# Stated macro percentages within this many points of the computed ones are kept
+MACRO_TOLERANCE = 15
+# Share of a meal's measured ingredients that must be in the matrix before its totals are trusted
+MIN_COVERAGE = 0.6
+
+# Process-wide matrix, built once by init_nutrient_matrix() during create_app
+_nutrient_matrix = None
+_nutrient_matrix_lock = threading.Lock()
+
+
+class NutrientMatrix:
+    """
+    Ingredient x nutrient matrix (kcal, protein g, carbs g, fat g per price table unit).
+
+    Rows follow the ingredient price table, so an ingredient line is resolved
+    with the same name index and amount conversion used for its cost. A batch
+    of meals becomes a meal x ingredient quantity matrix, and one matrix
+    multiply gives every meal's totals.
+    """
+
+    def __init__(self, nutrients, price_table):
+        self._price_table = price_table
+        self._rows = {name: row for row, name in enumerate(nutrients)}
+        self.matrix = np.array([nutrients[name] for name in nutrients], dtype=float).reshape(-1, len(NUTRIENTS))
+
+    @classmethod
+    def load(cls, path=DEFAULT_NUTRIENTS_PATH, price_table=None):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)['ingredients'], price_table or get_price_table())
+
+    def per_unit(self, name):
+        """Nutrients of one price table unit of an ingredient (zeros if it isn't in the matrix)"""
+        row = self._rows.get(name)
+        return self.matrix[row] if row is not None else np.zeros(len(NUTRIENTS))
+
+    def totals(self, meals):
+        """
+        Compute the nutrient totals of a batch of meals
+
+        Args:
+            meals (list): Meal dicts
+
+        Returns:
+            tuple: (totals, coverage) arrays; totals has one (kcal, protein,
+                carbs, fat) row per meal, coverage the share of each meal's
+                measured ingredients that were found in the matrix
+        """
+        meal_indexes, rows, quantities = [], [], []
+        measured = np.zeros(len(meals))
+        for meal_index, meal in enumerate(meals):
+            for ingredient in meal.get('ingredients') or []:
+                if not isinstance(ingredient, dict) or parse_amount(ingredient.get('amount', '')) is None:
+                    continue  # "to taste" amounts don't count against coverage
+                measured[meal_index] += 1
+                entry = self._price_table.lookup(ingredient.get('name', ''))
+                row = self._rows.get(entry['name']) if entry else None
+                quantity = self._price_table.quantity(entry, ingredient['amount']) if row is not None else None
+                if quantity is not None:
+                    meal_indexes.append(meal_index)
+                    rows.append(row)
+                    quantities.append(quantity)
+
+        amounts = np.zeros((len(meals), len(self.matrix)))
+        np.add.at(amounts, (np.array(meal_indexes, dtype=int), np.array(rows, dtype=int)), quantities)
+        found = np.bincount(np.array(meal_indexes, dtype=int), minlength=len(meals))
+        return amounts @ self.matrix, found / np.maximum(measured, 1)
+
+    def verify(self, meals, correct=True, tolerance=DEFAULT_TOLERANCE):
+        """
+        Fill in, and optionally correct, the nutritional info of a batch of meals
+
+        Meals whose ingredients are mostly in the matrix get calories per
+        serving and macro percentages computed from their ingredients
+        wherever the stated values are missing, or (with `correct`) when the
+        stated calories are more than `tolerance` away from the computed
+        ones; macro percentages likewise, within MACRO_TOLERANCE points.
+        A meal is one serving unless it states its 'servings'.
+
+        Args:
+            meals (list): Meal dicts, updated in place
+            correct (bool): Also replace stated values that look wrong
+            tolerance (float): Allowed relative calorie difference
+
+        Returns:
+            int: Number of meals whose nutritional info was filled or corrected
+        """
+        if not meals:
+            return 0
+
+        totals, coverage = self.totals(meals)
+        servings = np.array([parse_number(meal.get('servings')) for meal in meals], dtype=float)
+        servings = np.where(servings >= 1, servings, 1)
+        kcal = totals[:, 0] / servings
+        energy = totals[:, 1:] * KCAL_PER_GRAM
+        percentages = np.rint(energy * 100 / np.maximum(energy.sum(axis=1), 1)[:, None]).astype(int)
+        trusted = (coverage >= MIN_COVERAGE) & (kcal > 0)
+
+        updated = 0
+        for position in np.flatnonzero(trusted):
+            meal = meals[position]
+            nutrition = meal.get('nutritional_info')
+            nutrition = nutrition if isinstance(nutrition, dict) else {}
+            stated_kcal = parse_number(nutrition.get('calories'))
+            stated_macros = np.array([parse_number(nutrition.get(key)) for key in ('protein', 'carbs', 'fat')])
+
+            fix_kcal = np.isnan(stated_kcal) or (correct and abs(stated_kcal - kcal[position]) > tolerance * kcal[position])
+            fix_macros = np.isnan(stated_macros).any() or \
+                (correct and (np.abs(stated_macros - percentages[position]) > MACRO_TOLERANCE).any())
+            if not (fix_kcal or fix_macros):
+                continue
+
+            if fix_kcal:
+                nutrition['calories'] = f"{round(float(kcal[position]))} kcal"
+            if fix_macros:
+                nutrition.update(zip(('protein', 'carbs', 'fat'), (int(value) for value in percentages[position])))
+            meal['nutritional_info'] = nutrition
+            updated += 1
+
+        if updated:
+            print(f"Computed nutritional info from ingredients for {updated} of {len(meals)} meals")
+        return updated
+
+
+def verify_meal_nutrition(meals):
+    """
+    Fill in or correct meals' nutritional info from their ingredients (NUTRITION_VERIFICATION mode)
+
+    Args:
+        meals (list): Meal dicts, updated in place
+
+    Returns:
+        int: Number of meals whose nutritional info was filled or corrected
+    """
+    mode = current_app.config['NUTRITION_VERIFICATION'] if has_app_context() else DEFAULT_MODE
+    if mode not in MODES:
+        print(f"Unknown NUTRITION_VERIFICATION mode '{mode}', using '{DEFAULT_MODE}'")
+        mode = DEFAULT_MODE
+    if mode == 'off':
+        return 0
+    tolerance = current_app.config['NUTRITION_TOLERANCE'] if has_app_context() else DEFAULT_TOLERANCE
+    return get_nutrient_matrix().verify(meals, correct=mode == 'correct', tolerance=tolerance)
+
+
+def init_nutrient_matrix(app):
+    """Load the ingredient nutrient matrix from INGREDIENT_NUTRIENTS_PATH and register it on the app"""
+    global _nutrient_matrix
+
+    _nutrient_matrix = NutrientMatrix.load(app.config['INGREDIENT_NUTRIENTS_PATH'])
+    app.extensions['nutrient_matrix'] = _nutrient_matrix
+    return _nutrient_matrix
+
+
+def get_nutrient_matrix():
+    """Return the ingredient nutrient matrix, loading the bundled one outside of create_app"""
+    global _nutrient_matrix
+
+    if _nutrient_matrix is None:
+        with _nutrient_matrix_lock:
+            if _nutrient_matrix is None:
+                _nutrient_matrix = NutrientMatrix.load()
+    return _nutrient_matrix
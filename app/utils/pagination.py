@@ -0,0 +1,92 @@
+import base64
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor can't be decoded"""
+
+
+def encode_cursor(date_selected, row_id):
+    """
+    Encode the position after a row as an opaque cursor
+
+    Args:
+        date_selected (datetime): Sort date of the last row returned, None for rows without one
+        row_id (int): Primary key of the last row returned
+
+    Returns:
+        str: URL-safe cursor
+    """
+    date_text = date_selected.isoformat() if date_selected else ''
+    raw = f"{date_text}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor made by encode_cursor()
+
+    Returns:
+        tuple: (date_selected, row_id), date_selected is None past the last dated row
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        date_text, row_id = raw.rsplit('|', 1)
+        return (datetime.fromisoformat(date_text) if date_text else None), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def page_limit(limit):
+    """Clamp a requested page size to HISTORY_MAX_PAGE_SIZE, defaulting to HISTORY_PAGE_SIZE"""
+    if not limit or limit < 1:
+        return current_app.config['HISTORY_PAGE_SIZE']
+    return min(limit, current_app.config['HISTORY_MAX_PAGE_SIZE'])
+
+
+def keyset_page(query, date_column, id_column, cursor=None, limit=None):
+    """
+    Fetch one page of a query, newest first, continuing after a cursor
+
+    Rather than skipping OFFSET rows, the query seeks past the last
+    (date, id) seen, so with an index on the date column every page costs
+    the same however deep it is. The id breaks ties between equal dates.
+    Rows without a date come last, as MySQL and SQLite sort NULLs last in
+    descending order, and are paged by id alone.
+
+    Args:
+        query: SQLAlchemy query to paginate (not yet ordered or limited)
+        date_column: Column to sort by, descending
+        id_column: Primary key column, the tie-breaker
+        cursor (str, optional): next_cursor of the previous page
+        limit (int, optional): Page size
+
+    Returns:
+        tuple: (rows, next_cursor), next_cursor is None on the last page
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    limit = page_limit(limit)
+    if cursor:
+        date_selected, row_id = decode_cursor(cursor)
+        if date_selected is None:
+            query = query.filter(date_column.is_(None), id_column < row_id)
+        else:
+            query = query.filter(or_(date_column < date_selected,
+                                     and_(date_column == date_selected, id_column < row_id),
+                                     date_column.is_(None)))
+
+    # One extra row tells whether there is a next page
+    rows = query.order_by(date_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, date_column.key), getattr(last, id_column.key))
@@ -0,0 +1,270 @@
+import re
+from functools import lru_cache
+
+DIETS = ('vegan', 'vegetarian')
+
+# Items users commonly ask to have included in at least one meal
+INCLUDE_ITEMS = ("tea", "coffee", "tangawizi", "ginger", "chapati", "ugali", "rice", "beans")
+
+MEAT_KEYWORDS = ("beef", "chicken", "pork", "mutton", "lamb", "goat", "meat", "fish", "tilapia", "omena", "sausage", "bacon", "ham")
+ANIMAL_PRODUCT_KEYWORDS = ("milk", "cheese", "butter", "ghee", "cream", "egg", "yogurt", "honey")
+
+# An excluded category also excludes the ingredients that belong to it
+CATEGORY_KEYWORDS = {
+    "meat": MEAT_KEYWORDS,
+    "dairy": ("milk", "cheese", "butter", "ghee", "cream", "yogurt"),
+    "nut": ("peanut", "groundnut", "cashew", "almond"),
+    "gluten": ("wheat", "bread", "chapati", "spaghetti", "mandazi"),
+    "wheat": ("wheat", "bread", "chapati", "spaghetti", "mandazi"),
+    "seafood": ("fish", "tilapia", "omena", "prawn")
+}
+
+# Words that introduce an excluded item ("no beef", "without onions")
+EXCLUSION_WORDS = ("no", "without", "exclude", "avoid")
+ALLERGY_WORDS = ("allergic", "allergy", "allergies")
+
+# Words that carry no constraint and are dropped from the notes
+FILLER_WORDS = frozenset((
+    "i", "i'm", "im", "am", "a", "an", "the", "and", "or", "but", "with", "please", "want", "would", "like",
+    "prefer", "some", "me", "my", "for", "of", "to", "in", "include", "including", "also", "only", "food", "meals"
+))
+
+TOKEN_RE = re.compile(r"[a-z]+")
+
+# Plant-based ingredients whose names contain an animal product word
+PLANT_BASED_PHRASES = re.compile(r"\b(?:coconut|almond|soy|oat) milk\b|\bpeanut butter\b|\bcocoa butter\b")
+# Single words made up of keywords, and the keywords they stand for ("buttermilk" is caught by "no milk")
+COMPOUND_WORDS = {
+    "buttermilk": ("milk",),
+    "milkshake": ("milk",),
+    "eggnog": ("egg", "milk"),
+    "cheesecake": ("cheese",),
+    "cheeseburger": ("cheese", "beef", "meat"),
+    "hamburger": ("beef", "meat"),
+    "meatball": ("meat",),
+    "fishcake": ("fish",),
+    "fishfinger": ("fish",),
+    "yoghurt": ("yogurt",)
+}
+
+
+def normalize_preferences(preferences):
+    """Lowercase preferences and collapse punctuation/whitespace so equivalent strings match"""
+    if not preferences:
+        return ""
+    if isinstance(preferences, (list, tuple)):
+        preferences = ", ".join(str(item) for item in preferences)
+    words = re.findall(r"[a-z0-9']+", str(preferences).lower())
+    return " ".join(words)
+
+
+def _stem(word):
+    """Fold simple plurals so 'eggs' matches 'egg', 'tomatoes' 'tomato' and 'berries' 'berry'"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith('oes'):
+        return word[:-2]
+    return word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+
+
+_INCLUDE_STEMS = {_stem(item): item for item in INCLUDE_ITEMS}
+_MEAT_STEMS = frozenset(_stem(word) for word in MEAT_KEYWORDS)
+_ANIMAL_PRODUCT_STEMS = frozenset(_stem(word) for word in ANIMAL_PRODUCT_KEYWORDS)
+
+
+def meal_tokens(meal):
+    """
+    Normalized word set of a meal's name and ingredient names
+
+    Args:
+        meal (dict): Meal data dictionary
+
+    Returns:
+        set: Lowercase, singular words, plus the keywords COMPOUND_WORDS stand for
+    """
+    names = [str(meal.get('name', ''))]
+    for ingredient in meal.get('ingredients') or []:
+        names.append(str(ingredient.get('name', '')) if isinstance(ingredient, dict) else str(ingredient))
+    text = PLANT_BASED_PHRASES.sub(' plant ', ' '.join(names).lower())
+    tokens = {_stem(word) for word in TOKEN_RE.findall(text)}
+    for word in tokens & COMPOUND_WORDS.keys():
+        tokens.update(COMPOUND_WORDS[word])
+    return tokens
+
+
+def diet_tags(meal):
+    """
+    Diets a meal is suitable for, judged from its name and ingredient names
+
+    Args:
+        meal (dict): Meal data dictionary
+
+    Returns:
+        list: 'vegan' and/or 'vegetarian'
+    """
+    tokens = meal_tokens(meal)
+    if tokens & _MEAT_STEMS:
+        return []
+    if tokens & _ANIMAL_PRODUCT_STEMS:
+        return ['vegetarian']
+    return ['vegan', 'vegetarian']
+
+
+class PreferenceConstraints:
+    """
+    Structured form of a user's free-text meal preferences.
+
+    Holds the diet class, items to include, excluded items, allergens and
+    any remaining free-text notes. Instances are shared through the parse
+    cache, so treat them as read-only. `canonical` is a normalized text
+    form that parses back to the same constraints; it is used as the cache
+    key and as the preferences for generations made from a cache key.
+    """
+
+    def __init__(self, diet=None, required_items=(), excluded_items=(), allergens=(), notes=""):
+        self.diet = diet
+        self.required_items = tuple(required_items)
+        self.excluded_items = tuple(excluded_items)
+        self.allergens = tuple(allergens)
+        self.notes = notes
+        self.canonical = self._render()
+
+        # Singular forms of the required items, as they appear in meal_tokens()
+        self.include_words = frozenset(_stem(item) for item in self.required_items)
+        # Forbidden word -> reason, so a meal is checked with one set intersection
+        self.forbidden = {}
+        for allergen in self.allergens:
+            self._forbid((allergen,) + CATEGORY_KEYWORDS.get(allergen, ()), "user is allergic to it")
+        for item in self.excluded_items:
+            self._forbid((item,) + CATEGORY_KEYWORDS.get(item, ()), "user requested to exclude it")
+        if self.diet in DIETS:
+            self._forbid(MEAT_KEYWORDS, f"user requested {self.diet}")
+        if self.diet == 'vegan':
+            self._forbid(ANIMAL_PRODUCT_KEYWORDS, "user requested vegan")
+
+    def _forbid(self, keywords, reason):
+        for keyword in keywords:
+            self.forbidden.setdefault(_stem(keyword), reason)
+
+    def _render(self):
+        parts = []
+        if self.diet:
+            parts.append(self.diet)
+        if self.required_items:
+            parts.append("include " + " ".join(self.required_items))
+        parts.extend("no " + item for item in self.excluded_items)
+        parts.extend("allergic to " + allergen for allergen in self.allergens)
+        if self.notes:
+            parts.append(self.notes)
+        return " ".join(parts)
+
+    def __bool__(self):
+        return bool(self.canonical)
+
+    def __repr__(self):
+        return f"<PreferenceConstraints '{self.canonical}'>"
+
+    def violations(self, meal, check_includes=True):
+        """
+        Return every constraint the meal breaks
+
+        Args:
+            meal (dict): Meal data dictionary
+            check_includes (bool): Whether the meal itself must contain a requested item
+                (False when the requirement is checked across a whole set of meals)
+
+        Returns:
+            list: Human-readable violation reasons (empty if the meal adheres)
+        """
+        tokens = meal_tokens(meal)
+        found = []
+
+        if check_includes and self.include_words and not tokens & self.include_words:
+            found.append(f"Meal doesn't include any of the requested items: {', '.join(self.required_items)}")
+
+        for token in sorted(tokens & self.forbidden.keys()):
+            found.append(f"Meal contains '{token}' but {self.forbidden[token]}")
+
+        return found
+
+    def includes_satisfied(self, meals):
+        """True if at least one of the meals contains a requested item (or none were requested)"""
+        return not self.include_words or any(meal_tokens(meal) & self.include_words for meal in meals)
+
+    def describe(self):
+        """Bullet list of the parsed constraints for the LLM prompt"""
+        lines = []
+        if self.diet:
+            lines.append(f"- Diet: {self.diet.upper()} for ALL meals")
+        if self.required_items:
+            lines.append(f"- Include in at least one meal: {', '.join(self.required_items)}")
+        for allergen in self.allergens:
+            related = CATEGORY_KEYWORDS.get(allergen, ())
+            lines.append(f"- ALLERGY: never use {allergen}" + (f" in any form ({', '.join(related)})" if related else ""))
+        for item in self.excluded_items:
+            related = CATEGORY_KEYWORDS.get(item, ())
+            lines.append(f"- Never include: {item}" + (f" ({', '.join(related)})" if related else ""))
+        if self.notes:
+            lines.append(f"- Other wishes: {self.notes}")
+        return "\n".join(lines)
+
+
+def parse_preferences(preferences):
+    """
+    Parse free-text preferences into constraints, memoized on the normalized text
+
+    Args:
+        preferences (str or PreferenceConstraints): User preferences
+
+    Returns:
+        PreferenceConstraints: Shared, read-only constraints
+    """
+    if isinstance(preferences, PreferenceConstraints):
+        return preferences
+    return _parse_normalized(normalize_preferences(preferences))
+
+
+@lru_cache(maxsize=1024)
+def _parse_normalized(text):
+    tokens = text.split()
+    diet = None
+    required, excluded, allergens, notes = [], [], [], []
+
+    i = 0
+    while i < len(tokens):
+        word = tokens[i]
+        following = tokens[i + 1:i + 3]
+
+        if word in EXCLUSION_WORDS and following:
+            excluded.append(_stem(following[0]))
+            i += 2
+        elif word == "don't" and following[:1] == ["want"] and len(following) == 2:
+            excluded.append(_stem(following[1]))
+            i += 3
+        elif following[:1] == ["free"]:
+            # "gluten free"
+            excluded.append(_stem(word))
+            i += 2
+        elif word in ALLERGY_WORDS and following[:1] == ["to"] and len(following) == 2:
+            allergens.append(_stem(following[1]))
+            i += 3
+        elif following[:1] in (["allergy"], ["allergies"]):
+            # "nut allergy"
+            allergens.append(_stem(word))
+            i += 2
+        elif word in DIETS:
+            diet = 'vegan' if 'vegan' in (diet, word) else word
+            i += 1
+        elif _stem(word) in _INCLUDE_STEMS:
+            required.append(_INCLUDE_STEMS[_stem(word)])
+            i += 1
+        else:
+            if word not in FILLER_WORDS:
+                notes.append(word)
+            i += 1
+
+    allergens = sorted(set(allergens))
+    excluded = sorted(set(excluded) - set(allergens))
+    # An item can't be both requested and ruled out ("no rice")
+    required = sorted(item for item in set(required) if _stem(item) not in excluded and _stem(item) not in allergens)
+    return PreferenceConstraints(diet, required, excluded, allergens, " ".join(notes))
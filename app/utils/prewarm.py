@@ -0,0 +1,92 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models.meal import MealHistory
+from app.utils.groq_api import generate_uncached_meal_plans
+from app.utils.meal_cache import get_meal_cache
+from app.utils.deadline import deadline_for
+from app.utils.rate_limiter import BATCH
+
+
+def popular_combinations(top=None, days=None, meal_type=None):
+    """
+    Find the most requested (meal type, budget band, preferences) combinations
+
+    The database counts history rows per (meal type, budget, preferences)
+    and returns only the `top` most frequent. Those are then merged by meal
+    plan cache key, so each combination is exactly one cache entry; spellings
+    of the same preferences outside the top groups aren't counted.
+
+    Args:
+        top (int, optional): Number of combinations to return
+        days (int, optional): How far back to look in meal history
+        meal_type (str, optional): Only consider this meal type
+
+    Returns:
+        list: ((meal_type, budget, preferences), count) pairs, most popular first
+    """
+    top = top or current_app.config['PREWARM_TOP_COMBINATIONS']
+    days = days or current_app.config['PREWARM_LOOKBACK_DAYS']
+    cache = get_meal_cache()
+
+    requests = func.count(MealHistory.id)
+    query = db.session.query(MealHistory.meal_type, MealHistory.budget, MealHistory.preferences, requests) \
+        .filter(MealHistory.date_selected >= datetime.utcnow() - timedelta(days=days),
+                MealHistory.meal_type.isnot(None), MealHistory.budget.isnot(None))
+    if meal_type:
+        query = query.filter(MealHistory.meal_type == meal_type)
+    query = query.group_by(MealHistory.meal_type, MealHistory.budget, MealHistory.preferences) \
+        .order_by(requests.desc()) \
+        .limit(top)
+
+    counts = Counter()
+    meal_type_names = {}
+    for row_meal_type, budget, preferences, count in query:
+        if not row_meal_type:
+            continue
+        key = cache.make_key(row_meal_type, budget, preferences)
+        counts[key] += count
+        meal_type_names.setdefault(key[0], row_meal_type)
+
+    # Generate with the display meal type ("Breakfast") rather than the normalized key
+    return [((meal_type_names[key[0]], key[1], key[2]), count) for key, count in counts.most_common(top)]
+
+
+def prewarm_meal_cache(top=None, days=None, meal_type=None, ttl=None, dry_run=False, echo=print):
+    """
+    Generate fresh meal plans for the popular combinations and load them into the cache
+
+    Generations run one at a time at batch priority, which leaves the
+    PROVIDER_BATCH_RESERVE share of the provider quota to the web workers'
+    interactive requests. Mock fallbacks are not cached.
+
+    Returns:
+        dict: Counts of combinations found, warmed and failed
+    """
+    ttl = ttl or current_app.config['PREWARM_CACHE_TTL']
+    cache = get_meal_cache()
+    combinations = popular_combinations(top=top, days=days, meal_type=meal_type)
+
+    if not cache.cache_dir:
+        echo("WARNING: MEAL_CACHE_DIR is not set, prewarmed plans only live in this process")
+
+    summary = {'combinations': len(combinations), 'warmed': 0, 'failed': 0}
+    for (combo_meal_type, budget, preferences), count in combinations:
+        label = f"{combo_meal_type}, {budget:g} KES, preferences '{preferences or 'none'}' ({count} requests)"
+        if dry_run:
+            echo(f"Would prewarm {label}")
+            continue
+
+        meal_plans, from_api = generate_uncached_meal_plans(combo_meal_type, budget, preferences,
+                                                            deadline=deadline_for('job'), priority=BATCH)
+        if from_api:
+            cache.set(cache.make_key(combo_meal_type, budget, preferences), meal_plans, ttl=ttl)
+            summary['warmed'] += 1
+            echo(f"Prewarmed {label}")
+        else:
+            summary['failed'] += 1
+            echo(f"Could not prewarm {label}, generation fell back to mock data")
+
+    return summary
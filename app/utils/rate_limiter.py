@@ -0,0 +1,265 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: the limiter state can't be shared between processes
+    fcntl = None
+
+INTERACTIVE = 0
+BATCH = 1
+
+DEFAULT_REQUESTS_PER_MINUTE = 30
+DEFAULT_TOKENS_PER_MINUTE = 6000
+DEFAULT_MAX_QUEUE = 50
+DEFAULT_MAX_WAIT = 30.0
+DEFAULT_RETRY_AFTER = 2.0
+# Share of each bucket batch calls must leave for interactive ones
+DEFAULT_BATCH_RESERVE = 0.5
+
+# Process-wide limiter, built once by init_rate_limiter() during create_app
+_rate_limiter = None
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a provider call can't get quota: the queue is full or the wait is too long"""
+
+
+class _MemoryStore:
+    """Bucket state for a single process"""
+
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def transact(self, fn):
+        with self._lock:
+            self._state, result = fn(self._state)
+            return result
+
+
+class _FileStore:
+    """Bucket state in a JSON file, updated under an exclusive file lock by every worker process on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def transact(self, fn):
+        with open(self.path, 'a+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except ValueError:
+                    state = {}
+
+                state, result = fn(state)
+
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class ProviderRateLimiter:
+    """
+    Token-bucket limiter for the shared provider quota.
+
+    Two buckets are kept: requests per minute and tokens per minute. Bucket
+    levels live in a store shared by the worker processes on this host (a
+    locked JSON file when state_path is set), so all workers draw from the
+    same quota. A caller that can't be served straight away waits in a
+    bounded priority queue where interactive requests go ahead of batch
+    work; when the queue is full, or the wait would exceed max_wait or the
+    caller's deadline, RateLimitExceeded is raised at once.
+
+    The queue only orders callers within one process, so it can't make a
+    separate batch process (flask prewarm-cache) yield to the web workers.
+    What every process does share is the buckets, so batch calls only take
+    quota while more than `batch_reserve` of each bucket would be left,
+    keeping that share for interactive calls.
+    """
+
+    def __init__(self, enabled=True, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, state_path=None, max_queue=DEFAULT_MAX_QUEUE,
+                 max_wait=DEFAULT_MAX_WAIT, batch_reserve=DEFAULT_BATCH_RESERVE):
+        self.enabled = enabled
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.batch_reserve = min(max(batch_reserve, 0.0), 1.0)
+
+        if state_path and fcntl is None:
+            print("WARNING: fcntl is unavailable, provider rate limits are enforced per process")
+        self.shared = bool(state_path and fcntl is not None)
+        self._store = _FileStore(state_path) if self.shared else _MemoryStore()
+
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._counters = {
+            'admitted': 0,
+            'waited': 0,
+            'rejected_queue_full': 0,
+            'rejected_wait': 0,
+            'provider_rate_limited': 0
+        }
+
+    def acquire(self, tokens, priority=INTERACTIVE, deadline=None):
+        """
+        Take one request and `tokens` tokens from the quota, waiting in the queue if needed
+
+        Args:
+            tokens (int): Estimated tokens for the call (prompt plus completion)
+            priority (int): INTERACTIVE or BATCH
+            deadline (Deadline, optional): Caps how long the caller will wait
+
+        Raises:
+            RateLimitExceeded: If the queue is full or quota won't be available in time
+        """
+        if not self.enabled:
+            return
+
+        max_wait = deadline.cap(self.max_wait) if deadline is not None else self.max_wait
+        give_up_at = time.monotonic() + max_wait
+        entry = (priority, next(self._seq))
+        waited = False
+
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self._counters['rejected_queue_full'] += 1
+                raise RateLimitExceeded(f"Provider queue is full ({self.max_queue} waiting)")
+            heapq.heappush(self._queue, entry)
+            self._cond.notify_all()
+
+            try:
+                while True:
+                    wait_for = None
+                    # Only the head of the queue may take quota, so priority order is kept
+                    if self._queue[0] == entry:
+                        wait_for = self._store.transact(lambda state: self._take(state, tokens, priority))
+                        if wait_for == 0:
+                            self._counters['admitted'] += 1
+                            if waited:
+                                self._counters['waited'] += 1
+                            return
+
+                    remaining = give_up_at - time.monotonic()
+                    if remaining <= 0 or (wait_for is not None and wait_for > remaining):
+                        self._counters['rejected_wait'] += 1
+                        raise RateLimitExceeded(f"Provider quota not available within {max_wait:.1f}s")
+
+                    waited = True
+                    self._cond.wait(min(wait_for, remaining) if wait_for is not None else remaining)
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+    def record_usage(self, extra_tokens):
+        """Charge (or refund, if negative) the difference between actual and estimated tokens"""
+        if not self.enabled or not extra_tokens:
+            return
+
+        def charge(state):
+            now = time.time()
+            level = self._level(state, 'tokens', self.tokens_per_minute, now)
+            state['tokens'] = [min(self.tokens_per_minute, level - extra_tokens), now]
+            return state, None
+
+        self._store.transact(charge)
+
+    def penalize(self, retry_after=None):
+        """Pause every worker after the provider itself answered 429 Too Many Requests"""
+        if not self.enabled:
+            return
+        retry_after = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+        with self._cond:
+            self._counters['provider_rate_limited'] += 1
+
+        def block(state):
+            state['blocked_until'] = max(state.get('blocked_until', 0), time.time() + retry_after)
+            return state, None
+
+        self._store.transact(block)
+
+    def _take(self, state, tokens, priority=INTERACTIVE):
+        """Take quota from the buckets in state; return 0 on success or the seconds to wait"""
+        now = time.time()
+        request_level = self._level(state, 'requests', self.requests_per_minute, now)
+        token_level = self._level(state, 'tokens', self.tokens_per_minute, now)
+        state['requests'] = [request_level, now]
+        state['tokens'] = [token_level, now]
+
+        blocked_for = state.get('blocked_until', 0) - now
+        if blocked_for > 0:
+            return state, blocked_for
+
+        # A call larger than the whole bucket only needs a full bucket
+        reserve = self.batch_reserve if priority == BATCH else 0.0
+        needed_requests = min(1 + reserve * self.requests_per_minute, self.requests_per_minute)
+        needed = min(tokens + reserve * self.tokens_per_minute, self.tokens_per_minute)
+        if request_level >= needed_requests and token_level >= needed:
+            state['requests'] = [request_level - 1, now]
+            state['tokens'] = [token_level - tokens, now]
+            return state, 0
+
+        request_wait = max(0.0, (needed_requests - request_level) * 60.0 / self.requests_per_minute)
+        token_wait = max(0.0, (needed - token_level) * 60.0 / self.tokens_per_minute)
+        return state, max(request_wait, token_wait)
+
+    def _level(self, state, bucket, per_minute, now):
+        level, updated = state.get(bucket, [per_minute, now])
+        return min(per_minute, level + (now - updated) * per_minute / 60.0)
+
+    def stats(self):
+        """Queue and rejection counters, for the admin dashboard"""
+        with self._cond:
+            counters = dict(self._counters)
+            counters['queued'] = len(self._queue)
+        counters.update({
+            'enabled': self.enabled,
+            'shared': self.shared,
+            'requests_per_minute': self.requests_per_minute,
+            'tokens_per_minute': self.tokens_per_minute,
+            'batch_reserve': self.batch_reserve
+        })
+        return counters
+
+
+def init_rate_limiter(app):
+    """Build the shared provider rate limiter from app config and register it on the app"""
+    global _rate_limiter
+
+    _rate_limiter = ProviderRateLimiter(
+        enabled=app.config['PROVIDER_RATE_LIMIT_ENABLED'],
+        requests_per_minute=app.config['PROVIDER_REQUESTS_PER_MINUTE'],
+        tokens_per_minute=app.config['PROVIDER_TOKENS_PER_MINUTE'],
+        state_path=app.config['PROVIDER_RATE_LIMIT_STATE'],
+        max_queue=app.config['PROVIDER_QUEUE_SIZE'],
+        max_wait=app.config['PROVIDER_QUEUE_MAX_WAIT'],
+        batch_reserve=app.config['PROVIDER_BATCH_RESERVE']
+    )
+    app.extensions['provider_rate_limiter'] = _rate_limiter
+    return _rate_limiter
+
+
+def get_rate_limiter():
+    """Return the shared provider rate limiter, creating an in-process one outside of create_app"""
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        _rate_limiter = ProviderRateLimiter()
+    return _rate_limiter
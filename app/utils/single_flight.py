@@ -0,0 +1,170 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process coalescing is not available
+    fcntl = None
+
+DEFAULT_TIMEOUT = 45.0
+DEFAULT_RESULT_TTL = 30.0
+LOCK_POLL_INTERVAL = 0.05
+
+# Process-wide coordinator, built once by init_single_flight() during create_app
+_single_flight = None
+
+
+class SingleFlightTimeout(Exception):
+    """Raised when a waiter gives up on an in-flight call for the same key"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result. When lock_dir is set, a file
+    lock per key extends this across worker processes on the same host: the
+    process that wins the lock runs the function and leaves the result in
+    lock_dir for the processes that were waiting on it.
+    """
+
+    def __init__(self, lock_dir=None, timeout=DEFAULT_TIMEOUT, result_ttl=DEFAULT_RESULT_TTL):
+        self.timeout = timeout
+        self.result_ttl = result_ttl
+        self.lock_dir = lock_dir if lock_dir and fcntl is not None else None
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        if lock_dir and fcntl is None:
+            print("WARNING: fcntl is unavailable, single-flight coalescing is limited to this process")
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key, fn, timeout=None):
+        """
+        Run fn for key, or wait for the call already in flight for the same key
+
+        Args:
+            key: Hashable request key
+            fn (callable): Zero-argument function producing a JSON-serializable result
+            timeout (float, optional): Seconds a waiter may wait before giving up
+
+        Returns:
+            The result of fn (a private copy for waiters)
+
+        Raises:
+            SingleFlightTimeout: If the in-flight call did not finish in time
+        """
+        timeout = self.timeout if timeout is None else timeout
+
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not is_leader:
+            if not call.done.wait(timeout):
+                raise SingleFlightTimeout(f"Timed out after {timeout:.1f}s waiting for {key}")
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            if self.lock_dir:
+                call.result = self._run_locked(key, fn, timeout)
+            else:
+                call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _run_locked(self, key, fn, timeout):
+        """Run fn under a per-key file lock shared with the other worker processes"""
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        lock_path = os.path.join(self.lock_dir, f"{digest}.lock")
+        result_path = os.path.join(self.lock_dir, f"{digest}.json")
+
+        with open(lock_path, 'a') as lock_file:
+            acquired_at = self._acquire(lock_file, timeout)
+            try:
+                # Another worker may have finished this key while we waited for the lock
+                result = self._read_result(result_path, acquired_at)
+                if result is not None:
+                    return result
+
+                result = fn()
+                self._write_result(result_path, result)
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _acquire(self, lock_file, timeout):
+        started = time.time()
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return started
+            except BlockingIOError:
+                if time.time() - started >= timeout:
+                    raise SingleFlightTimeout(f"Timed out after {timeout:.1f}s waiting for another worker")
+                time.sleep(LOCK_POLL_INTERVAL)
+
+    def _read_result(self, result_path, acquired_at):
+        try:
+            # Only trust results written recently enough to belong to this burst
+            modified = os.path.getmtime(result_path)
+            if modified < acquired_at - self.result_ttl:
+                return None
+            with open(result_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_result(self, result_path, result):
+        try:
+            tmp_path = f"{result_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, result_path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Could not share single-flight result: {str(e)}")
+
+
+def init_single_flight(app):
+    """Build the shared single-flight coordinator from app config and register it on the app"""
+    global _single_flight
+
+    _single_flight = SingleFlight(
+        lock_dir=app.config['SINGLE_FLIGHT_LOCK_DIR'],
+        timeout=app.config['SINGLE_FLIGHT_TIMEOUT']
+    )
+    app.extensions['single_flight'] = _single_flight
+    return _single_flight
+
+
+def get_single_flight():
+    """Return the shared single-flight coordinator, creating an in-process one outside of create_app"""
+    global _single_flight
+
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
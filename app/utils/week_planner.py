@@ -0,0 +1,143 @@
+import math
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import current_app, has_app_context
+from app.utils.groq_api import generate_meal_plans, generate_uncached_meal_plans, get_meal_cost
+from app.utils.deadline import deadline_for
+from app.utils.meal_catalog import get_meal_catalog
+
+MEAL_TYPES = ('Breakfast', 'Lunch', 'Supper')
+
+# Share of the daily budget given to each meal
+MEAL_BUDGET_SHARES = {
+    'Breakfast': 0.25,
+    'Lunch': 0.35,
+    'Supper': 0.40
+}
+
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# Meal options one generation returns
+MEALS_PER_GENERATION = 3
+
+
+def generate_week_plan(weekly_budget, preferences=None, days=7, deadline=None):
+    """
+    Generate a Breakfast/Lunch/Supper plan for each day of the week
+
+    Each meal type needs one meal per day and a generation returns three
+    options, so ceil(days / 3) generations per meal type are started at
+    once on a thread pool. The first goes through the meal plan cache, the
+    others are fresh generations. Days are given differently named meals
+    from those; catalog meals that meet the preferences fill in only for
+    generations that failed or repeated a meal. Everything runs under one
+    shared deadline; a generation not done in time counts as failed.
+
+    A meal type with no meal at all that meets the preferences is left
+    empty (None) on every day and listed under 'unavailable'.
+
+    Args:
+        weekly_budget (float): Budget for the whole week in KES
+        preferences (str, optional): User's meal preferences
+        days (int, optional): Number of days to plan (1-7)
+        deadline (Deadline, optional): Time budget for the whole week
+
+    Returns:
+        dict: The plan, with a list of days each holding one meal per meal type
+    """
+    deadline = deadline or deadline_for('week')
+    daily_budget = float(weekly_budget) / days
+    budgets = {meal_type: round(daily_budget * share, 2) for meal_type, share in MEAL_BUDGET_SHARES.items()}
+    rounds = math.ceil(days / MEALS_PER_GENERATION)
+
+    slots = [(meal_type, budgets[meal_type], round_number) for meal_type in MEAL_TYPES for round_number in range(rounds)]
+    app = current_app._get_current_object() if has_app_context() else None
+    max_workers = current_app.config['WEEK_PLAN_WORKERS'] if app else len(slots)
+
+    def run(meal_type, budget, round_number):
+        if round_number == 0:
+            return generate_meal_plans(meal_type, budget, preferences, deadline=deadline)
+        # Later rounds must not hit the cache entry the first one fills; mock fallbacks are left to the catalog
+        meal_plans, from_api = generate_uncached_meal_plans(meal_type, budget, preferences, deadline=deadline)
+        return meal_plans if from_api else []
+
+    def generate(*slot):
+        if app is None:
+            return run(*slot)
+        with app.app_context():
+            return run(*slot)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='week-plan')
+    try:
+        futures = {slot: executor.submit(generate, *slot) for slot in slots}
+        wait(futures.values(), timeout=deadline.remaining())
+    finally:
+        # Generations respect the deadline themselves; don't hold the request for stragglers
+        executor.shutdown(wait=False)
+
+    generated = {meal_type: [] for meal_type in MEAL_TYPES}
+    for slot, future in futures.items():
+        if future.done() and future.exception() is None:
+            generated[slot[0]].extend(future.result() or [])
+        else:
+            print(f"Week plan slot {slot} missed the deadline ({deadline})")
+
+    options = {meal_type: _distinct_meals(generated[meal_type], meal_type, budgets[meal_type], preferences, days)
+               for meal_type in MEAL_TYPES}
+    unavailable = [meal_type for meal_type in MEAL_TYPES if not options[meal_type]]
+    if unavailable:
+        print(f"No meals meet '{preferences}' for {', '.join(unavailable)}")
+
+    plan_days = []
+    for day in range(days):
+        meals = {}
+        for meal_type in MEAL_TYPES:
+            choices = options[meal_type]
+            meals[meal_type] = choices[day % len(choices)] if choices else None
+        plan_days.append({
+            'day': day + 1,
+            'name': DAY_NAMES[day],
+            'meals': meals,
+            'total_cost': round(sum(get_meal_cost(meal) or 0 for meal in meals.values() if meal), 2)
+        })
+
+    return {
+        'weekly_budget': float(weekly_budget),
+        'daily_budget': round(daily_budget, 2),
+        'meal_budgets': budgets,
+        'preferences': preferences,
+        'days': plan_days,
+        'unavailable': unavailable,
+        'total_cost': round(sum(day['total_cost'] for day in plan_days), 2)
+    }
+
+
+def _distinct_meals(meal_plans, meal_type, budget, preferences, days):
+    """
+    One differently named meal per day where possible
+
+    Args:
+        meal_plans (list): Generated options for the meal type, used first
+        meal_type (str): Breakfast, Lunch, or Supper
+        budget (float): Budget for the meal in KES
+        preferences (str, optional): User's meal preferences
+        days (int): Number of days to plan
+
+    Returns:
+        list: Up to `days` meals with distinct names, empty if none meets the preferences
+    """
+    meals, names = [], set()
+    for meal in meal_plans:
+        name = meal['name'].strip().lower()
+        if name not in names:
+            names.add(name)
+            meals.append(meal)
+    if len(meals) >= days:
+        return meals[:days]
+
+    # The catalog never relaxes diet or allergy constraints, so it may have fewer than asked for
+    for meal in get_meal_catalog().find(meal_type, budget, preferences, count=days + len(meals)):
+        name = meal['name'].strip().lower()
+        if name not in names and len(meals) < days:
+            names.add(name)
+            meals.append(meal)
+    return meals
@@ -10,7 +10,20 @@ with app.app_context():
     # Add last_login column if it doesn't exist
     db.session.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS last_login DATETIME NULL"))
     
+    # Diet tags and source for meals served from the meals table, and the retrieval index
+    db.session.execute(text("ALTER TABLE meals ADD COLUMN IF NOT EXISTS diet_tags VARCHAR(50) NULL"))
+    db.session.execute(text("ALTER TABLE meals ADD COLUMN IF NOT EXISTS source VARCHAR(20) DEFAULT 'admin'"))
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_meals_type_cost ON meals (meal_type, estimated_cost)"))
+    
+    # Indexes for the meal history pages, admin filters and today's counts
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_meal_history_user_date ON meal_history (user_id, date_selected DESC)"))
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_meal_history_type_date ON meal_history (meal_type, date_selected)"))
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_meal_history_date ON meal_history (date_selected)"))
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_meal_history_name ON meal_history (meal_name)"))
+    
     # Commit the changes
     db.session.commit()
     
-    print("Database updated successfully!") 
\ No newline at end of file
+    print("Database updated successfully!")
+    # Converting the meal payload columns rebuilds the tables, so it is left to a maintenance window
+    print("To switch meal payloads to native JSON columns, run: flask backfill-json --convert") 
\ No newline at end of file
@@ -23,12 +23,16 @@ CREATE TABLE `meals` (
   `id` INT PRIMARY KEY AUTO_INCREMENT,
   `name` VARCHAR(100) NOT NULL,
   `description` TEXT,
-  `ingredients` TEXT NOT NULL,
-  `instructions` TEXT,
+  `ingredients` JSON NOT NULL,
+  `instructions` JSON,
   `meal_type` VARCHAR(20) NOT NULL,
   `estimated_cost` FLOAT NOT NULL,
-  `nutritional_info` TEXT,
-  `created_at` DATETIME DEFAULT CURRENT_TIMESTAMP
+  `nutritional_info` JSON,
+  `created_at` DATETIME DEFAULT CURRENT_TIMESTAMP,
+  `popularity` INT DEFAULT 0,
+  `diet_tags` VARCHAR(50),
+  `source` VARCHAR(20) DEFAULT 'admin',
+  INDEX `ix_meals_type_cost` (`meal_type`, `estimated_cost`)
 );
 
 -- Create meal history table
@@ -38,14 +42,18 @@ CREATE TABLE `meal_history` (
   `meal_type` VARCHAR(20) NOT NULL,
   `meal_name` VARCHAR(100),
   `description` TEXT,
-  `ingredients` TEXT,
-  `instructions` TEXT,
+  `ingredients` JSON,
+  `instructions` JSON,
   `budget` FLOAT NOT NULL,
   `total_cost` FLOAT,
   `preferences` TEXT,
-  `nutritional_info` TEXT,
+  `nutritional_info` JSON,
   `date_selected` DATETIME DEFAULT CURRENT_TIMESTAMP,
-  FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE
+  FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE,
+  INDEX `ix_meal_history_user_date` (`user_id`, `date_selected` DESC),
+  INDEX `ix_meal_history_type_date` (`meal_type`, `date_selected`),
+  INDEX `ix_meal_history_date` (`date_selected`),
+  INDEX `ix_meal_history_name` (`meal_name`)
 );
 
 -- Create system settings table
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+
+from app import create_app, db
+from app.models.user import User
+from app.utils import groq_api
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # Never call the provider from tests
+    monkeypatch.setattr(groq_api, 'GROQ_API_KEY', None)
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    with app.app_context():
+        user = User(email='user@example.com', username='user', password='password')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user)
+        session['_fresh'] = True
+    return client
+
+
+class _ProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        # A cancelled client resets its kept-alive connection instead of sending another request
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        with server.lock:
+            server.requests.append((self.client_address[1], body))
+            number = len(server.requests)
+
+        delay = server.delay(number) if callable(server.delay) else server.delay
+        time.sleep(delay)
+        content = server.content(body) if callable(server.content) else server.content
+        status = server.status(number) if callable(server.status) else server.status
+
+        if body.get('stream'):
+            events = [f"data: {json.dumps({'choices': [{'delta': {'content': content[i:i + 40]}}]})}\n\n"
+                      for i in range(0, len(content), 40)] + ["data: [DONE]\n\n"]
+        else:
+            events = [json.dumps({'choices': [{'message': {'content': content}}], 'usage': {'total_tokens': 900}})]
+
+        # A cancelled or hedged-out client may already have hung up
+        try:
+            self.send_response(status)
+            for name, value in server.headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Type', 'text/event-stream' if body.get('stream') else 'application/json')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for event in events:
+                data = event.encode('utf-8')
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+                time.sleep(server.chunk_delay)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class FakeProvider(ThreadingHTTPServer):
+    """Local stand-in for the chat completions API; status, delay and content may be callables"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _ProviderHandler)
+        self.lock = threading.Lock()
+        self.requests = []  # (client port, request body)
+        self.status = 200
+        self.delay = 0.0
+        self.chunk_delay = 0.0
+        self.content = '{}'
+        self.headers = {}
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/openai/v1/chat/completions"
+
+
+@pytest.fixture
+def provider(app, monkeypatch):
+    server = FakeProvider()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(groq_api, 'GROQ_API_KEY', 'test-key')
+    monkeypatch.setattr(groq_api, 'GROQ_API_URL', server.url)
+    yield server
+    server.shutdown()
+    server.server_close()
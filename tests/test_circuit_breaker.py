@@ -0,0 +1,87 @@
+import time
+
+from app.utils import groq_api
+from app.utils.circuit_breaker import CircuitBreaker, get_breaker, init_circuit_breakers
+
+
+def _open_breaker(open_seconds=0.05):
+    breaker = CircuitBreaker('test', min_requests=2, open_seconds=open_seconds)
+    breaker.record_failure(0.1, 'HTTP 500')
+    breaker.record_failure(0.1, 'HTTP 500')
+    return breaker
+
+
+def test_breaker_opens_on_error_rate_and_rejects_calls():
+    breaker = CircuitBreaker('test', min_requests=4, error_rate_threshold=0.5)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure(0.1, 'HTTP 503')
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.snapshot()['rejected'] == 1
+    assert breaker.snapshot()['last_failure'] == 'HTTP 503'
+
+
+def test_breaker_opens_on_slow_calls():
+    breaker = CircuitBreaker('test', min_requests=2, slow_call_seconds=1, slow_call_rate_threshold=0.8)
+    breaker.record_success(2)
+    breaker.record_success(3)
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow_request()
+    breaker.record_failure(0.1, 'HTTP 500')
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.allow_request()
+
+
+def test_released_probe_can_be_retried():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow_request()
+    breaker.release()
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_open_breaker_stops_calls_to_a_failing_provider(app, provider, monkeypatch):
+    provider.status = 500
+    monkeypatch.setattr(groq_api, '_backoff', lambda *args: None)
+    app.config['CIRCUIT_BREAKER_MIN_REQUESTS'] = 2
+    init_circuit_breakers(app)
+
+    with app.app_context():
+        meals, from_api = groq_api.generate_uncached_meal_plans('Lunch', 150, 'something unusual')
+        assert not from_api
+        assert len(provider.requests) == 2
+
+        meals, from_api = groq_api.generate_uncached_meal_plans('Lunch', 150, 'something unusual')
+        assert not from_api
+        assert len(provider.requests) == 2
+
+    assert get_breaker('groq', provider.requests[0][1]['model']).state == CircuitBreaker.OPEN
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from app.utils import groq_api
+from app.utils.deadline import Deadline, deadline_for
+from app.utils.http_client import ProviderHTTPClient, TotalTimeoutError
+from app.utils.rate_limiter import get_rate_limiter
+
+
+def test_deadline_caps_stage_timeouts():
+    deadline = Deadline(1)
+
+    assert deadline.cap(30) <= 1
+    assert deadline.cap(0.5) == 0.5
+    assert deadline.allows(0.5)
+    assert not deadline.allows(2)
+    assert not deadline.expired()
+    assert Deadline(0).expired()
+
+
+def test_deadline_for_uses_the_endpoint_budget(app):
+    app.config['MEAL_PLAN_DEADLINES'].update({'default': 7, 'stream': 3})
+
+    with app.app_context():
+        assert deadline_for('stream').seconds == 3
+        assert deadline_for('unknown').seconds == 7
+
+
+def test_used_up_total_timeout_is_rejected_before_sending(provider):
+    client = ProviderHTTPClient()
+
+    with pytest.raises(TotalTimeoutError):
+        client.post_json(provider.url, payload={}, total_timeout=0)
+    with pytest.raises(TotalTimeoutError):
+        list(client.stream_lines(provider.url, payload={'stream': True}, total_timeout=-1))
+
+    assert provider.requests == []
+
+
+def test_slow_provider_falls_back_within_the_deadline(app, provider):
+    provider.delay = 3
+    app.config['MEAL_PLAN_MIN_ATTEMPT_SECONDS'] = 0.2
+
+    with app.app_context():
+        started = time.monotonic()
+        meals, from_api = groq_api.generate_uncached_meal_plans('Lunch', 150, 'something unusual',
+                                                                deadline=Deadline(1))
+
+    assert time.monotonic() - started < 2
+    assert not from_api
+    assert meals
+
+
+def test_no_attempt_without_enough_time_left(app, provider):
+    app.config['MEAL_PLAN_MIN_ATTEMPT_SECONDS'] = 2
+
+    with app.app_context():
+        meals, from_api = groq_api.generate_uncached_meal_plans('Lunch', 150, 'something unusual',
+                                                                deadline=Deadline(1))
+
+    assert not from_api
+    assert provider.requests == []
+
+
+def test_deadline_is_checked_again_after_waiting_for_quota(app, provider, monkeypatch):
+    app.config['MEAL_PLAN_MIN_ATTEMPT_SECONDS'] = 0.5
+    monkeypatch.setattr(get_rate_limiter(), 'acquire', lambda *args, **kwargs: time.sleep(0.6))
+
+    with app.app_context():
+        meals, from_api = groq_api.generate_uncached_meal_plans('Lunch', 150, 'something unusual',
+                                                                deadline=Deadline(1))
+
+    assert not from_api
+    assert provider.requests == []
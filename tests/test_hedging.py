@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+from app.utils import groq_api
+from app.utils.deadline import Deadline
+from app.utils.hedging import HedgePolicy, get_hedge_policy, init_hedging
+
+
+class _Response:
+    def __init__(self, status_code, label):
+        self.status_code = status_code
+        self.label = label
+
+
+def _policy(**settings):
+    settings = dict({'enabled': True, 'min_delay': 0.05, 'max_hedge_rate': 1.0, 'min_samples': 1}, **settings)
+    policy = HedgePolicy(**settings)
+    policy._record_latency(0.01)
+    return policy
+
+
+def _attempts(*plans):
+    """fn for HedgePolicy.call whose n-th attempt sleeps and then returns or raises as planned"""
+    calls = []
+    lock = threading.Lock()
+
+    def fn(cancel_event):
+        with lock:
+            calls.append(cancel_event)
+            delay, outcome = plans[len(calls) - 1]
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return _Response(outcome, len(calls))
+
+    return fn, calls
+
+
+def test_disabled_policy_calls_once_without_a_cancel_event():
+    fn, calls = _attempts((0, 200))
+
+    assert HedgePolicy(enabled=False).call(fn).status_code == 200
+    assert calls == [None]
+
+
+def test_no_hedge_until_enough_latencies_are_known():
+    policy = HedgePolicy(enabled=True, min_samples=5)
+    fn, calls = _attempts((0.1, 200))
+
+    policy.call(fn)
+
+    assert policy.hedge_delay() is None
+    assert len(calls) == 1
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    policy = _policy()
+    fn, calls = _attempts((0.5, 200), (0, 200))
+
+    started = time.monotonic()
+    response = policy.call(fn)
+
+    assert time.monotonic() - started < 0.4
+    assert len(calls) == 2
+    assert calls[0].is_set()
+    stats = policy.stats()
+    assert (stats['hedges_sent'], stats['hedges_won'], stats['losers_cancelled']) == (1, 1, 1)
+    assert response.status_code == 200
+
+
+def test_hedges_stay_within_the_budget():
+    policy = _policy(max_hedge_rate=0.5)
+    fast, _ = _attempts((0, 200))
+    policy.call(fast)
+    slow, calls = _attempts((0.3, 200), (0, 200))
+    policy.call(slow)
+    assert len(calls) == 2
+
+    slow, calls = _attempts((0.3, 200), (0, 200))
+    policy.call(slow)
+
+    assert len(calls) == 1
+    assert policy.stats()['hedges_over_budget'] == 1
+    assert policy.stats()['recent_hedge_rate'] <= 0.5
+
+
+def test_no_hedge_when_the_delay_outlives_the_deadline():
+    policy = _policy(min_delay=1)
+    fn, calls = _attempts((0.2, 200), (0, 200))
+
+    policy.call(fn, deadline=Deadline(0.5))
+
+    assert len(calls) == 1
+
+
+def test_invalid_primary_loses_to_a_valid_hedge():
+    policy = _policy()
+    fn, _ = _attempts((0.3, 503), (0.1, 200))
+
+    assert policy.call(fn).status_code == 200
+
+
+def test_primary_error_is_raised_when_every_attempt_fails():
+    policy = _policy()
+    fn, _ = _attempts((0.2, RuntimeError('primary')), (0, RuntimeError('hedge')))
+
+    with pytest.raises(RuntimeError, match='primary'):
+        policy.call(fn)
+
+
+def test_provider_call_is_hedged_when_the_first_request_stalls(app, provider):
+    provider.delay = lambda number: 2 if number == 1 else 0
+    app.config.update(HEDGE_ENABLED=True, HEDGE_MIN_DELAY=0.1, HEDGE_MAX_RATE=1.0, HEDGE_MIN_SAMPLES=1)
+    init_hedging(app)
+    get_hedge_policy()._record_latency(0.05)
+
+    with app.app_context():
+        api_details = groq_api.get_model_api_details()
+        started = time.monotonic()
+        response = groq_api._post_completion(api_details, {'model': api_details['model'], 'messages': [], 'max_tokens': 100},
+                                             Deadline(5))
+
+    assert response.status_code == 200
+    assert time.monotonic() - started < 1.5
+    assert len(provider.requests) == 2
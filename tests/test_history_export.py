@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.meal import MealHistory
+from app.models.user import User
+from app.utils.history_export import export_chunks
+
+
+def _add_history(user, count, meal_type='Lunch'):
+    start = datetime(2026, 1, 1)
+    for number in range(count):
+        db.session.add(MealHistory(user_id=user, meal_type=meal_type, meal_name=f'Meal {number}', budget=100,
+                                   date_selected=start + timedelta(hours=number),
+                                   ingredients='[{"name": "beans"}]', instructions='["Boil"]'))
+    db.session.commit()
+
+
+def _other_user():
+    other = User(email='other@example.com', username='other', password='password')
+    db.session.add(other)
+    db.session.commit()
+    return other.id
+
+
+def test_ndjson_is_yielded_a_chunk_at_a_time(app, user):
+    with app.app_context():
+        _add_history(user, 5)
+        chunks = list(export_chunks(MealHistory.query, 'ndjson', chunk_size=2))
+
+    assert [chunk.count('\n') for chunk in chunks] == [2, 2, 1]
+    records = [json.loads(line) for line in ''.join(chunks).splitlines()]
+    assert [record['meal_name'] for record in records] == [f'Meal {number}' for number in range(4, -1, -1)]
+    assert records[0]['ingredients'] == [{'name': 'beans'}]
+    assert records[0]['date_selected'] == '2026-01-01 04:00:00'
+
+
+def test_csv_has_a_header_and_json_payload_cells(app, user):
+    with app.app_context():
+        _add_history(user, 3)
+        text = ''.join(export_chunks(MealHistory.query, 'csv', chunk_size=2))
+
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert len(rows) == 3
+    assert json.loads(rows[0]['ingredients']) == [{'name': 'beans'}]
+    assert json.loads(rows[0]['nutritional_info']) == {}
+    assert 'username' not in rows[0]
+
+
+def test_export_endpoint_streams_only_the_users_history(app, client, user):
+    with app.app_context():
+        _add_history(user, 3)
+        _add_history(_other_user(), 2)
+
+    response = client.get('/api/meal-history/export?format=csv')
+
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'].startswith('attachment; filename=meal-history-')
+    assert 'Content-Length' not in response.headers
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert {row['user_id'] for row in rows} == {str(user)}
+    assert len(rows) == 3
+
+
+def test_export_rejects_unknown_formats(client):
+    response = client.get('/api/meal-history/export?format=xlsx')
+
+    assert response.status_code == 400
+
+
+def test_admin_export_adds_usernames_and_applies_filters(app, client, user):
+    with app.app_context():
+        User.query.get(user).is_admin = True
+        db.session.commit()
+        _add_history(user, 2)
+        _add_history(_other_user(), 3, meal_type='Supper')
+
+    response = client.get('/admin/meals/export?meal_type=Supper')
+
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert response.mimetype == 'application/x-ndjson'
+    assert len(records) == 3
+    assert {record['username'] for record in records} == {'other'}
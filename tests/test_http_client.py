@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+from app.utils.http_client import ProviderHTTPClient, RequestCancelled, TotalTimeoutError
+
+
+def test_calls_reuse_a_pooled_connection(provider):
+    client = ProviderHTTPClient()
+
+    for _ in range(3):
+        response = client.post_json(provider.url, payload={'messages': []})
+        assert response.status_code == 200
+        assert response.json()['choices'][0]['message']['content'] == '{}'
+
+    assert len({port for port, _ in provider.requests}) == 1
+
+
+def test_total_timeout_bounds_a_slowly_sent_body(provider):
+    provider.content = 'x' * 2000
+    provider.chunk_delay = 0.3
+    client = ProviderHTTPClient(read_timeout=5)
+
+    # Each chunk arrives well within the read timeout, but the whole body doesn't fit the total
+    with pytest.raises(TotalTimeoutError):
+        list(client.stream_lines(provider.url, payload={'stream': True}, total_timeout=0.5))
+
+
+def test_cancelled_request_is_abandoned(provider):
+    cancel = threading.Event()
+    cancel.set()
+
+    with pytest.raises(RequestCancelled):
+        ProviderHTTPClient().post_json(provider.url, payload={}, cancel_event=cancel)
+
+
+def test_stream_lines_yields_server_sent_events(provider):
+    provider.content = 'hello'
+
+    lines = list(ProviderHTTPClient().stream_lines(provider.url, payload={'stream': True}))
+
+    assert lines[-1] == 'data: [DONE]'
+    assert '"hello"' in lines[0]
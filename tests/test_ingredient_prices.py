@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils import ingredient_prices
+from app.utils.ingredient_prices import IngredientPriceTable
+
+table = IngredientPriceTable.load()
+
+
+def test_lookup_matches_the_longest_known_phrase():
+    assert table.lookup("Beef cubes")['name'].lower() == 'beef'
+    assert table.lookup("Coconut milk")['name'].lower() == 'coconut milk'
+    assert table.lookup("Unobtainium") is None
+
+
+def test_lookup_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(ingredient_prices, 'LOOKUP_CACHE_SIZE', 8)
+    small = IngredientPriceTable.load()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        found = list(executor.map(small.lookup, [f"beef variety {number}" for number in range(200)]))
+
+    assert all(entry['name'].lower() == 'beef' for entry in found)
+    assert small._lookup.cache_info().currsize <= 8
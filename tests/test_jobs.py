@@ -0,0 +1,83 @@
+import time
+
+from app.api import meal as meal_api
+from app.utils.jobs import InlineBackend, Job, JobQueue, get_job_queue
+from app.utils.rate_limiter import INTERACTIVE
+
+
+def _fail():
+    raise RuntimeError('provider exploded')
+
+
+def test_inline_job_records_result_and_failure():
+    queue = JobQueue(backend=InlineBackend())
+
+    job = queue.submit(lambda a, b=0: a + b, 2, b=3, owner_id=7)
+    assert job.state == Job.SUCCEEDED
+    assert job.result == 5
+    assert job.owner_id == 7
+    assert job.started_at <= job.finished_at
+
+    failed = queue.submit(_fail)
+    assert failed.state == Job.FAILED
+    assert failed.error == 'provider exploded'
+    assert failed.result is None
+    assert queue.stats()['states'] == {Job.SUCCEEDED: 1, Job.FAILED: 1}
+
+
+def test_max_jobs_drops_the_oldest_finished_jobs():
+    queue = JobQueue(backend=InlineBackend(), max_jobs=3)
+    jobs = [queue.submit(lambda number=number: number) for number in range(5)]
+
+    assert queue.get(jobs[0].id) is None
+    assert queue.get(jobs[1].id) is None
+    assert [queue.get(job.id).result for job in jobs[2:]] == [2, 3, 4]
+
+
+def test_unfinished_jobs_are_never_pruned():
+    class HeldBackend(InlineBackend):
+        def submit(self, fn):
+            pass
+
+    queue = JobQueue(backend=HeldBackend(), max_jobs=2, result_ttl=0)
+    jobs = [queue.submit(lambda: None) for _ in range(3)]
+
+    assert all(queue.get(job.id).state == Job.QUEUED for job in jobs)
+
+
+def test_expired_jobs_are_pruned_after_result_ttl():
+    queue = JobQueue(backend=InlineBackend(), result_ttl=60)
+    old = queue.submit(lambda: 'old')
+    old.finished_at = time.time() - 61
+    recent = queue.submit(lambda: 'recent')
+
+    assert queue.get(old.id) is None
+    assert queue.get(recent.id).result == 'recent'
+
+
+def test_async_generation_runs_at_interactive_priority(app, client, monkeypatch):
+    calls = []
+
+    def fake_generate(meal_type, budget, preferences=None, deadline=None, priority=None):
+        calls.append((meal_type, budget, preferences, priority))
+        return [{'name': 'Ugali'}]
+
+    monkeypatch.setattr(meal_api, 'generate_meal_plans', fake_generate)
+    get_job_queue().backend = InlineBackend()
+
+    response = client.post('/api/generate-meal-plans?async=1',
+                           json={'meal_type': 'Lunch', 'budget': 150, 'preferences': 'vegetarian'})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert calls == [('Lunch', 150.0, 'vegetarian', INTERACTIVE)]
+
+    job = client.get(body['job_url']).get_json()['data']
+    assert job['state'] == Job.SUCCEEDED
+    assert job['result'] == [{'name': 'Ugali'}]
+
+
+def test_jobs_are_private_to_their_owner(app, client):
+    job = get_job_queue().submit(lambda: None, owner_id=None)
+
+    assert client.get(f'/api/jobs/{job.id}').status_code == 404
+    assert client.get('/api/jobs/missing').status_code == 404
@@ -0,0 +1,69 @@
+import json
+
+from app import db
+from app.models.meal import Meal, MealHistory
+from app.utils.json_backfill import backfill_json_columns, convert_json_columns, normalize_json_text
+
+
+def _add_meals(raw_ingredients):
+    for number, ingredients in enumerate(raw_ingredients):
+        db.session.add(Meal(name=f'Meal {number}', meal_type='Lunch', estimated_cost=100, ingredients=ingredients,
+                            instructions='Boil it', nutritional_info='{"calories": "500 kcal"}'))
+    db.session.commit()
+
+
+def test_normalize_keeps_json_and_wraps_free_text():
+    assert normalize_json_text('[{"name": "rice"}]') == '[{"name": "rice"}]'
+    assert normalize_json_text('  ', empty='[]') == '[]'
+    assert normalize_json_text(None) is None
+    assert json.loads(normalize_json_text('2 cups of rice')) == '2 cups of rice'
+
+
+def test_backfill_rewrites_only_invalid_payloads_in_chunks(app, user):
+    with app.app_context():
+        _add_meals(['[{"name": "rice"}]', '2 cups of rice', '', '["beans"]', 'beans, maize'])
+        db.session.add(MealHistory(user_id=user, meal_type='Lunch', meal_name='Old', budget=100,
+                                   ingredients='rice', instructions='[]'))
+        db.session.commit()
+
+        progress = []
+        assert backfill_json_columns(chunk_size=2, echo=progress.append) == {'meals': 5, 'meal_history': 1}
+        assert len([line for line in progress if line.startswith('meals:')]) == 3
+
+        db.session.expire_all()
+        meals = Meal.query.order_by(Meal.id).all()
+        assert [meal.ingredients for meal in meals] == ['[{"name": "rice"}]', '"2 cups of rice"', '[]',
+                                                        '["beans"]', '"beans, maize"']
+        assert all(meal.instructions == '"Boil it"' for meal in meals)
+        assert MealHistory.query.one().ingredients_data == 'rice'
+
+        # A second run finds nothing left to fix
+        assert backfill_json_columns(echo=progress.append) == {'meals': 0, 'meal_history': 0}
+
+
+def test_conversion_is_a_no_op_on_sqlite(app):
+    with app.app_context():
+        assert convert_json_columns(echo=lambda line: None) is False
+
+
+def test_payloads_are_decoded_once_and_refreshed_on_assignment(app):
+    with app.app_context():
+        _add_meals(['[{"name": "rice"}]'])
+        meal = Meal.query.one()
+
+        assert meal.ingredients_data == [{'name': 'rice'}]
+        assert meal.ingredients_data is meal.ingredients_data
+        assert meal.instructions_data == []  # not valid JSON
+
+        meal.ingredients = '[{"name": "beans"}]'
+        assert meal.ingredients_data == [{'name': 'beans'}]
+
+
+def test_backfill_command(app, user):
+    with app.app_context():
+        _add_meals(['2 cups of rice'])
+
+    result = app.test_cli_runner().invoke(args=['backfill-json'])
+
+    assert result.exit_code == 0
+    assert 'meals: 1 rows rewritten' in result.output
@@ -0,0 +1,66 @@
+import json
+
+from app.utils import groq_api
+from app.utils.groq_api import NO_MATCHING_MEALS_MESSAGE
+
+IMPOSSIBLE = "vegan, allergic to gluten, no beans, no rice, no potato, no maize, no banana, no cassava"
+
+
+def test_generate_explains_when_preferences_rule_out_every_meal(client):
+    response = client.post('/api/generate-meal-plans', json={
+        'meal_type': 'Supper', 'budget': 250, 'preferences': IMPOSSIBLE
+    })
+
+    assert response.status_code == 422
+    assert response.get_json()['message'] == NO_MATCHING_MEALS_MESSAGE
+
+
+def test_stream_sends_an_error_event_when_no_meal_fits(client):
+    response = client.post('/api/generate-meal-plans/stream', json={
+        'meal_type': 'Supper', 'budget': 250, 'preferences': IMPOSSIBLE
+    })
+    body = response.get_data(as_text=True)
+
+    assert 'event: meal' not in body
+    assert 'event: error' in body
+    assert json.dumps(NO_MATCHING_MEALS_MESSAGE) in body
+
+
+def test_generate_without_preferences_still_succeeds(client):
+    response = client.post('/api/generate-meal-plans', json={'meal_type': 'Lunch', 'budget': 150})
+
+    assert response.status_code == 200
+    assert len(response.get_json()['data']) == 3
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, meals):
+        self._body = {'choices': [{'message': {'content': json.dumps({'meals': meals})}}]}
+        self.text = json.dumps(self._body)
+
+    def json(self):
+        return self._body
+
+
+def _llm_meal(name, ingredient, cost=150):
+    return {'name': name, 'description': name, 'total_cost': cost,
+            'ingredients': [{'name': ingredient, 'quantity': '1 portion', 'cost': cost}],
+            'instructions': ['Cook it'], 'nutritional_info': {'calories': '500 kcal'}}
+
+
+def test_batch_keeps_adhering_llm_meals_when_others_break_preferences(app, monkeypatch):
+    meals = [_llm_meal('Bean Stew', 'Beans'), _llm_meal('Beef Fry', 'Beef'), _llm_meal('Nyama Choma', 'Goat meat')]
+    monkeypatch.setattr(groq_api, 'GROQ_API_KEY', 'test-key')
+    monkeypatch.setattr(groq_api, '_post_completion', lambda *args, **kwargs: FakeResponse(meals))
+
+    with app.app_context():
+        meal_plans, from_api = groq_api._generate_meal_plans_uncached('Lunch', 150, 'vegetarian')
+
+    names = [meal['name'] for meal in meal_plans]
+    assert names[0] == 'Bean Stew'
+    assert 'Beef Fry' not in names and 'Nyama Choma' not in names
+    assert len(names) == 3
+    assert not from_api
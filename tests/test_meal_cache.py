@@ -0,0 +1,63 @@
+import json
+import time
+
+from app.utils.groq_api import generate_meal_plans
+from app.utils.meal_cache import MealPlanCache
+
+MEALS = [{'name': 'Githeri', 'total_cost': 100}]
+
+
+def test_equivalent_requests_share_a_key():
+    cache = MealPlanCache(budget_bucket=10)
+
+    assert cache.make_key('Breakfast', 101, 'Vegetarian, no beef') == cache.make_key(' breakfast', 99, 'no beef vegetarian!')
+    assert cache.make_key('Breakfast', 100) != cache.make_key('Breakfast', 150)
+    assert cache.make_key('Breakfast', 100, 'vegan') != cache.make_key('Lunch', 100, 'vegan')
+
+
+def test_entries_expire_and_are_evicted_least_recently_used_first():
+    cache = MealPlanCache(max_entries=2, ttl=0.05)
+    cache.set('a', MEALS)
+    cache.set('b', MEALS)
+    cache.get('a')
+    cache.set('c', MEALS)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == MEALS
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    assert cache.stats()['hits'] == 2
+
+
+def test_callers_get_copies():
+    cache = MealPlanCache()
+    cache.set('a', MEALS)
+
+    cache.get('a')[0]['name'] = 'Changed'
+
+    assert cache.get('a')[0]['name'] == 'Githeri'
+
+
+def test_other_processes_read_entries_from_the_shared_directory(tmp_path):
+    writer = MealPlanCache(cache_dir=str(tmp_path))
+    reader = MealPlanCache(cache_dir=str(tmp_path))
+    key = writer.make_key('Lunch', 150, 'vegan')
+
+    writer.set(key, MEALS)
+
+    assert reader.get(key) == MEALS
+    writer.clear()
+    assert MealPlanCache(cache_dir=str(tmp_path)).get(key) is None
+
+
+def test_generate_meal_plans_serves_repeats_from_the_cache(app, provider):
+    meals = [{'name': f'Meal {number}', 'total_cost': 140, 'ingredients': [{'name': 'Mystery', 'cost': 140}],
+              'instructions': ['Cook'], 'description': 'x'} for number in range(3)]
+    provider.content = json.dumps({'meals': meals})
+
+    with app.app_context():
+        first = generate_meal_plans('Lunch', 150, 'something unusual')
+        second = generate_meal_plans('Lunch', 152, 'Something unusual!')
+
+    assert [meal['name'] for meal in first] == [meal['name'] for meal in second]
+    assert len(provider.requests) == 1
@@ -0,0 +1,29 @@
+from app.utils.meal_catalog import MealCatalog
+from app.utils.preferences import parse_preferences
+
+catalog = MealCatalog.load()
+
+
+def test_fallback_never_relaxes_allergens_or_diet():
+    meals = catalog.find('Breakfast', 100, "allergic to gluten, vegan")
+    constraints = parse_preferences("allergic to gluten, vegan")
+
+    assert meals
+    for meal in meals:
+        assert constraints.violations(meal) == []
+        assert meal['name'] != 'Kenyan Breakfast Combo'
+
+
+def test_fallback_returns_fewer_meals_rather_than_unsafe_ones():
+    meals = catalog.find('Supper', 250, "vegan, no beans, allergic to gluten, no rice")
+
+    assert len(meals) < 3
+    for meal in meals:
+        assert parse_preferences("vegan, no beans, allergic to gluten, no rice").violations(meal) == []
+
+
+def test_requested_items_only_rank_meals():
+    meals = catalog.find('Lunch', 150, "include chapati")
+
+    assert len(meals) == 3
+    assert 'chapati' in meals[0]['name'].lower()
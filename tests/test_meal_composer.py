@@ -0,0 +1,69 @@
+import pytest
+
+from app.utils.meal_composer import NUTRITION_TARGETS, compose_meal_plans, format_amount, get_meal_composer
+from app.utils.preferences import diet_tags, meal_tokens
+
+IMPOSSIBLE = 'vegan, allergic to gluten, no beans, no rice, no maize, no sugar, no potato'
+
+
+def _kcal(meal):
+    return int(meal['nutritional_info']['calories'].split()[0])
+
+
+def test_amounts_are_written_like_a_recipe():
+    assert format_amount(1.4, 'cup') == '1 1/2 cups'
+    assert format_amount(0.2, 'teaspoon') == '1/4 teaspoon'
+    assert format_amount(143, 'g') == '140g'
+    assert format_amount(2, 'medium') == '2 medium'
+
+
+@pytest.mark.parametrize('meal_type, budget', [('Breakfast', 80), ('Lunch', 200), ('Supper', 300)])
+def test_composed_meals_fit_the_budget_and_nutrition_targets(app, meal_type, budget):
+    with app.app_context():
+        meals = get_meal_composer().compose(meal_type, budget)
+
+    kcal_min, kcal_max, _, _ = NUTRITION_TARGETS[meal_type.lower()]
+    assert len(meals) == 3
+    assert len({meal['name'] for meal in meals}) == 3
+    for meal in meals:
+        assert 0.5 * budget <= meal['total_cost'] <= 1.1 * budget
+        assert meal['total_cost'] == sum(ingredient['cost'] for ingredient in meal['ingredients'])
+        assert kcal_min <= _kcal(meal) <= kcal_max
+        assert meal['instructions']
+
+
+def test_composed_meals_respect_diet_and_exclusions(app):
+    with app.app_context():
+        vegan = get_meal_composer().compose('Lunch', 200, 'vegan')
+        no_beans = get_meal_composer().compose('Lunch', 200, 'no beans')
+
+    assert all('vegan' in diet_tags(meal) for meal in vegan)
+    assert all('bean' not in meal_tokens(meal) for meal in no_beans)
+
+
+def test_included_items_appear_in_every_meal(app):
+    with app.app_context():
+        meals = get_meal_composer().compose('Lunch', 200, 'with ugali')
+
+    assert all('ugali' in meal_tokens(meal) for meal in meals)
+
+
+def test_requests_the_templates_cannot_cover(app):
+    composer = get_meal_composer()
+
+    with app.app_context():
+        assert composer.compose('Lunch', 10) is None
+        assert composer.compose('Brunch', 200) is None
+        assert composer.compose('Lunch', 200, IMPOSSIBLE) is None
+
+
+def test_mode_decides_which_requests_are_composed(app):
+    with app.app_context():
+        assert compose_meal_plans('Lunch', 200, 'vegetarian')
+        assert compose_meal_plans('Lunch', 200, 'something unusual') is None
+
+        app.config['MEAL_COMPOSER_MODE'] = 'always'
+        assert compose_meal_plans('Lunch', 200, 'something unusual')
+
+        app.config['MEAL_COMPOSER_MODE'] = 'off'
+        assert compose_meal_plans('Lunch', 200, 'vegetarian') is None
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.meal import MealHistory
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def _add_history(user, count, undated=()):
+    start = datetime(2026, 1, 1)
+    for number in range(count):
+        db.session.add(MealHistory(user_id=user, meal_type='Lunch', meal_name=f'Meal {number}', budget=100,
+                                   date_selected=start + timedelta(hours=number // 2)))
+    db.session.commit()
+    if undated:
+        MealHistory.query.filter(MealHistory.meal_name.in_([f'Meal {number}' for number in undated])) \
+            .update({MealHistory.date_selected: None}, synchronize_session=False)
+        db.session.commit()
+
+
+def _all_pages(client, limit):
+    names, cursor = [], None
+    while True:
+        body = client.get('/api/meal-history', query_string={'limit': limit, 'cursor': cursor or ''}).get_json()
+        names += [meal['meal_name'] for meal in body['data']]
+        cursor = body['next_cursor']
+        if not cursor:
+            return names
+
+
+def test_cursor_round_trips_with_and_without_a_date():
+    assert decode_cursor(encode_cursor(datetime(2026, 1, 2, 3, 4, 5), 42)) == (datetime(2026, 1, 2, 3, 4, 5), 42)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+
+def test_keyset_pages_cover_every_row_once(app, user, client):
+    with app.app_context():
+        _add_history(user, 15)
+
+    names = _all_pages(client, 4)
+
+    assert len(names) == 15
+    assert names[0] == 'Meal 14' and names[-1] == 'Meal 0'
+
+
+def test_rows_without_a_date_come_last_and_are_paged(app, user, client):
+    with app.app_context():
+        _add_history(user, 12, undated=(2, 5, 8, 11))
+
+    names = _all_pages(client, 3)
+
+    assert len(names) == len(set(names)) == 12
+    assert names[-4:] == ['Meal 11', 'Meal 8', 'Meal 5', 'Meal 2']
+
+
+def test_details_of_a_row_without_a_date(app, user, client):
+    with app.app_context():
+        _add_history(user, 1, undated=(0,))
+        meal = MealHistory.query.one()
+        meal_id = meal.id
+        assert meal.to_dict()['date_selected'] is None
+
+    response = client.get(f'/api/meal-details/{meal_id}')
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['date_selected'] is None
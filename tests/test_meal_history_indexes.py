@@ -0,0 +1,43 @@
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import inspect, text
+from werkzeug.datastructures import MultiDict
+
+from app import db
+from app.controllers.admin import filter_meal_history
+from app.models.meal import MealHistory
+
+
+def test_meal_history_indexes_are_created(app):
+    with app.app_context():
+        indexes = {index['name']: index['column_names'] for index in inspect(db.engine).get_indexes('meal_history')}
+
+    assert indexes['ix_meal_history_type_date'] == ['meal_type', 'date_selected']
+    assert indexes['ix_meal_history_date'] == ['date_selected']
+    assert indexes['ix_meal_history_name'] == ['meal_name']
+    assert 'ix_meal_history_user_date' in indexes
+
+
+def test_user_history_is_read_through_the_user_date_index(app, user):
+    with app.app_context():
+        query = MealHistory.query.filter(MealHistory.user_id == user).order_by(MealHistory.date_selected.desc())
+        compiled = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        plan = ' '.join(str(row[-1]) for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+    assert 'ix_meal_history_user_date' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_today_filter_is_a_half_open_range(app, user):
+    midnight = datetime.combine(datetime.now().date(), time.min)
+    with app.app_context():
+        for number, selected in enumerate([midnight - timedelta(seconds=1), midnight, midnight + timedelta(hours=1),
+                                           midnight + timedelta(days=1)]):
+            db.session.add(MealHistory(user_id=user, meal_type='Lunch', meal_name=f'Meal {number}', budget=100,
+                                       date_selected=selected))
+        db.session.commit()
+
+        today = filter_meal_history(MealHistory.query, MultiDict({'date_range': 'today'}))
+
+        assert sorted(meal.meal_name for meal in today) == ['Meal 1', 'Meal 2']
+        assert 'date(' not in str(today.statement).lower()
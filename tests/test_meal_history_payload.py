@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db
+from app.models.meal import MealHistory
+
+
+def _add_history(user, count):
+    for number in range(count):
+        db.session.add(MealHistory(user_id=user, meal_type='Lunch', meal_name=f'Meal {number}', budget=100,
+                                   description='A big stew', ingredients='[{"name": "beans"}]',
+                                   instructions='["Boil"]', nutritional_info='{"calories": "500 kcal"}'))
+    db.session.commit()
+
+
+@contextmanager
+def _history_selects(app):
+    """Collect the SELECTs that read meal_history while the block runs"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM meal_history' in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def test_summaries_leave_the_payload_unloaded(app, user):
+    with app.app_context():
+        _add_history(user, 3)
+        db.session.expunge_all()
+
+        with _history_selects(app) as statements:
+            summaries = [meal.to_summary() for meal in MealHistory.query.all()]
+
+    assert len(summaries) == 3
+    assert len(statements) == 1
+    assert 'ingredients' not in statements[0]
+    assert 'nutritional_info' not in statements[0]
+
+
+def test_history_api_is_a_single_query_without_the_payload(app, client, user):
+    with app.app_context():
+        _add_history(user, 5)
+
+    with _history_selects(app) as statements:
+        body = client.get('/api/meal-history').get_json()
+
+    assert len(body['data']) == 5
+    assert 'ingredients' not in body['data'][0]
+    assert len(statements) == 1
+    assert 'description' not in statements[0]
+
+
+def test_meal_details_load_the_payload_in_the_same_query(app, client, user):
+    with app.app_context():
+        _add_history(user, 1)
+        meal_id = MealHistory.query.one().id
+
+    with _history_selects(app) as statements:
+        meal = client.get(f'/api/meal-details/{meal_id}').get_json()['data']
+
+    assert meal['ingredients'] == [{'name': 'beans'}]
+    assert meal['nutritional_info'] == {'calories': '500 kcal'}
+    assert len(statements) == 1
+    assert 'ingredients' in statements[0]
@@ -0,0 +1,75 @@
+import json
+
+from app.models.meal import Meal
+from app.utils import groq_api
+from app.utils.meal_store import find_stored_meals, store_generated_meals
+
+
+def _meal(name, ingredient, cost=150):
+    return {'name': name, 'description': name, 'total_cost': cost,
+            'ingredients': [{'name': ingredient, 'quantity': '1 portion', 'cost': cost}],
+            'instructions': ['Cook it'], 'nutritional_info': {'calories': '500 kcal'}}
+
+
+def test_generated_meals_are_stored_once_with_diet_tags(app):
+    with app.app_context():
+        added = store_generated_meals('Lunch', [_meal('Bean Stew', 'beans'), _meal('Beef Stew', 'beef'),
+                                                _meal('Odd Stew', 'beans', cost='about 100')])
+        assert added == 2
+        assert store_generated_meals('Lunch', [_meal('bean stew ', 'beans')]) == 0
+
+        meals = {meal.name: meal for meal in Meal.query.all()}
+        assert set(meals) == {'Bean Stew', 'Beef Stew'}
+        assert meals['Bean Stew'].diet_tags == 'vegan,vegetarian'
+        assert meals['Beef Stew'].diet_tags == ''
+        assert meals['Bean Stew'].source == 'generated'
+
+
+def test_stored_meals_are_served_closest_to_the_budget(app):
+    with app.app_context():
+        store_generated_meals('Lunch', [_meal('Cheap Beans', 'beans', 80), _meal('Bean Stew', 'beans', 150),
+                                        _meal('Githeri', 'maize', 140), _meal('Rice and Lentils', 'lentils', 120),
+                                        _meal('Too Dear', 'beans', 200), _meal('Bean Breakfast', 'beans', 150)])
+        Meal.query.filter_by(name='Bean Breakfast').update({Meal.meal_type: 'Breakfast'})
+
+        meals = find_stored_meals('Lunch', 150)
+
+    assert [meal['name'] for meal in meals] == ['Bean Stew', 'Githeri', 'Rice and Lentils']
+
+
+def test_stored_meals_must_fit_the_preferences(app):
+    with app.app_context():
+        store_generated_meals('Lunch', [_meal('Beef Stew', 'beef'), _meal('Bean Stew', 'beans'),
+                                        _meal('Githeri', 'maize'), _meal('Chicken Pilau', 'chicken')])
+
+        assert find_stored_meals('Lunch', 150, 'vegetarian') is None
+        assert len(find_stored_meals('Lunch', 150)) == 3
+
+
+def test_retrieval_can_be_switched_off(app):
+    app.config['MEAL_RETRIEVAL_ENABLED'] = False
+
+    with app.app_context():
+        assert store_generated_meals('Lunch', [_meal('Bean Stew', 'beans')]) == 0
+        assert find_stored_meals('Lunch', 150) is None
+
+
+def test_stored_meals_are_served_without_calling_the_provider(app, provider):
+    with app.app_context():
+        store_generated_meals('Lunch', [_meal('Bean Stew', 'beans'), _meal('Githeri', 'maize'),
+                                        _meal('Rice and Lentils', 'lentils')])
+
+        meals = groq_api.generate_meal_plans('Lunch', 150, 'vegetarian, something unusual')
+
+    assert sorted(meal['name'] for meal in meals) == ['Bean Stew', 'Githeri', 'Rice and Lentils']
+    assert provider.requests == []
+
+
+def test_generated_meals_are_written_back(app, provider):
+    provider.content = json.dumps({'meals': [_meal('Bean Stew', 'beans'), _meal('Githeri', 'maize'),
+                                             _meal('Rice and Lentils', 'lentils')]})
+
+    with app.app_context():
+        groq_api.generate_meal_plans('Lunch', 150, 'something unusual')
+
+        assert Meal.query.filter_by(meal_type='Lunch', source='generated').count() == 3
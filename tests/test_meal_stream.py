@@ -0,0 +1,53 @@
+import json
+
+from app.utils.groq_api import stream_meal_plans
+
+
+def _meal(name, cost=140):
+    return {'name': name, 'description': name, 'total_cost': cost,
+            'ingredients': [{'name': 'Mystery', 'quantity': '1 portion', 'cost': cost}],
+            'instructions': ['Cook it']}
+
+
+def _events(body):
+    events = []
+    for raw in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in raw.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_meals_are_sent_as_events_as_they_complete(client, provider):
+    provider.content = json.dumps({'meals': [_meal('Meal A'), _meal('Meal B'), _meal('Meal C')]})
+
+    response = client.post('/api/generate-meal-plans/stream', json={
+        'meal_type': 'Lunch', 'budget': 150, 'preferences': 'something unusual'
+    })
+    events = _events(response.get_data(as_text=True))
+
+    assert response.mimetype == 'text/event-stream'
+    assert [name for name, _ in events] == ['meal', 'meal', 'meal', 'done']
+    assert [data['name'] for _, data in events[:3]] == ['Meal A', 'Meal B', 'Meal C']
+    assert events[-1][1] == {'count': 3}
+    assert provider.requests[0][1]['stream'] is True
+
+
+def test_unacceptable_meals_are_replaced_from_the_catalog(app, provider):
+    provider.content = json.dumps({'meals': [_meal('Meal A'), _meal('Far Too Expensive', 900), _meal('Meal C')]})
+
+    with app.app_context():
+        meals = list(stream_meal_plans('Lunch', 150, 'something unusual'))
+
+    names = [meal['name'] for meal in meals]
+    assert names[:2] == ['Meal A', 'Meal C']
+    assert len(names) == 3 and 'Far Too Expensive' not in names
+
+
+def test_a_truncated_stream_keeps_its_complete_meals(app, provider):
+    provider.content = json.dumps({'meals': [_meal('Meal A'), _meal('Meal B'), _meal('Meal C')]})[:-120]
+
+    with app.app_context():
+        meals = list(stream_meal_plans('Lunch', 150, 'something unusual'))
+
+    assert [meal['name'] for meal in meals][:2] == ['Meal A', 'Meal B']
+    assert len(meals) == 3
@@ -0,0 +1,29 @@
+from app.utils.preferences import meal_tokens, parse_preferences
+
+
+def _meal(name, *ingredients):
+    return {'name': name, 'ingredients': [{'name': ingredient} for ingredient in ingredients]}
+
+
+def test_oes_and_ies_plurals_match_the_singular():
+    meal = _meal("Beans Stew", "Tomatoes", "Berries")
+
+    assert {'tomato', 'berry'} <= meal_tokens(meal)
+    assert parse_preferences("no tomato").violations(meal)
+    assert parse_preferences("no tomatoes").violations(meal)
+    assert parse_preferences("allergic to berries").violations(meal)
+
+
+def test_compound_words_contain_forbidden_items():
+    meal = _meal("Pancakes", "Wheat flour", "Buttermilk")
+
+    assert parse_preferences("no milk").violations(meal)
+    assert parse_preferences("allergic to dairy").violations(meal)
+    assert parse_preferences("vegan").violations(meal)
+
+
+def test_words_that_only_start_or_end_with_a_keyword_are_allowed():
+    assert parse_preferences("vegetarian").violations(_meal("Hamira Bread", "Hamira", "Flour")) == []
+    assert parse_preferences("no oats").violations(_meal("Goat Stew", "Goat meat")) == []
+    assert parse_preferences("no peas").violations(_meal("Peanut Stew", "Peanuts")) == []
+    assert parse_preferences("vegan").violations(_meal("Fruit Salad", "Honeydew", "Eggplant", "Butternut")) == []
@@ -0,0 +1,36 @@
+from app import db
+from app.models.meal import MealHistory
+from app.utils.prewarm import popular_combinations
+
+
+def _history(user, meal_type, budget, preferences, times):
+    for _ in range(times):
+        db.session.add(MealHistory(user_id=user, meal_type=meal_type, meal_name='Meal', budget=budget,
+                                   preferences=preferences))
+
+
+def test_popular_combinations_are_counted_in_the_database(app, user):
+    with app.app_context():
+        _history(user, 'Lunch', 150, 'vegetarian', 5)
+        _history(user, 'Lunch', 150, 'Vegetarian!', 2)
+        _history(user, 'Breakfast', 100, None, 4)
+        _history(user, 'Supper', 300, 'no beef', 1)
+        db.session.commit()
+
+        combinations = popular_combinations(top=3, days=30)
+
+    assert combinations == [
+        (('Lunch', 150.0, 'vegetarian'), 7),
+        (('Breakfast', 100.0, ''), 4)
+    ]
+
+
+def test_popular_combinations_filter_by_meal_type(app, user):
+    with app.app_context():
+        _history(user, 'Lunch', 150, None, 3)
+        _history(user, 'Supper', 300, None, 1)
+        db.session.commit()
+
+        combinations = popular_combinations(top=5, days=30, meal_type='Supper')
+
+    assert combinations == [(('Supper', 300.0, ''), 1)]
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from app.utils import groq_api
+from app.utils.deadline import Deadline
+from app.utils.rate_limiter import BATCH, INTERACTIVE, ProviderRateLimiter, RateLimitExceeded, get_rate_limiter
+
+
+def _limiter(path, **kwargs):
+    return ProviderRateLimiter(requests_per_minute=10, tokens_per_minute=100000, state_path=str(path),
+                               max_wait=0.05, **kwargs)
+
+
+def test_batch_calls_leave_the_reserve_to_other_processes(tmp_path):
+    # Two limiters on one state file stand in for the prewarm CLI and a web worker
+    prewarm = _limiter(tmp_path / 'quota.json', batch_reserve=0.5)
+    web = _limiter(tmp_path / 'quota.json', batch_reserve=0.5)
+
+    admitted = 0
+    with pytest.raises(RateLimitExceeded):
+        for _ in range(10):
+            prewarm.acquire(10, priority=BATCH)
+            admitted += 1
+    assert admitted == 5
+
+    for _ in range(5):
+        web.acquire(10, priority=INTERACTIVE)
+    with pytest.raises(RateLimitExceeded):
+        web.acquire(10, priority=INTERACTIVE)
+
+
+def test_interactive_callers_go_ahead_of_batch_within_a_process(tmp_path):
+    limiter = ProviderRateLimiter(requests_per_minute=60, tokens_per_minute=100000, state_path=str(tmp_path / 'q.json'),
+                                  max_wait=5, batch_reserve=0)
+    for _ in range(60):
+        limiter.acquire(1)
+
+    order = []
+
+    def take(priority, name):
+        limiter.acquire(1, priority=priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=take, args=(BATCH, 'batch'))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=take, args=(INTERACTIVE, 'interactive')))
+    threads[1].start()
+    for thread in threads:
+        thread.join()
+
+    assert order == ['interactive', 'batch']
+
+
+def test_full_queue_rejects_at_once(tmp_path):
+    limiter = ProviderRateLimiter(requests_per_minute=1, state_path=str(tmp_path / 'q.json'), max_queue=0)
+
+    with pytest.raises(RateLimitExceeded, match='queue is full'):
+        limiter.acquire(1)
+
+
+def test_penalize_pauses_every_limiter_sharing_the_quota(tmp_path):
+    first = _limiter(tmp_path / 'quota.json')
+    second = _limiter(tmp_path / 'quota.json')
+
+    first.penalize(30)
+
+    with pytest.raises(RateLimitExceeded):
+        second.acquire(10)
+    assert first.stats()['provider_rate_limited'] == 1
+
+
+def test_record_usage_charges_and_refunds_the_token_bucket(tmp_path):
+    limiter = ProviderRateLimiter(requests_per_minute=100, tokens_per_minute=100, state_path=str(tmp_path / 'q.json'),
+                                  max_wait=0.05, batch_reserve=0)
+    limiter.acquire(50)
+    limiter.record_usage(40)
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(50)
+
+    limiter.record_usage(-40)
+    limiter.acquire(50)
+
+
+def test_disabled_limiter_never_blocks(tmp_path):
+    limiter = ProviderRateLimiter(enabled=False, requests_per_minute=1, state_path=str(tmp_path / 'q.json'))
+    limiter.penalize(30)
+
+    for _ in range(5):
+        limiter.acquire(1000)
+
+
+def test_provider_429_pauses_later_calls(app, provider, monkeypatch):
+    provider.status = 429
+    provider.headers = {'Retry-After': '120'}
+    monkeypatch.setattr(groq_api, '_backoff', lambda *args: None)
+
+    with app.app_context():
+        meals, from_api = groq_api.generate_uncached_meal_plans('Lunch', 150, 'something unusual')
+
+    # The first 429 blocks the quota for longer than callers may wait, so no retry reaches the provider
+    assert not from_api
+    assert len(provider.requests) == 1
+    assert get_rate_limiter().stats()['provider_rate_limited'] == 1
+
+
+def test_streamed_429_pauses_later_calls(app, provider):
+    provider.status = 429
+    provider.headers = {'Retry-After': '120'}
+
+    with app.app_context():
+        meals = list(groq_api.stream_meal_plans('Lunch', 150, 'something unusual'))
+
+    assert meals
+    assert get_rate_limiter().stats()['provider_rate_limited'] == 1
+    with pytest.raises(RateLimitExceeded):
+        get_rate_limiter().acquire(10, deadline=Deadline(1))
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.single_flight import SingleFlight, SingleFlightTimeout
+
+
+def _slow(calls, result, seconds=0.2):
+    def fn():
+        calls.append(threading.get_ident())
+        time.sleep(seconds)
+        return result
+    return fn
+
+
+def _run_together(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(position):
+        try:
+            results[position] = target()
+        except Exception as e:
+            errors[position] = e
+
+    threads = [threading.Thread(target=run, args=(position,)) for position in range(count)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_calls_for_a_key_run_once():
+    flight = SingleFlight()
+    calls = []
+
+    results, errors = _run_together(5, lambda: flight.do('key', _slow(calls, [{'name': 'Githeri'}])))
+
+    assert len(calls) == 1
+    assert errors == [None] * 5
+    assert all(result == [{'name': 'Githeri'}] for result in results)
+    # Waiters get their own copy
+    assert len({id(result) for result in results}) == 5
+
+
+def test_waiters_share_the_leaders_error():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError('provider down')
+
+    _, errors = _run_together(3, lambda: flight.do('key', fail))
+
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_waiter_gives_up_after_its_timeout():
+    flight = SingleFlight()
+    leader = threading.Thread(target=flight.do, args=('key', _slow([], 'done', 0.5)))
+    leader.start()
+    time.sleep(0.05)
+
+    with pytest.raises(SingleFlightTimeout):
+        flight.do('key', lambda: 'mine', timeout=0.05)
+    leader.join()
+
+
+def test_lock_dir_shares_the_result_between_processes(tmp_path):
+    # Two coordinators on one lock directory stand in for two worker processes
+    first, second = SingleFlight(lock_dir=str(tmp_path)), SingleFlight(lock_dir=str(tmp_path))
+    calls = []
+    results = {}
+
+    leader = threading.Thread(target=lambda: results.update(first=first.do('key', _slow(calls, 'plans', 0.3))))
+    leader.start()
+    time.sleep(0.05)
+    results['second'] = second.do('key', _slow(calls, 'other plans'))
+    leader.join()
+
+    assert results == {'first': 'plans', 'second': 'plans'}
+    assert len(calls) == 1
@@ -0,0 +1,93 @@
+import itertools
+import threading
+
+from app.utils import week_planner
+from app.utils.groq_api import NO_MATCHING_MEALS_MESSAGE
+from app.utils.meal_catalog import MealCatalog
+from app.utils.preferences import parse_preferences
+
+IMPOSSIBLE = "vegan, allergic to gluten, no beans, no rice, no maize, no sugar, no potato"
+# The catalog has vegan breakfasts and lunches without these, but no supper
+NO_SUPPER = "vegan, allergic to gluten, no beans, no rice"
+
+
+def _same_three(meal_type, budget, preferences=None, deadline=None):
+    # Every day shares one cache entry, so generation always returns the same options
+    return MealCatalog.load().find(meal_type, budget, preferences)
+
+
+def _provider_down(meal_type, budget, preferences=None, deadline=None):
+    return _same_three(meal_type, budget, preferences), False
+
+
+def test_days_get_distinct_meals_when_enough_candidates(monkeypatch):
+    monkeypatch.setattr(week_planner, 'generate_meal_plans', _same_three)
+    monkeypatch.setattr(week_planner, 'generate_uncached_meal_plans', _provider_down)
+
+    plan = week_planner.generate_week_plan(2800, days=7)
+
+    for meal_type in week_planner.MEAL_TYPES:
+        names = [day['meals'][meal_type]['name'] for day in plan['days']]
+        assert len(set(names)) == 7, names
+
+
+def test_fill_meals_keep_preferences(monkeypatch):
+    monkeypatch.setattr(week_planner, 'generate_meal_plans', _same_three)
+    monkeypatch.setattr(week_planner, 'generate_uncached_meal_plans', _provider_down)
+    constraints = parse_preferences("vegetarian, no beans")
+
+    plan = week_planner.generate_week_plan(2800, "vegetarian, no beans", days=7)
+
+    for day in plan['days']:
+        for meal in day['meals'].values():
+            assert constraints.violations(meal) == []
+
+
+def test_every_day_is_generated_while_the_provider_is_healthy(monkeypatch):
+    counter = itertools.count()
+    lock = threading.Lock()
+    calls = []
+
+    def generated(meal_type, budget, preferences=None, deadline=None):
+        with lock:
+            calls.append(meal_type)
+            return [{'name': f'{meal_type} {next(counter)}', 'total_cost': budget} for _ in range(3)]
+
+    monkeypatch.setattr(week_planner, 'generate_meal_plans', generated)
+    monkeypatch.setattr(week_planner, 'generate_uncached_meal_plans', lambda *args, **kwargs: (generated(*args, **kwargs), True))
+
+    plan = week_planner.generate_week_plan(2800, days=7)
+
+    assert sorted(calls) == sorted(week_planner.MEAL_TYPES * 3)
+    for meal_type in week_planner.MEAL_TYPES:
+        names = [day['meals'][meal_type]['name'] for day in plan['days']]
+        assert len(set(names)) == 7
+        assert all(name.startswith(meal_type) for name in names)
+
+
+def test_no_matching_meals_leaves_the_meal_types_empty(monkeypatch):
+    monkeypatch.setattr(week_planner, 'generate_meal_plans', lambda *args, **kwargs: [])
+    monkeypatch.setattr(week_planner, 'generate_uncached_meal_plans', lambda *args, **kwargs: ([], False))
+
+    plan = week_planner.generate_week_plan(3000, IMPOSSIBLE, days=7)
+
+    assert plan['unavailable'] == list(week_planner.MEAL_TYPES)
+    assert all(meal is None for day in plan['days'] for meal in day['meals'].values())
+    assert plan['total_cost'] == 0
+
+
+def test_week_plan_endpoint_explains_when_no_meal_fits(client):
+    response = client.post('/api/generate-week-plan', json={'weekly_budget': 3000, 'preferences': IMPOSSIBLE})
+
+    assert response.status_code == 422
+    assert response.get_json()['message'] == NO_MATCHING_MEALS_MESSAGE
+
+
+def test_week_plan_endpoint_returns_a_partial_plan(client):
+    response = client.post('/api/generate-week-plan', json={'weekly_budget': 3000, 'preferences': NO_SUPPER})
+    body = response.get_json()
+
+    assert response.status_code == 200
+    assert body['data']['unavailable'] == ['Supper']
+    assert 'Supper' in body['message']
+    assert all(day['meals']['Supper'] is None and day['meals']['Lunch'] for day in body['data']['days'])